@@ -0,0 +1,221 @@
+"""
+Benchmarks of `CipApiClient` against the local stub of `benchmarks/stub_server.py`, started in its own process:
+listing throughput in every pagination mode and sharded, `get_case` latency with and without token renewals,
+construction of `CipApiCase` and `Participant`, decoding of a case detail with the installed JSON codecs and
+submission throughput.
+
+Results are printed and can be saved as JSON, then compared with the results of another run:
+
+    python benchmarks/client_suite.py --output before.json
+    python benchmarks/client_suite.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import CIPS  # noqa: E402
+from pycipapi.bulk import SubmissionJob  # noqa: E402
+from pycipapi.cipapi_client import CipApiClient  # noqa: E402
+from pycipapi.json_codecs import CODECS  # noqa: E402
+from pycipapi.models import CipApiCase, Participant  # noqa: E402
+
+STUB_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_server.py')
+
+
+class Results(object):
+    """
+    Measures of a run, each with its unit and whether higher values are better
+    """
+
+    def __init__(self):
+        self.measures = []
+
+    def add(self, name, value, unit, higher_is_better):
+        self.measures.append({'name': name, 'value': value, 'unit': unit, 'higher_is_better': higher_is_better})
+        print("{:<40} {:>12.2f} {}".format(name, value, unit))
+        sys.stdout.flush()
+
+
+def best_time(function, repeat):
+    """
+    :return: the shortest of `repeat` runs of `function`, in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def start_stub(args):
+    process = subprocess.Popen([sys.executable, STUB_SERVER, '--port', '0', '--cases', str(args.cases),
+                                '--participants', str(args.cases), '--variants', str(args.variants),
+                                '--latency', str(args.latency)], stdout=subprocess.PIPE)
+    url = process.stdout.readline().decode('utf-8').strip()
+    if not url:
+        process.kill()
+        raise RuntimeError("The stub server did not start")
+    return process, url
+
+
+def new_client(url, **kwargs):
+    return CipApiClient(url, user='benchmark', password='benchmark', **kwargs)
+
+
+def bench_pagination(url, args, results):
+    for mode in CipApiClient.PAGINATION_MODES:
+        cipapi = new_client(url, pagination=mode)
+        seconds = best_time(lambda: sum(1 for _ in cipapi.get_cases_raw(page_size=args.page_size)), args.repeat)
+        results.add('get_paginated.{}'.format(mode), args.cases / seconds, 'cases/s', True)
+    cipapi = new_client(url, pool_maxsize=args.workers)
+    shards = CipApiClient.shard_filters(sample_type=['raredisease', 'cancer'], cip=CIPS)
+    seconds = best_time(
+        lambda: sum(1 for _ in cipapi.get_cases_sharded_raw(shards, workers=args.workers, page_size=args.page_size)),
+        args.repeat)
+    results.add('get_cases_sharded', args.cases / seconds, 'cases/s', True)
+
+
+def bench_get_case(url, args, results):
+    cipapi = new_client(url)
+    cipapi.get_case_raw(case_id=1, case_version=1)
+    latencies = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        cipapi.get_case_raw(case_id=i + 1, case_version=1)
+        latencies.append(time.perf_counter() - start)
+    results.add('get_case.p50', percentile(latencies, 0.5) * 1000, 'ms', False)
+    results.add('get_case.p95', percentile(latencies, 0.95) * 1000, 'ms', False)
+
+    # every request is answered 401 first, then sent again with a renewed token
+    latencies = []
+    for i in range(args.requests):
+        requests.post(url + '_stub/expire-tokens/')
+        start = time.perf_counter()
+        cipapi.get_case_raw(case_id=i + 1, case_version=1)
+        latencies.append(time.perf_counter() - start)
+    results.add('get_case.token_renewal.p50', percentile(latencies, 0.5) * 1000, 'ms', False)
+
+
+def bench_decode(url, args, results):
+    content = requests.get(url + 'api/2/interpretation-request/1/1/',
+                           headers={'Authorization': new_client(url).token}).content
+    for codec_name in sorted(CODECS):
+        try:
+            codec = CODECS[codec_name]()
+        except ImportError:
+            continue
+        seconds = best_time(lambda: codec.loads(content), args.repeat)
+        results.add('decode_case.{}'.format(codec_name), len(content) / seconds / 1024.0 ** 2, 'MB/s', True)
+    return json.loads(content.decode('utf-8'))
+
+
+def bench_models(url, case, args, results):
+    seconds = best_time(lambda: [CipApiCase(**case) for _ in range(args.requests)], args.repeat)
+    results.add('model.CipApiCase', args.requests / seconds, 'objects/s', True)
+    participants = list(new_client(url).list_participants_raw(page_size=args.page_size))
+    seconds = best_time(lambda: [Participant(**p) for p in participants], args.repeat)
+    results.add('model.Participant', len(participants) / seconds, 'objects/s', True)
+
+
+def bench_submit(url, case, args, results):
+    cipapi = new_client(url)
+    payload = case['interpreted_genome'][0]['interpreted_genome_data']
+    size = len(json.dumps(payload))
+
+    def submit_serially():
+        for i in range(args.requests):
+            cipapi.submit_interpreted_genome_raw(payload, partner_id='partner', analysis_type='raredisease',
+                                                 report_id='{}-1-1'.format(i))
+
+    seconds = best_time(submit_serially, args.repeat)
+    results.add('submit.serial', args.requests / seconds, 'submissions/s', True)
+    results.add('submit.serial.upload', args.requests * size / seconds / 1024.0 ** 2, 'MB/s', True)
+
+    def submit_concurrently():
+        jobs = (SubmissionJob('interpreted_genome', payload, partner_id='partner', analysis_type='raredisease',
+                              report_id='{}-1-1'.format(i)) for i in range(args.requests))
+        report = cipapi.submit_many(jobs, workers=args.workers)
+        if report.failed:
+            raise RuntimeError("Submissions failed: {}".format(report))
+
+    seconds = best_time(submit_concurrently, args.repeat)
+    results.add('submit.concurrent', args.requests / seconds, 'submissions/s', True)
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.STDOUT,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'commit': commit,
+            'requests': requests.__version__}
+
+
+def compare(measures, baseline_path):
+    with open(baseline_path, 'r') as baseline_file:
+        baseline = {m['name']: m for m in json.load(baseline_file)['measures']}
+    title = 'compared with ' + os.path.basename(baseline_path)
+    print("\n{:<40} {:>12} {:>12} {:>9}".format(title, 'before', 'after', 'change'))
+    for measure in measures:
+        before = baseline.get(measure['name'])
+        if before is None or not before['value']:
+            continue
+        change = measure['value'] / before['value'] - 1
+        better = change > 0 if measure['higher_is_better'] else change < 0
+        print("{:<40} {:>12.2f} {:>12.2f} {:>+8.1f}% {}".format(
+            measure['name'], before['value'], measure['value'], change * 100, 'better' if better else 'worse'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=2000, help='cases and participants of the listings')
+    parser.add_argument('--variants', type=int, default=500, help='variants of each case detail')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=50, help='case details fetched and genomes submitted')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent submissions and listed partitions')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added by the stub to every response')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='file the results are written to as JSON')
+    parser.add_argument('--compare', help='results of a previous run to compare with')
+    args = parser.parse_args()
+    # the 401 answered before every token renewal are logged as errors by the client
+    logging.disable(logging.ERROR)
+
+    process, url = start_stub(args)
+    results = Results()
+    try:
+        bench_pagination(url, args, results)
+        bench_get_case(url, args, results)
+        case = bench_decode(url, args, results)
+        bench_models(url, case, args, results)
+        bench_submit(url, case, args, results)
+    finally:
+        process.terminate()
+        process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'environment': environment(), 'parameters': vars(args), 'measures': results.measures},
+                      output_file, indent=2)
+    if args.compare:
+        compare(results.measures, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+CPU time and memory per row of turning the interpretation request list into a table, by creating a
+`CipApiOverview` per case and reading the columns from them against `pycipapi.columnar.CaseTableBuilder`, over
+synthetic rows shaped like the CIP-API responses. With `--output parquet` or `feather` the table is written to a
+temporary file by `pycipapi.columnar.write_case_table`:
+
+    python benchmarks/columnar_cases.py --rows 100000 --output arrow
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import overview_row  # noqa: E402
+from pycipapi.columnar import DEFAULT_FIELDS, CaseTableBuilder, write_case_table  # noqa: E402
+from pycipapi.models import CipApiOverview  # noqa: E402
+
+
+def from_models(rows):
+    overviews = [CipApiOverview(**row) for row in rows]
+    return {field: [getattr(overview, field) for overview in overviews] for field in DEFAULT_FIELDS}, overviews
+
+
+class RowsClient(object):
+    """
+    Serves the decoded rows as the interpretation request list to `write_case_table`
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_cases_raw(self, **params):
+        return self.rows
+
+
+def from_builder(rows, output):
+    builder = CaseTableBuilder()
+    builder.extend(rows)
+    return builder.to_numpy() if output == 'numpy' else builder.to_arrow(), builder
+
+
+def to_file(rows, file_format):
+    descriptor, path = tempfile.mkstemp(suffix='.' + file_format)
+    os.close(descriptor)
+    try:
+        return write_case_table(RowsClient(rows), path, file_format=file_format)
+    finally:
+        os.remove(path)
+
+
+def consume(decoded):
+    for _ in decoded:
+        pass
+
+
+def measure_time(build, rows, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        build(json.loads(row) for row in rows)
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def measure_memory(build, rows):
+    # the rows are consumed as they are decoded, like the pages of a listing, and do not count towards the memory
+    gc.collect()
+    tracemalloc.start()
+    result = build(json.loads(row) for row in rows)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--output', choices=['numpy', 'arrow', 'parquet', 'feather'], default='numpy')
+    args = parser.parse_args()
+    rng = random.Random(0)
+    rows = [json.dumps(overview_row(i, rng)) for i in range(args.rows)]
+    decoding = measure_time(consume, rows)
+    if args.output in ('numpy', 'arrow'):
+        table = ('CaseTableBuilder', lambda decoded: from_builder(decoded, args.output))
+    else:
+        table = ('write_case_table', lambda decoded: to_file(decoded, args.output))
+    for name, build in [('CipApiOverview', from_models), table]:
+        elapsed = measure_time(build, rows)
+        size = measure_memory(build, rows)
+        print("{:<16} {:8.2f} us/row excluding JSON decoding  {:8.0f} bytes/row".format(
+            name, (elapsed - decoding) * 10 ** 6 / args.rows, size / float(args.rows)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Memory held per object by the models of the listing endpoints against their compact versions in
+`pycipapi.compact_models`, measured with tracemalloc over synthetic rows shaped like the CIP-API responses:
+
+    python benchmarks/compact_models_memory.py --rows 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import overview_row, participant_row, referral_row  # noqa: E402
+from pycipapi.compact_models import CompactCipApiOverview, CompactParticipant, CompactReferral  # noqa: E402
+from pycipapi.models import CipApiOverview, Participant, Referral  # noqa: E402
+
+
+def measure(klass, row, rows):
+    rng = random.Random(0)
+    gc.collect()
+    tracemalloc.start()
+    # rows are round-tripped through JSON so that their strings are not shared, as when decoding a response
+    objects = [klass(**json.loads(json.dumps(row(i, rng)))) for i in range(rows)]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / float(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    for name, klass, compact_klass, row in [('CipApiOverview', CipApiOverview, CompactCipApiOverview, overview_row),
+                                            ('Participant', Participant, CompactParticipant, participant_row),
+                                            ('Referral', Referral, CompactReferral, referral_row)]:
+        regular = measure(klass, row, args.rows)
+        compact = measure(compact_klass, row, args.rows)
+        print("{:<16} {:8.0f} bytes/object  compact {:8.0f} bytes/object  ({:.0%} saved)".format(
+            name, regular, compact, 1 - compact / regular))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic documents shaped like the CIP-API responses and submissions, shared by the benchmarks and the stub server.
+Every generator takes a `random.Random` so that the documents are reproducible.
+"""
+CIPS = ['omicia', 'congenica', 'nextcode', 'illumina', 'exomiser']
+STATUSES = ['waiting_payload', 'interpretation_requested', 'sent_to_gmcs', 'report_generated', 'report_sent',
+            'blocked']
+TIERS = ['TIER1', 'TIER2', 'TIER3', 'NONE']
+GENOTYPES = ['heterozygous', 'homozygous_alt', 'reference_homozygous', 'unk']
+
+
+def overview_row(i, rng):
+    return {
+        'interpretation_request_id': '{}-{}'.format(i, rng.randint(1, 3)),
+        'cip': rng.choice(CIPS), 'cohort_id': 'cohort{}'.format(i),
+        'sample_type': rng.choice(['raredisease', 'cancer']),
+        'last_status': rng.choice(STATUSES), 'family_id': str(i), 'proband': str(10 ** 8 + i),
+        'number_of_samples': rng.randint(1, 4), 'last_update': '2020-01-01T00:00:00.000Z', 'sites': ['RGT'],
+        'case_priority': rng.randint(1, 3), 'tags': [], 'assembly': rng.choice(['GRCh37', 'GRCh38']),
+        'last_modified': '2020-01-01T00:00:00.{:06d}Z'.format(i % 10 ** 6), 'clinical_reports': [],
+        'interpreted_genomes': [], 'files': [], 'workflow_status': rng.choice(['in_progress', 'done']),
+        'cva_variants_status': 'pending', 'case_id': 'case{}'.format(i),
+        'status': [{'status': rng.choice(STATUSES), 'user': 'gel', 'created_at': '2020-01-01T00:00:00Z'}
+                   for _ in range(3)],
+    }
+
+
+def participant_row(i, rng):
+    return {
+        'participant_id': str(10 ** 8 + i), 'participant_uid': 'uid{}'.format(i), 'family_id': str(i),
+        'sample_ids': ['LP{}'.format(i)], 'interpretation_request': '{}-1'.format(i),
+        'category': rng.choice(['proband', 'relative']), 'year_of_birth': rng.randint(1940, 2020),
+        'assembly': rng.choice(['GRCh37', 'GRCh38']), 'sex': rng.choice(['male', 'female']),
+        'clinical_indication': rng.choice(['Intellectual disability', 'Cardiomyopathy']),
+        'created_at': '2020-01-01T00:00:00Z', 'updated_at': '2020-01-01T00:00:00Z', 'sites': ['RGT'],
+        'sample_type': rng.choice(['raredisease', 'cancer']), 'additional_findings_status': 'not_requested',
+    }
+
+
+def referral_row(i, rng):
+    return {
+        'referral_id': 'r{}'.format(i), 'referral_uid': 'ruid{}'.format(i), 'ordering_date': '2020-01-01',
+        'analysis_scope': 'singleton', 'referral_data': None, 'last_modified': '2020-01-01T00:00:00Z',
+        'create_at': '2020-01-01T00:00:00Z', 'requester_organisation_id': rng.randint(1, 20),
+        'requester_organisation_code': 'RGT', 'requester_organisation_name': 'Cambridge',
+        'referral_test': [{'referral_test_id': i, 'clinical_indication_test_code': 'R14.1',
+                           'clinical_indication_test_name': 'Acutely unwell infants',
+                           'testTechnologyDescription': 'WGS',
+                           'interpreter_organisation_code': 'RGT', 'interpreter_organisation_name': 'Cambridge',
+                           'interpretation_request_id': i, 'interpretation_request_version': 1}],
+    }
+
+
+def reported_variant(i, rng):
+    return {
+        'variantCoordinates': {'chromosome': str(rng.randint(1, 22)), 'position': rng.randint(1, 2 * 10 ** 8),
+                               'reference': rng.choice('ACGT'), 'alternate': rng.choice('ACGT'),
+                               'assembly': 'GRCh38'},
+        'variantCalls': [{'participantId': str(10 ** 8 + j), 'sampleId': 'LP{}'.format(j),
+                          'zygosity': rng.choice(GENOTYPES), 'depthReference': rng.randint(0, 60),
+                          'depthAlternate': rng.randint(0, 60), 'vaf': rng.random(),
+                          'alleleOrigins': ['germline_variant']} for j in range(3)],
+        'reportEvents': [{'reportEventId': 'RE{}-{}'.format(i, j), 'tier': rng.choice(TIERS),
+                          'modeOfInheritance': 'monoallelic', 'penetrance': 'complete', 'score': rng.random() * 100,
+                          'phenotypes': {'nonStandardPhenotype': ['Intellectual disability']},
+                          'genomicEntities': [{'type': 'gene',
+                                               'ensemblId': 'ENSG{:011d}'.format(rng.randint(0, 10 ** 6)),
+                                               'geneSymbol': 'GENE{}'.format(rng.randint(0, 20000))}],
+                          'variantConsequences': [{'id': 'SO:0001583', 'name': 'missense_variant'}]}
+                         for j in range(2)],
+        'variantAttributes': {'genomicChanges': ['chr1:g.{}A>G'.format(i)], 'fdp50': rng.random(),
+                              'recurrentlyReported': rng.random() > 0.5, 'others': {}},
+        'comments': [],
+    }
+
+
+def interpreted_genome(variants, rng):
+    return {
+        'interpretation_request_version': 1, 'interpretation_request_id': '1234', 'analysis_type': 'rare_disease',
+        'interpretation_service': 'exomiser', 'reference_database_versions': {'genomeAssembly': 'GRCh38'},
+        'software_versions': {'exomiser': '12.1.0'}, 'report_url': 'https://example.org/report',
+        'variants': [reported_variant(i, rng) for i in range(variants)],
+        'comments': ['synthetic interpreted genome'],
+    }
+
+
+def case_details(variants, rng):
+    return {
+        'interpretation_request_id': 1234, 'version': 1, 'cip': 'exomiser', 'sample_type': 'raredisease',
+        'last_status': 'sent_to_gmcs', 'assembly': 'GRCh38', 'case_priority': 1, 'family_id': '1234',
+        'status': [{'status': 'sent_to_gmcs', 'user': 'gel', 'created_at': '2020-01-01T00:00:00Z'}] * 5,
+        'interpretation_request_data': {'json_request': {
+            'pedigree': {'members': [{'participantId': str(10 ** 8 + j), 'isProband': j == 0,
+                                      'samples': [{'sampleId': 'LP{}'.format(j)}]} for j in range(3)]},
+            'genePanelsCoverage': {'panel{}'.format(j): {'ALL': {'avg': rng.random() * 100}} for j in range(50)}}},
+        'interpreted_genome': [{'interpreted_genome_data': interpreted_genome(variants // 2, rng), 'status': []}
+                               for _ in range(2)],
+        'clinical_report': [],
+    }
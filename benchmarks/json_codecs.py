@@ -0,0 +1,42 @@
+"""
+Encoding and decoding time of the JSON codecs of `pycipapi.json_codecs` that are installed, over synthetic documents
+shaped like the case details returned by the CIP-API and the interpreted genomes sent by `submit_interpreted_genome`:
+
+    python benchmarks/json_codecs.py --variants 20000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import case_details, interpreted_genome  # noqa: E402
+from pycipapi.json_codecs import CODECS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--variants', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    documents = [('CipApiCase', case_details(args.variants, rng)),
+                 ('interpreted genome', interpreted_genome(args.variants, rng))]
+    for document_name, document in documents:
+        for codec_name in sorted(CODECS):
+            try:
+                codec = CODECS[codec_name]()
+            except ImportError:
+                print("{:<20} {:<8} not installed".format(document_name, codec_name))
+                continue
+            content = codec.dumps(document)
+            dumps = min(timeit.repeat(lambda: codec.dumps(document), number=1, repeat=args.repeat))
+            loads = min(timeit.repeat(lambda: codec.loads(content), number=1, repeat=args.repeat))
+            print("{:<20} {:<8} {:8.1f} MB  dumps {:8.1f} ms  loads {:8.1f} ms".format(
+                document_name, codec_name, len(content) / 1024.0 ** 2, dumps * 1000, loads * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Peak memory of decoding a large page of cases whole, as `response.json()` does, against decoding it incrementally
+with `pycipapi.streaming.iter_items`, with and without skipping the heavy subtrees.
+
+Every mode runs in its own process so that its peak RSS is not affected by the others:
+
+    python benchmarks/streaming_memory.py --cases 200 --variants 2000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+HEAVY_FIELDS = ['interpretation_request_data', 'interpreted_genome_data']
+MODES = ('baseline', 'full', 'stream', 'stream_skip')
+
+
+def synthetic_variant(rng):
+    return {
+        'variantCoordinates': {'chromosome': str(rng.randint(1, 22)), 'position': rng.randint(1, 10 ** 8),
+                               'reference': rng.choice('ACGT'), 'alternate': rng.choice('ACGT'), 'assembly': 'GRCh38'},
+        'variantCalls': [{'participantId': 'p{}'.format(rng.randint(1, 10 ** 6)), 'zygosity': 'heterozygous',
+                          'depthReference': rng.randint(0, 100), 'depthAlternate': rng.randint(0, 100),
+                          'alleleFrequencies': [rng.random()]}],
+        'reportEvents': [{'reportEventId': 'e{}'.format(rng.randint(1, 10 ** 6)), 'tier': 'TIER1',
+                          'score': rng.random(), 'genomicEntities': [{'type': 'gene', 'geneSymbol': 'BRCA2'}]}],
+    }
+
+
+def synthetic_case(case_id, variants, rng):
+    return {
+        'interpretation_request_id': case_id,
+        'version': 1,
+        'cip': 'omicia',
+        'sample_type': 'cancer',
+        'last_status': 'sent_to_gmcs',
+        'status': [{'status': 'sent_to_gmcs', 'user': 'user', 'created_at': '2020-01-01T00:00:00'}],
+        'interpretation_request_data': {'json_request': {'variants': [synthetic_variant(rng)
+                                                                      for _ in range(variants)]}},
+        'interpreted_genome': [{'status': 'sent', 'created_at': '2020-01-01T00:00:00',
+                                'interpreted_genome_data': {'variants': [synthetic_variant(rng)
+                                                                         for _ in range(variants)]}}],
+    }
+
+
+def write_page(path, cases, variants):
+    rng = random.Random(0)
+    with open(path, 'w') as page_file:
+        page_file.write('{"count": %d, "next": null, "previous": null, "results": [' % cases)
+        for i in range(cases):
+            if i:
+                page_file.write(',')
+            json.dump(synthetic_case(i + 1, variants, rng), page_file)
+        page_file.write(']}')
+
+
+def run_mode(mode, path):
+    from pycipapi.streaming import iter_items
+    count = 0
+    if mode == 'full':
+        with open(path, 'rb') as page_file:
+            content = page_file.read()
+        for _ in json.loads(content.decode('utf-8'))['results']:
+            count += 1
+    elif mode in ('stream', 'stream_skip'):
+        skip_fields = HEAVY_FIELDS if mode == 'stream_skip' else ()
+        with open(path, 'rb') as page_file:
+            for _ in iter_items(page_file, items_prefix='results.item', skip_fields=skip_fields):
+                count += 1
+    # ru_maxrss is in kilobytes on Linux
+    print(json.dumps({'mode': mode, 'items': count,
+                      'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=200)
+    parser.add_argument('--variants', type=int, default=2000, help='variants per heavy subtree of each case')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--page', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        run_mode(args.mode, args.page)
+        return
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'page.json')
+    write_page(path, args.cases, args.variants)
+    print("page of {} cases, {:.1f} MB".format(args.cases, os.path.getsize(path) / 1024.0 / 1024.0))
+    for mode in MODES:
+        output = subprocess.check_output([sys.executable, __file__, '--mode', mode, '--page', path])
+        result = json.loads(output.decode('utf-8'))
+        print("{mode:<12} items={items:<6} peak RSS {peak_rss_mb:8.1f} MB".format(**result))
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
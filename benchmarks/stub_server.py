@@ -0,0 +1,248 @@
+"""
+Local stub of the CIP-API endpoints used by the benchmarks, built on `http.server`: token, paginated listings of
+interpretation requests and participants, case details and the submission of interpreted genomes, clinical reports
+and variant interpretation logs. Payloads are synthetic, their size is set by the number of variants, and encoded
+once at start up so that serving them costs little.
+
+Tokens are rejected with 401 after `--token-requests` requests, or after a POST to `/_stub/expire-tokens/`, so that
+the clients renew them. The benchmarks run the stub in its own process so that it does not compete with the client
+for the GIL:
+
+    python benchmarks/stub_server.py --port 8000 --cases 2000 --variants 500
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlencode, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+    from urlparse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import case_details, overview_row, participant_row  # noqa: E402
+
+CASE_DETAIL = re.compile(r'^/api/2/interpretation-request/(\d+)/(\d+)/?$')
+SUBMISSION = re.compile(r'^/api/2/(interpreted-genome|clinical-report)/[^/]+/[^/]+/[^/]+/?$|'
+                        r'^/api/2/interpretation-request/[^/]+/variant-interpretation-log/?$')
+ID_PLACEHOLDER = b'"__CASE_ID__"'
+VERSION_PLACEHOLDER = b'"__CASE_VERSION__"'
+MAX_PAGE_SIZE = 500
+CASE_FILTERS = ('sample_type', 'cip', 'last_status')
+
+
+def make_token(serial, ttl=24 * 3600):
+    payload = json.dumps({'exp': int(time.time()) + ttl, 'serial': serial}).encode('utf-8')
+    return 'stub.{}.signature'.format(base64.urlsafe_b64encode(payload).decode('ascii').rstrip('='))
+
+
+class StubState(object):
+    """
+    Payloads served by the stub and counters of what it received, shared by the handler threads
+    """
+
+    def __init__(self, cases=2000, participants=2000, variants=500, token_requests=0, latency=0.0):
+        """
+        :param cases: number of cases in the interpretation request listing
+        :param participants: number of participants in the participant listing
+        :param variants: number of variants of each case detail
+        :param token_requests: requests accepted with a token before it is rejected with 401, 0 for no limit
+        :param latency: seconds slept before answering each request, to emulate the network
+        """
+        rng = random.Random(0)
+        cases = [overview_row(i + 1, rng) for i in range(cases)]
+        self.case_rows = [json.dumps(case).encode('utf-8') for case in cases]
+        self.case_filters = [{name: case[name] for name in CASE_FILTERS} for case in cases]
+        self._filtered = {}
+        self.participant_rows = [json.dumps(participant_row(i + 1, rng)).encode('utf-8')
+                                 for i in range(participants)]
+        detail = case_details(variants, rng)
+        detail['interpretation_request_id'] = '__CASE_ID__'
+        detail['version'] = '__CASE_VERSION__'
+        self.case_detail = json.dumps(detail).encode('utf-8')
+        self.token_requests = token_requests
+        self.latency = latency
+        self.counters = {'requests': 0, 'tokens': 0, 'unauthorized': 0, 'submissions': 0, 'bytes_received': 0}
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def filtered_case_rows(self, query):
+        """
+        :return: the cases of the listing matching the filters of the query string
+        """
+        filters = tuple(sorted((name, query[name][0]) for name in CASE_FILTERS if name in query))
+        with self._lock:
+            rows = self._filtered.get(filters)
+            if rows is None:
+                rows = self._filtered[filters] = [
+                    row for row, values in zip(self.case_rows, self.case_filters)
+                    if all(str(values[name]) == value for name, value in filters)]
+        return rows
+
+    def issue_token(self):
+        with self._lock:
+            self.counters['tokens'] += 1
+            token = make_token(self.counters['tokens'])
+            self._tokens[token] = 0
+        return token
+
+    def authorize(self, header):
+        token = header.split()[-1] if header else None
+        with self._lock:
+            self.counters['requests'] += 1
+            if token not in self._tokens or (self.token_requests and self._tokens[token] >= self.token_requests):
+                self._tokens.pop(token, None)
+                self.counters['unauthorized'] += 1
+                return False
+            self._tokens[token] += 1
+            return True
+
+    def expire_tokens(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # the headers and the body are written separately, Nagle's algorithm would delay the body
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _send(self, status, body):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, rows, path, query):
+        page = int(query.get('page', ['1'])[0])
+        page_size = min(int(query.get('page_size', ['100'])[0]), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        base = 'http://{}:{}{}'.format(self.server.server_address[0], self.server.server_address[1], path)
+
+        def link(number):
+            link_query = dict((name, values[0]) for name, values in query.items())
+            link_query.update(page=number, page_size=page_size)
+            return json.dumps('{}?{}'.format(base, urlencode(sorted(link_query.items())))).encode('utf-8')
+
+        return b''.join([
+            b'{"count": ', str(len(rows)).encode('ascii'),
+            b', "next": ', link(page + 1) if start + page_size < len(rows) else b'null',
+            b', "previous": ', link(page - 1) if page > 1 else b'null',
+            b', "results": [', b', '.join(rows[start:start + page_size]), b']}'])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        if path == '/_stub/counters':
+            return self._send(200, self.state.counters)
+        if not self.state.authorize(self.headers.get('Authorization')):
+            return self._send(401, {'detail': 'Signature has expired.'})
+        query = parse_qs(url.query)
+        if path == '/api/2/interpretation-request':
+            return self._send(200, self._page(self.state.filtered_case_rows(query), url.path, query))
+        if path == '/api/2/participants':
+            return self._send(200, self._page(self.state.participant_rows, url.path, query))
+        match = CASE_DETAIL.match(url.path)
+        if match:
+            body = self.state.case_detail.replace(ID_PLACEHOLDER, json.dumps(match.group(1)).encode('utf-8'), 1)
+            return self._send(200, body.replace(VERSION_PLACEHOLDER, match.group(2).encode('ascii'), 1))
+        self._send(404, {'detail': 'Not found.'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_body()
+        if url.path.rstrip('/') == '/api/2/get-token':
+            return self._send(200, {'token': self.state.issue_token()})
+        if url.path.rstrip('/') == '/_stub/expire-tokens':
+            self.state.expire_tokens()
+            return self._send(200, {})
+        if not self.state.authorize(self.headers.get('Authorization')):
+            return self._send(401, {'detail': 'Signature has expired.'})
+        if SUBMISSION.match(url.path):
+            self.state.count('submissions')
+            self.state.count('bytes_received', len(body))
+            return self._send(201, {'status': 'created', 'user': 'stub', 'created_at': '2020-01-01T00:00:00Z'})
+        self._send(404, {'detail': 'Not found.'})
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(state, host='127.0.0.1', port=0):
+    """
+    :type state: StubState
+    :return: the server, already started in a background thread, and its base URL
+    """
+    handler = type('BoundStubHandler', (StubHandler,), {'state': state})
+    server = StubServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://{}:{}/'.format(*server.server_address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help='0 picks a free port')
+    parser.add_argument('--cases', type=int, default=2000)
+    parser.add_argument('--participants', type=int, default=2000)
+    parser.add_argument('--variants', type=int, default=500, help='variants of each case detail')
+    parser.add_argument('--token-requests', type=int, default=0,
+                        help='requests accepted with a token before it is rejected, 0 for no limit')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+    state = StubState(cases=args.cases, participants=args.participants, variants=args.variants,
+                      token_requests=args.token_requests, latency=args.latency)
+    server, url = serve(state, args.host, args.port)
+    # the first line is read by the benchmarks to find the port
+    print(url)
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,482 @@
+import asyncio
+import collections
+import itertools
+
+from requests.exceptions import HTTPError
+
+from pycipapi.async_rest_client import AsyncRestClient, returns_item_async
+from pycipapi.cipapi_client import CipApiClient
+from pycipapi.concurrency import ItemResult
+from pycipapi.uploads import MultipartEncoder
+from pycipapi.models import (
+    CipApiOverview,
+    CipApiCase,
+    ClinicalReport,
+    VariantInterpretationLog,
+    Referral,
+    RequestStatus,
+    InterpretationFlag,
+    Participant,
+    ParticipantConsent,
+    ParticipantInterpretedGenome,
+    ParticipantClinicalReport,
+)
+
+
+class AsyncCipApiClient(AsyncRestClient):
+    """
+    asyncio version of `CipApiClient`, every request method is a coroutine and every listing method is an async
+    generator. A single client can keep up to `max_connections` requests in flight, close it when done:
+
+        async with AsyncCipApiClient("https://cipapi.fake", user="*****", password="*****") as cipapi:
+            case = await cipapi.get_case("1234", "1")
+            async for overview in cipapi.get_cases(sample_type="raredisease"):
+                ...
+    """
+
+    ENDPOINT_BASE = CipApiClient.ENDPOINT_BASE
+    AUTH_ENDPOINT = CipApiClient.AUTH_ENDPOINT
+    IR_ENDPOINT = CipApiClient.IR_ENDPOINT
+    EQ_ENDPOINT = CipApiClient.EQ_ENDPOINT
+    CR_ENDPOINT = CipApiClient.CR_ENDPOINT
+    IG_ENDPOINT = CipApiClient.IG_ENDPOINT
+    REFERRAL_ENDPOINT = CipApiClient.REFERRAL_ENDPOINT
+    FILE_ENDPOINT = CipApiClient.FILE_ENDPOINT
+    PARTICIPANTS_ENDPOINT = CipApiClient.PARTICIPANTS_ENDPOINT
+    PAGE_SIZE_MAX = CipApiClient.PAGE_SIZE_MAX
+
+    def __init__(self, url_base, token=None, user=None, password=None, retries=5, fixed_paramters=None,
+                 max_connections=100, token_refresh_margin=60, json_codec=None,
+                 compression=None):
+        """
+        If user and password are not provided there will be no token renewal
+        :param url_base:
+        :param token:
+        :param user:
+        :param password:
+        :param max_connections: maximum number of concurrent connections to the CIP-API
+        :param token_refresh_margin: seconds before the token expires from which it is renewed in the background
+        :param json_codec: codec of the request and response bodies, see `pycipapi.json_codecs.get_json_codec`
+        :param compression: compression of the submissions, see `CipApiClient`
+        """
+        AsyncRestClient.__init__(self, url_base=url_base, retries=retries, fixed_params=fixed_paramters,
+                                 max_connections=max_connections, token_refresh_margin=token_refresh_margin,
+                                 json_codec=json_codec, compression=compression)
+        self.token = "JWT {}".format(token) if token is not None else None
+        self.user = user
+        self.password = password if password else ""
+        if (self.token is None) and (self.user is None or self.password is None):
+            raise ValueError("Authentication is required. Provide either token or user and password.")
+        if self.token is not None:
+            self.headers["Authorization"] = "{token}".format(token=self.token)
+
+    async def get_token(self):
+        url = self.build_url(self.url_base, self.AUTH_ENDPOINT)
+        # goes straight to the transport, a failure to get a token must not trigger another token renewal
+        response = await self._request_call('post', url, params=None, payload={
+            'username': self.user,
+            'password': self.password
+        })
+        if response.status_code not in (200, 201):
+            raise HTTPError("{}:{}".format(response.status_code, response.text), response=response)
+        return "JWT {}".format(self._decode(response).get('token'))
+
+    def can_renew_token(self):
+        return self.user is not None
+
+    async def get_paginated(self, url, **params):
+        query_params, url = self._clean_url(params, url)
+        next = True
+        while next is not None:
+            results = await self.get(url=url, params=query_params)
+            next = results.get('next')
+            if next is not None:
+                query_params, url = self._clean_url(parameters=query_params, url=next)
+            for r in results.get('results', []):
+                yield r
+
+    async def get_cases_raw(self, **params):
+        """
+        gets the un-cast contents of the interpretation request list endpoint
+        does not check and exclude on the basis of last_status, unlike get_cases
+        :rtype: collections.AsyncIterable[dict]
+        """
+        url = self.build_url(self.url_base, self.IR_ENDPOINT)
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def get_case_raw(self, case_id, case_version, **params):
+        """
+        :type case_id: str
+        :type case_version: str
+        :rtype: dict
+        """
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version) + '/'
+        return await self.get(url, params=params)
+
+    async def get_many_cases(self, cases, workers=8, ordered=True, **params):
+        """
+        Fetches the full details of many cases concurrently, see `CipApiClient.get_many_cases`
+        :param cases: (case_id, case_version) pairs or objects with `interpretation_request_id` and `version`
+        :param workers: maximum number of cases fetched concurrently
+        :param ordered: yields cases in the order they were given when True, as soon as they arrive otherwise
+        :rtype: collections.AsyncIterable[pycipapi.concurrency.ItemResult]
+        """
+        async def get_case(case):
+            try:
+                case_id, case_version = CipApiClient._case_ids(case)
+                return ItemResult(case, result=await self.get_case(case_id, case_version, **params))
+            except Exception as e:
+                return ItemResult(case, error=e)
+
+        # as `map_concurrently`, cases are consumed lazily and no more than `workers` of them are in flight
+        cases = iter(cases)
+        pending = collections.deque(asyncio.ensure_future(get_case(case)) for case in itertools.islice(cases, workers))
+        try:
+            while pending:
+                if ordered:
+                    await pending[0]
+                    done = [pending.popleft()]
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        pending.remove(task)
+                for case in itertools.islice(cases, len(done)):
+                    pending.append(asyncio.ensure_future(get_case(case)))
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def register_case_raw(self, payload, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT) + '/'
+        return await self.post(url, payload=payload, params=params)
+
+    async def create_referral_raw(self, payload, **params):
+        url = self.build_url(self.url_base, self.REFERRAL_ENDPOINT) + '/'
+        return await self.post(url, payload=payload, params=params)
+
+    async def file_upload_raw(self, file_path, user, partner_id, report_id, file_type, compress=False, progress=None,
+                              **params):
+        """
+        Streams the file to the CIP-API, see `CipApiClient.file_upload_raw`, it is read a chunk at a time in a
+        thread so that the event loop is never blocked by the disk
+        """
+        url = self.build_url(self.url_base, self.FILE_ENDPOINT, partner_id, report_id, file_type) + '/'
+        with MultipartEncoder(fields=[('user', user)], files=[('file', file_path)], compress=compress,
+                              progress=progress) as body:
+            return await self.post(url, payload=None, data=body, headers={'Content-Type': body.content_type},
+                                   params=params)
+
+    async def change_priority_raw(self, case_id, case_version, priority, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, 'case-priority', case_id, case_version) + '/'
+        return await self.patch(url, {"case_priority": priority}, params=params)
+
+    async def patch_case_raw(self, case_id, case_version, payload, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version) + '/'
+        return await self.patch(url, payload=payload, params=params)
+
+    async def submit_interpretation_request_raw(self, case_id, case_version, interpretation_request_dict, extra_fields,
+                                                **params):
+        payload = {"interpretation_request_data": {"json_request": interpretation_request_dict}}
+        payload.update(extra_fields)
+        return await self.patch_case_raw(case_id, case_version, payload, **params)
+
+    async def dispatch_raw(self, case_id, case_version, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, 'dispatch', case_id, case_version) + '/'
+        return await self.put(url, payload=None, params=params)
+
+    async def submit_interpreted_genome_raw(self, payload, partner_id, analysis_type, report_id, **params):
+        url = self.build_url(self.url_base, self.IG_ENDPOINT, partner_id, analysis_type, report_id) + '/'
+        return await self.post(url, payload=payload, params=params, compress=True)
+
+    async def submit_clinical_report_raw(self, payload, partner_id, analysis_type, report_id, **params):
+        url = self.build_url(self.url_base, self.CR_ENDPOINT, partner_id, analysis_type, report_id) + '/'
+        return await self.post(url, payload, params=params, compress=True)
+
+    async def submit_variant_interpretation_logs_raw(self, payload, case_id, case_version, **params):
+        case_id_version = "{ir_id}-{ir_version}".format(
+            ir_id=case_id,
+            ir_version=case_version
+        )
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id_version, 'variant-interpretation-log') + '/'
+        return await self.post(url, payload, params=params, compress=True)
+
+    async def submit_interpretation_flags_raw(self, payload, case_id, case_version, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version, 'interpretation-flags') + '/'
+        return await self.post(url, payload, params=params, compress=True)
+
+    async def get_interpretation_flags_raw(self, case_id, case_version, **params):
+        url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version, 'interpretation-flags') + '/'
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def list_clinical_reports_raw(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[dict]
+        """
+        url = self.build_url(self.url_base, self.CR_ENDPOINT)
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def list_referral_raw(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[dict]
+        """
+        url = self.build_url(self.url_base, self.REFERRAL_ENDPOINT)
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def submit_interpretation_flags(self, payload, case_id, case_version, **params):
+        """
+
+        :rtype: list[InterpretationFlag]
+        """
+        flags = await self.submit_interpretation_flags_raw(payload, case_id, case_version, **params)
+        return [InterpretationFlag(**flag) for flag in flags]
+
+    async def post_participant_interpreted_genome_raw(
+            self, payload, participant_id, interpretation_service_name='genomics_england_additional_findings',
+            **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'interpreted-genome') + '/'
+        payload_json = {
+            "interpreted_genome_data": payload,
+            "interpretation_service_name": interpretation_service_name
+        }
+        return await self.post(url, payload_json, params=params)
+
+    async def post_participant_clinical_report_raw(self, payload, participant_id, interpretation_service_name,
+                                                   **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'summary-of-findings',
+                             'interpretation-service', interpretation_service_name) + '/'
+        return await self.post(url, payload, params=params)
+
+    async def get_participant_consent_raw(self, participant_id, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'consent')
+        return await self.get(url, params=params)
+
+    async def post_participant_consent_raw(self, payload, participant_id, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'consent') + '/'
+        return await self.post(url, payload, params=params)
+
+    async def put_participant_consent_raw(self, payload, participant_id, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'consent') + '/'
+        return await self.put(url, payload, params=params)
+
+    async def get_participant_interpreted_genome_raw(self, participant_id, interpretation_service_name, version,
+                                                     **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'interpreted-genome',
+                             interpretation_service_name, version) + '/'
+        return await self.get(url, params=params)
+
+    async def get_participant_clinical_report_raw(self, participant_id, version, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'summary-of-findings',
+                             version) + '/'
+        return await self.get(url, params=params)
+
+    async def list_participants_raw(self, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT) + '/'
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def list_participant_interpreted_genomes_raw(self, participant_id, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'interpreted-genome') + '/'
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    async def list_participant_clinical_reports_raw(self, participant_id, **params):
+        url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'summary-of-findings') + '/'
+        async for r in self.get_paginated(url, **params):
+            yield r
+
+    @returns_item_async(ParticipantConsent)
+    async def get_participant_consent(self, participant_id, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantConsent
+        """
+        return await self.get_participant_consent_raw(participant_id, **params)
+
+    @returns_item_async(ParticipantClinicalReport)
+    async def get_participant_clinical_report(self, participant_id, version, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantClinicalReport
+        """
+        return await self.get_participant_clinical_report_raw(participant_id, version, **params)
+
+    @returns_item_async(ParticipantClinicalReport)
+    async def post_participant_clinical_report(self, payload, participant_id, interpretation_service_name, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantClinicalReport
+        """
+        return await self.post_participant_clinical_report_raw(payload, participant_id, interpretation_service_name,
+                                                               **params)
+
+    @returns_item_async(ParticipantClinicalReport, multi=True)
+    def list_participant_clinical_reports(self, participant_id, **params):
+        """
+
+        :rtype: collections.AsyncIterable[ParticipantClinicalReport]
+        """
+        return self.list_participant_clinical_reports_raw(participant_id, **params)
+
+    @returns_item_async(ParticipantConsent)
+    async def post_participant_consent(self, payload, participant_id, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantConsent
+        """
+        return await self.post_participant_consent_raw(payload, participant_id, **params)
+
+    @returns_item_async(ParticipantConsent)
+    async def put_participant_consent(self, payload, participant_id, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantConsent
+        """
+        return await self.put_participant_consent_raw(payload, participant_id, **params)
+
+    @returns_item_async(ParticipantInterpretedGenome)
+    async def post_participant_interpreted_genome(self, payload, participant_id, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantInterpretedGenome
+        """
+        return await self.post_participant_interpreted_genome_raw(payload, participant_id, **params)
+
+    @returns_item_async(ParticipantInterpretedGenome)
+    async def get_participant_interpreted_genome(self, participant_id, interpretation_service_name, version, **params):
+        """
+        :type participant_id: str
+        :rtype: ParticipantInterpretedGenome
+        """
+        return await self.get_participant_interpreted_genome_raw(participant_id, interpretation_service_name, version,
+                                                                 **params)
+
+    @returns_item_async(ParticipantInterpretedGenome, multi=True)
+    def list_participant_interpreted_genomes(self, participant_id, **params):
+        """
+
+        :rtype: collections.AsyncIterable[ParticipantInterpretedGenome]
+        """
+        return self.list_participant_interpreted_genomes_raw(participant_id, **params)
+
+    @returns_item_async(InterpretationFlag, multi=True)
+    def get_interpretation_flags(self, case_id, case_version, **params):
+        """
+
+        :rtype: collections.AsyncIterable[InterpretationFlag]
+        """
+        return self.get_interpretation_flags_raw(case_id, case_version, **params)
+
+    @returns_item_async(CipApiOverview, multi=True)
+    def get_cases(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[CipApiOverview]
+        """
+        return self.get_cases_raw(**params)
+
+    @returns_item_async(CipApiOverview, multi=True)
+    def list_cases(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[CipApiOverview]
+        """
+        return self.get_cases_raw(**params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def get_case(self, case_id, case_version, **params):
+        """
+        :type case_id: str
+        :type case_version: str
+        :rtype: CipApiCase
+        """
+        return await self.get_case_raw(case_id=case_id, case_version=case_version, **params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def register_case(self, payload, **params):
+        """
+
+        :rtype: CipApiCase
+        """
+        return await self.register_case_raw(payload, **params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def patch_case(self, case_id, case_version, payload, **params):
+        return await self.patch_case_raw(case_id, case_version, payload, **params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def submit_interpretation_request(self, case_id, case_version, interpretation_request_dict, extra_fields,
+                                            **params):
+        return await self.submit_interpretation_request_raw(case_id, case_version, interpretation_request_dict,
+                                                            extra_fields=extra_fields, **params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def dispatch(self, case_id, case_version, **params):
+        return await self.dispatch_raw(case_id, case_version, **params)
+
+    @returns_item_async(CipApiCase, multi=False)
+    async def change_priority(self, case_id, case_version, priority, **params):
+        return await self.change_priority_raw(case_id, case_version, priority, **params)
+
+    @returns_item_async(RequestStatus, multi=False)
+    async def submit_interpreted_genome(self, payload, partner_id, analysis_type, report_id, **params):
+        return await self.submit_interpreted_genome_raw(payload, partner_id, analysis_type, report_id, **params)
+
+    @returns_item_async(Participant, multi=True)
+    def list_participants(self, **params):
+        """
+        This method lists all the participants registered in cipapi, filtered by given params.
+
+        :rtype: collections.AsyncIterable[Participant]
+        """
+        return self.list_participants_raw(**params)
+
+    @returns_item_async(ClinicalReport, multi=True)
+    def list_clinical_reports(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[ClinicalReport]
+        """
+        return self.list_clinical_reports_raw(**params)
+
+    @returns_item_async(ClinicalReport, multi=False)
+    async def submit_clinical_report(self, payload, partner_id, analysis_type, report_id, **params):
+        """
+
+        :rtype: ClinicalReport
+        """
+        return await self.submit_clinical_report_raw(payload, partner_id, analysis_type, report_id, **params)
+
+    @returns_item_async(VariantInterpretationLog, multi=False)
+    async def submit_variant_interpretation_logs(self, vils, case_id, case_version, **params):
+        """
+        :type vils: list
+        :type case_id: int
+        :type case_version: int
+        :rtype: VariantInterpretationLog
+        """
+        payload = {"log_entry": vils}
+        return await self.submit_variant_interpretation_logs_raw(payload, case_id, case_version, **params)
+
+    @returns_item_async(Referral, multi=True)
+    def list_referral(self, **params):
+        """
+
+        :rtype: collections.AsyncIterable[Referral]
+        """
+        return self.list_referral_raw(**params)
+
+    @returns_item_async(Referral, multi=False)
+    async def create_referral(self, payload, **params):
+        """
+
+        :rtype: Referral
+        """
+        return await self.create_referral_raw(payload, **params)
@@ -0,0 +1,302 @@
+import asyncio
+import datetime
+import json
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from requests.exceptions import HTTPError
+
+from pycipapi.compression import get_request_compression
+from pycipapi.json_codecs import get_json_codec
+from pycipapi.rest_client import RestClient, token_expiry
+from pycipapi.throttling import retry_after_seconds
+from pycipapi.uploads import CHUNK_SIZE
+
+
+def returns_item_async(klass, multi=False):
+    def item_decorator(func):
+        if multi:
+            async def func_wrapper(*args, **kwargs):
+                async for item in func(*args, **kwargs):
+                    yield klass(**item)
+        else:
+            async def func_wrapper(*args, **kwargs):
+                item = await func(*args, **kwargs)
+                return klass(**item) if item is not None else None
+        return func_wrapper
+    return item_decorator
+
+
+class AsyncResponse(object):
+    """
+    The subset of a `requests.Response` used by the client, read eagerly so the aiohttp connection can be released
+    back to the pool as soon as the body has been received.
+    """
+    def __init__(self, status_code, content, headers, request_headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.request_headers = request_headers if request_headers is not None else {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncRestClient(object):
+    """
+    asyncio counterpart of `RestClient`. Token renewal follows `RestClient`, proactive before the token expires and
+    single-flight across concurrent requests, and failed requests are retried with the same exponential back off as
+    `requests_retry_session`, waiting instead as long as the Retry-After header of a 413, 429 or 503 response says.
+    """
+    RETRY_AFTER_STATUSES = (413, 429, 503)
+
+    build_url = staticmethod(RestClient.build_url)
+    _clean_url = staticmethod(RestClient._clean_url)
+
+    def __init__(self, url_base, retries=5, backoff_factor=0.8, status_forcelist=(500, 502, 504, 503),
+                 fixed_params=None, max_connections=100, token_refresh_margin=60, json_codec=None,
+                 compression=None):
+        """
+        :param json_codec: codec of the request and response bodies, see `pycipapi.json_codecs.get_json_codec`
+        :param compression: compression of the JSON bodies posted with `compress=True`, see `RestClient`
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the asyncio client, install it with `pip install aiohttp`")
+        self.fixed_params = fixed_params if fixed_params is not None else {}
+        self.url_base = url_base
+        self.headers = {
+            'Accept': 'application/json'
+        }
+        self.token = None
+        self.token_expires_at = None
+        self.token_refresh_margin = token_refresh_margin
+        self._token_lock = None
+        self._background_renewal = None
+        self.retries = retries if retries is not None else 5
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self.max_connections = max_connections
+        self.json_codec = get_json_codec(json_codec)
+        self.compression = get_request_compression(compression)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def set_authenticated_header(self, renew_token=False):
+        if not self.token or renew_token:
+            self.token = await self.get_token()
+        self.token_expires_at = token_expiry(self.token)
+        self.headers["Authorization"] = "{token}".format(token=self.token)
+
+    def can_renew_token(self):
+        return True
+
+    @property
+    def token_lock(self):
+        # created lazily so that it belongs to the running event loop
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        return self._token_lock
+
+    async def renew_token(self, stale_token=None):
+        """
+        Fetches a new token, concurrent callers wait for a single call to `get_token`
+        :param stale_token: the token found to be invalid, nothing is done if it has already been replaced
+        """
+        async with self.token_lock:
+            if stale_token is not None and stale_token != self.token:
+                return
+            await self.set_authenticated_header(renew_token=True)
+
+    async def _background_renew_token(self, stale_token):
+        try:
+            await self.renew_token(stale_token=stale_token)
+        except Exception as e:
+            # the token is still valid, the renewal will be attempted again by the next request
+            logging.warning("Background token renewal failed: {}".format(e))
+
+    async def _authenticate(self):
+        # the token cannot be fetched from a synchronous constructor, the first request fetches it instead
+        if "Authorization" not in self.headers:
+            async with self.token_lock:
+                if "Authorization" not in self.headers:
+                    await self.set_authenticated_header()
+        if self.token_expires_at is None or not self.can_renew_token():
+            return
+        remaining = self.token_expires_at - time.time()
+        if remaining <= 0:
+            await self.renew_token(stale_token=self.token)
+        elif remaining <= self.token_refresh_margin and \
+                (self._background_renewal is None or self._background_renewal.done()):
+            self._background_renewal = asyncio.ensure_future(self._background_renew_token(self.token))
+
+    async def get_token(self):
+        raise ValueError("Not implemented")
+
+    def get_paginated(self, url, **kwargs):
+        raise ValueError("Not implemented")
+
+    @staticmethod
+    def _query_items(parameters):
+        items = []
+        for key, value in parameters.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            items.extend((key, str(v)) for v in values if v is not None)
+        return items
+
+    def _backoff_time(self, attempt):
+        # same schedule as urllib3's Retry: no wait before the first retry, then factor * 2 ** (retry - 1)
+        if attempt <= 1:
+            return 0
+        return self.backoff_factor * (2 ** (attempt - 1))
+
+    def _retry_after(self, response):
+        """
+        :return: seconds the Retry-After header of the response asks to wait, None if there is none
+        """
+        if response.status_code not in self.RETRY_AFTER_STATUSES:
+            return None
+        return retry_after_seconds(response.headers.get('Retry-After'))
+
+    @staticmethod
+    async def _read_chunks(body, chunk_size=CHUNK_SIZE):
+        # read in a thread so that the event loop is not blocked by the disk
+        loop = asyncio.get_event_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, body.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    async def _request_call(self, method, url, params, payload=None, compress=False, data=None, headers=None):
+        """
+        :param data: file-like body sent instead of the payload, read a chunk at a time and rewound when the request
+        is sent again, such as a `pycipapi.uploads.MultipartEncoder`
+        :param headers: headers of this request only
+        """
+        parameters = dict(self.fixed_params)
+        if params is not None:
+            parameters.update(params)
+
+        if url is None:
+            raise ValueError("Must define endpoint before {method}".format(method=method))
+        if method not in ('post', 'get', 'delete', 'put', 'patch'):
+            raise NotImplementedError
+        logging.debug("{date} {method} {url}".format(
+            date=datetime.datetime.now(),
+            method=method.upper(),
+            url="{}?{}".format(url, "&".join(["{}={}".format(k, v) for k, v in parameters.items()]))
+        ))
+        kwargs = {'params': self._query_items(parameters), 'headers': dict(self.headers)}
+        if headers is not None:
+            kwargs['headers'].update(headers)
+        if data is not None:
+            if getattr(data, 'len', None) is not None:
+                kwargs['headers']['Content-Length'] = str(data.len)
+        elif payload:
+            kwargs['data'] = self.json_codec.dumps(payload)
+            kwargs['headers']['Content-Type'] = 'application/json'
+            if compress and self.compression is not None:
+                kwargs['data'], encoding = self.compression.compress(kwargs['data'])
+                if encoding is not None:
+                    kwargs['headers']['Content-Encoding'] = encoding
+        attempt = 0
+        while True:
+            if data is not None:
+                data.seek(0)
+                kwargs['data'] = self._read_chunks(data)
+            retry_after = None
+            try:
+                async with self.session.request(method.upper(), url, **kwargs) as response:
+                    content = await response.read()
+                    result = AsyncResponse(response.status, content, response.headers, kwargs['headers'])
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+            else:
+                retry_after = self._retry_after(result)
+                if attempt >= self.retries or \
+                        (result.status_code not in self.status_forcelist and retry_after is None):
+                    return result
+            attempt += 1
+            await asyncio.sleep(retry_after if retry_after is not None else self._backoff_time(attempt))
+
+    def _decode(self, response):
+        return self.json_codec.loads(response.content) if response.content else None
+
+    async def post(self, url, payload, params=None, compress=False, data=None, headers=None):
+        """
+        :param compress: compresses the payload with the compression of the client, if any
+        :param data: file-like body sent instead of the payload, see `_request_call`
+        :param headers: headers of this request only
+        """
+        await self._authenticate()
+        response = await self._request_call('post', url, params=params, payload=payload, compress=compress,
+                                            data=data, headers=headers)
+        response = await self._verify_response(response, 'post', url=url, params=params, payload=payload,
+                                               compress=compress, data=data, headers=headers)
+        return self._decode(response)
+
+    async def put(self, url, payload, params=None):
+        await self._authenticate()
+        response = await self._request_call('put', url, params=params, payload=payload)
+        response = await self._verify_response(response, 'put', url=url, params=params, payload=payload)
+        return self._decode(response)
+
+    async def patch(self, url, payload, params=None):
+        await self._authenticate()
+        response = await self._request_call('patch', url, params=params, payload=payload)
+        response = await self._verify_response(response, 'patch', url=url, params=params, payload=payload)
+        return self._decode(response)
+
+    async def get(self, url, params=None):
+        await self._authenticate()
+        response = await self._request_call('get', url, params=params)
+        response = await self._verify_response(response, 'get', url=url, params=params)
+        return self._decode(response)
+
+    async def delete(self, url, params=None):
+        await self._authenticate()
+        response = await self._request_call('delete', url, params=params)
+        response = await self._verify_response(response, 'delete', url=url, params=params)
+        return self._decode(response)
+
+    async def _verify_response(self, response, method=None, renew_token=True, **kwargs):
+        logging.debug("{date} response status code {status}".format(
+            date=datetime.datetime.now(),
+            status=response.status_code)
+        )
+        if response.status_code not in (200, 203, 206, 201):
+            logging.error(response.content)
+            # a 401/403 renews the token and retries the request, a second 401/403 in a row fails
+            if response.status_code in (401, 403) and renew_token and self.can_renew_token():
+                await self.renew_token(stale_token=response.request_headers.get('Authorization'))
+                response = await self._request_call(method, **kwargs)
+                return await self._verify_response(response, method, renew_token=False, **kwargs)
+            raise HTTPError("{}:{}".format(response.status_code, response.text), response=response)
+        else:
+            return response
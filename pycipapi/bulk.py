@@ -0,0 +1,291 @@
+"""
+Bulk submission of interpreted genomes, clinical reports and variant interpretation logs.
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import time
+
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError
+from urllib3.exceptions import NewConnectionError
+
+from pycipapi.concurrency import map_concurrently
+from pycipapi.rest_client import BlockedCase
+
+
+class SubmissionJob(object):
+    """
+    One submission of a bulk run. Interpreted genomes and clinical reports need `partner_id`, `analysis_type` and
+    `report_id`, variant interpretation logs `case_id` and `case_version`.
+    """
+    KINDS = ('interpreted_genome', 'clinical_report', 'variant_interpretation_logs')
+
+    def __init__(self, kind, payload, job_id=None, **arguments):
+        """
+        :param kind: one of `KINDS`
+        :param payload: the document submitted, a dict or a model with `toJsonDict`
+        :param job_id: identifier of the job in the checkpoint, derived from the kind and the arguments if not given,
+        and for variant interpretation logs, of which a case can have many, from a hash of the payload too
+        :param arguments: arguments of the submission method of the client, other than the payload
+        """
+        if kind not in self.KINDS:
+            raise ValueError("Submission kind must be one of {}".format(", ".join(self.KINDS)))
+        self.kind = kind
+        self.payload = payload
+        self.arguments = arguments
+        self.job_id = job_id if job_id is not None else self._default_id()
+
+    def _default_id(self):
+        if self.kind == 'variant_interpretation_logs':
+            content = json.dumps(self._payload_dict(), sort_keys=True).encode('utf-8')
+            return "{}:{}-{}:{}".format(self.kind, self.arguments['case_id'], self.arguments['case_version'],
+                                        hashlib.sha1(content).hexdigest())
+        return "{}:{}:{}:{}".format(self.kind, self.arguments['partner_id'], self.arguments['analysis_type'],
+                                    self.arguments['report_id'])
+
+    def case_ids(self):
+        """
+        :return: the id and version of the case the job submits to, None if they cannot be told from the report id
+        :rtype: tuple
+        """
+        if self.kind == 'variant_interpretation_logs':
+            return self.arguments['case_id'], self.arguments['case_version']
+        # reports are identified as {case_id}-{case_version}
+        parts = str(self.arguments['report_id']).split('-')
+        if len(parts) == 2:
+            return parts[0], parts[1]
+        return None
+
+    def _payload_dict(self):
+        return self.payload.toJsonDict() if hasattr(self.payload, 'toJsonDict') else self.payload
+
+    def submit(self, cip_api_client):
+        """
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :return: the response of the CIP-API
+        """
+        payload = self._payload_dict()
+        if self.kind == 'interpreted_genome':
+            return cip_api_client.submit_interpreted_genome_raw(payload, **self.arguments)
+        if self.kind == 'clinical_report':
+            return cip_api_client.submit_clinical_report_raw(payload, **self.arguments)
+        return cip_api_client.submit_variant_interpretation_logs_raw({"log_entry": payload}, **self.arguments)
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.job_id)
+
+
+class SubmissionResult(object):
+    OK = 'ok'
+    BLOCKED = 'blocked'
+    HTTP_ERROR = 'http_error'
+    ERROR = 'error'
+    SKIPPED = 'skipped'
+
+    def __init__(self, job, status, response=None, error=None, attempts=0):
+        """
+        :type job: SubmissionJob
+        :param status: `ok`, `blocked` for a submission refused while the case is blocked, the error is then a
+        `BlockedCase`, see `BulkSubmitter.is_blocked`, `http_error` for any other error response, `error` for any
+        other failure and `skipped` for a job already submitted by a previous run
+        :param response: the response of the CIP-API to a successful submission
+        :param attempts: number of times the job was sent
+        """
+        self.job = job
+        self.status = status
+        self.response = response
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.status in (self.OK, self.SKIPPED)
+
+    def __repr__(self):
+        return "{}(job_id={!r}, status={!r}, attempts={})".format(
+            type(self).__name__, self.job.job_id, self.status, self.attempts)
+
+
+class SubmissionReport(object):
+    def __init__(self):
+        self.results = []
+        self.counts = collections.Counter()
+
+    def add(self, result):
+        self.results.append(result)
+        self.counts[result.status] += 1
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, dict(self.counts))
+
+
+class BulkSubmitter(object):
+    """
+    Runs submission jobs on a pool of threads, no more than `workers` jobs are read from the input and held in
+    memory at once.
+
+    Submissions are not idempotent, so a job is only sent again when the CIP-API certainly did not process it: the
+    connection could not be established or the response was 429 Too Many Requests or 503 Service Unavailable. Other
+    failures are reported in the result of the job.
+
+    With a checkpoint file, the outcome of every job is appended to it as it completes, and the jobs recorded as
+    successful are skipped when a run is started again with the same file.
+    """
+    RETRY_STATUSES = (429, 503)
+    # refusals that may be caused by the case being blocked
+    BLOCKED_STATUSES = (400, 403, 409)
+
+    def __init__(self, cip_api_client, workers=4, checkpoint=None, retries=3, backoff_factor=1.0):
+        """
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :param workers: maximum number of jobs submitted concurrently, it should not exceed the `pool_maxsize` of the
+        client
+        :param checkpoint: path of the checkpoint file, created if it does not exist
+        :param retries: maximum number of times a job is sent again after a failure safe to retry
+        :param backoff_factor: the n-th retry waits `backoff_factor * 2 ** (n - 1)` seconds, or as long as the
+        Retry-After header of the response says
+        """
+        self.cip_api_client = cip_api_client
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    def completed_jobs(self):
+        """
+        :return: identifiers of the jobs recorded as successful in the checkpoint file
+        :rtype: set
+        """
+        completed = set()
+        if self.checkpoint is None or not os.path.isfile(self.checkpoint):
+            return completed
+        with open(self.checkpoint, 'r') as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # the last line of a run killed while writing it
+                    continue
+                if record.get('status') == SubmissionResult.OK:
+                    completed.add(record['job_id'])
+                else:
+                    completed.discard(record['job_id'])
+        return completed
+
+    @staticmethod
+    def _record(checkpoint_file, result):
+        record = {'job_id': result.job.job_id, 'status': result.status, 'attempts': result.attempts,
+                  'error': str(result.error) if result.error is not None else None}
+        checkpoint_file.write(json.dumps(record) + '\n')
+        checkpoint_file.flush()
+
+    def _is_retryable(self, error):
+        if isinstance(error, ConnectTimeout):
+            return True
+        if isinstance(error, ConnectionError) and error.args and \
+                isinstance(getattr(error.args[0], 'reason', None), NewConnectionError):
+            return True
+        response = getattr(error, 'response', None)
+        return isinstance(error, HTTPError) and response is not None and \
+            response.status_code in self.RETRY_STATUSES
+
+    def is_blocked(self, job, response):
+        """
+        The CIP-API does not tell in its error responses that a case is blocked, so on a refusal the case is fetched
+        and its own status is checked. A case that cannot be fetched is not considered blocked.
+        :type job: SubmissionJob
+        :type response: requests.Response
+        :rtype: bool
+        """
+        if response.status_code not in self.BLOCKED_STATUSES:
+            return False
+        case_ids = job.case_ids()
+        if case_ids is None:
+            return False
+        try:
+            case = self.cip_api_client.get_case(*case_ids)
+        except Exception as e:
+            logging.warning("Status of case {}-{} could not be checked: {}".format(case_ids[0], case_ids[1], e))
+            return False
+        return case.is_blocked
+
+    def _wait_time(self, error, attempt):
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff_factor * (2 ** (attempt - 1))
+
+    def _run_job(self, job):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = job.submit(self.cip_api_client)
+                return SubmissionResult(job, SubmissionResult.OK, response=response, attempts=attempt)
+            except Exception as e:
+                if attempt <= self.retries and self._is_retryable(e):
+                    wait = self._wait_time(e, attempt)
+                    logging.warning("Submission {} failed, retrying in {} seconds: {}".format(job.job_id, wait, e))
+                    time.sleep(wait)
+                    continue
+                error = e
+                response = getattr(e, 'response', None)
+                if isinstance(e, HTTPError) and response is not None and self.is_blocked(job, response):
+                    status = SubmissionResult.BLOCKED
+                    error = BlockedCase(str(e), response=response)
+                elif isinstance(e, HTTPError):
+                    status = SubmissionResult.HTTP_ERROR
+                else:
+                    status = SubmissionResult.ERROR
+                return SubmissionResult(job, status, error=error, attempts=attempt)
+
+    def submit(self, jobs):
+        """
+        Submits the jobs, yielding their results as they complete
+        :type jobs: collections.Iterable[SubmissionJob]
+        :rtype: collections.Iterable[SubmissionResult]
+        """
+        completed = self.completed_jobs()
+        # filled while map_concurrently reads the jobs, from this thread
+        skipped = collections.deque()
+
+        def pending_jobs():
+            for job in jobs:
+                if job.job_id in completed:
+                    skipped.append(job)
+                else:
+                    yield job
+
+        checkpoint_file = open(self.checkpoint, 'a') if self.checkpoint is not None else None
+        try:
+            for item_result in map_concurrently(self._run_job, pending_jobs(), workers=self.workers, ordered=False):
+                while skipped:
+                    yield SubmissionResult(skipped.popleft(), SubmissionResult.SKIPPED)
+                result = item_result.get()
+                if checkpoint_file is not None:
+                    self._record(checkpoint_file, result)
+                yield result
+            while skipped:
+                yield SubmissionResult(skipped.popleft(), SubmissionResult.SKIPPED)
+        finally:
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+
+    def run(self, jobs):
+        """
+        Submits the jobs and waits for all of them
+        :type jobs: collections.Iterable[SubmissionJob]
+        :rtype: SubmissionReport
+        """
+        report = SubmissionReport()
+        for result in self.submit(jobs):
+            report.add(result)
+        logging.info("Bulk submission finished: {}".format(report))
+        return report
@@ -0,0 +1,306 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    from os import replace as replace_file
+except ImportError:
+    # Python 2, os.rename replaces an existing file on POSIX
+    from os import rename as replace_file
+
+
+class CacheEntry(object):
+    def __init__(self, content, etag=None, last_modified=None, expires_at=None):
+        """
+        :type content: bytes
+        :param etag: value of the ETag header of the response
+        :param last_modified: value of the Last-Modified header of the response
+        :param expires_at: time after which an entry without validators is not used anymore
+        """
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_response(cls, response, ttl):
+        """
+        :type response: requests.Response
+        """
+        return cls(response.content, etag=response.headers.get('ETag'),
+                   last_modified=response.headers.get('Last-Modified'), expires_at=time.time() + ttl)
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    @property
+    def can_revalidate(self):
+        return self.etag is not None or self.last_modified is not None
+
+    @property
+    def is_fresh(self):
+        return self.expires_at is not None and time.time() < self.expires_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_metadata(self):
+        return {'etag': self.etag, 'last_modified': self.last_modified, 'expires_at': self.expires_at}
+
+
+class ResponseCache(object):
+    """
+    Cache of GET responses for `RestClient`. Entries are kept in memory in a least recently used cache bounded by
+    their total size and, if a directory is given, on disk so that they survive the process. The disk tier is
+    bounded too, the entries read the least recently are deleted first, and entries without validators are deleted
+    when they are read after expiring.
+
+    Responses with an ETag or Last-Modified header are revalidated with a conditional request every time they are
+    read, the body is only downloaded again when it has changed. Responses without them are served for `ttl`
+    seconds.
+
+    Entries are keyed by the identity the requests were sent with, see `RestClient.cache_identity`, so a cache, or
+    a directory, shared by clients of different users never serves the responses of one to another.
+    """
+    URL_FILE = 'url'
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=300, directory=None, max_disk_bytes=1024 * 1024 * 1024):
+        """
+        :param max_bytes: maximum total size of the bodies kept in memory
+        :param ttl: seconds a response without validators is served from the cache
+        :param directory: directory of the on-disk tier, none if not provided
+        :param max_disk_bytes: maximum total size of the entries on disk
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self.disk_size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        if self.directory is not None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            self.disk_size = sum(size for _, _, size in self._disk_entries())
+
+    @staticmethod
+    def key(url, params=None, identity=None):
+        """
+        :param identity: whose credentials the request is sent with
+        :return: (url, variant) the url identifies the resource for invalidation, the variant distinguishes the
+        queries of it and the identities requesting it
+        """
+        variant = json.dumps({'params': params or {}, 'identity': identity}, sort_keys=True, default=str)
+        return url, variant
+
+    def get(self, key):
+        """
+        :rtype: CacheEntry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # moved to the end, the most recently used
+                self._entries[key] = self._entries.pop(key)
+                return entry
+        entry = self._read_from_disk(key)
+        if entry is not None:
+            self._set_in_memory(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        """
+        :type entry: CacheEntry
+        """
+        self._set_in_memory(key, entry)
+        self._write_to_disk(key, entry)
+
+    def invalidate(self, url):
+        """
+        Drops every cached variant of a url
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == url]:
+                self._remove(key)
+        if self.directory is not None:
+            self._remove_url_directory(self._url_directory(url))
+
+    def invalidate_prefix(self, prefix):
+        """
+        Drops every cached url starting by `prefix`
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0].startswith(prefix)]:
+                self._remove(key)
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                url_directory = os.path.join(self.directory, name)
+                try:
+                    with open(os.path.join(url_directory, self.URL_FILE), 'r') as url_file:
+                        url = url_file.read()
+                except (IOError, OSError):
+                    continue
+                if url.startswith(prefix):
+                    self._remove_url_directory(url_directory)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            with self._lock:
+                self.disk_size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+    def _set_in_memory(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    @staticmethod
+    def _hash(value):
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+    def _url_directory(self, url):
+        return os.path.join(self.directory, self._hash(url))
+
+    def _entry_path(self, key):
+        return os.path.join(self._url_directory(key[0]), self._hash(key[1]))
+
+    def _disk_entries(self):
+        """
+        :return: (path, last read time, size) of the entries on disk
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            url_directory = os.path.join(self.directory, name)
+            try:
+                names = os.listdir(url_directory)
+            except OSError:
+                continue
+            for entry_name in names:
+                if entry_name == self.URL_FILE:
+                    continue
+                path = os.path.join(url_directory, entry_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _remove_url_directory(self, url_directory):
+        removed = 0
+        try:
+            for name in os.listdir(url_directory):
+                if name != self.URL_FILE:
+                    removed += os.path.getsize(os.path.join(url_directory, name))
+        except OSError:
+            pass
+        shutil.rmtree(url_directory, ignore_errors=True)
+        with self._lock:
+            self.disk_size = max(self.disk_size - removed, 0)
+
+    def _remove_from_disk(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.disk_size = max(self.disk_size - size, 0)
+
+    def _prune_disk(self):
+        """
+        Deletes the entries read the least recently until the disk tier fits in `max_disk_bytes`
+        """
+        if not self._prune_lock.acquire(False):
+            # already being pruned by another thread
+            return
+        try:
+            entries = sorted(self._disk_entries(), key=lambda entry: entry[1])
+            with self._lock:
+                self.disk_size = sum(size for _, _, size in entries)
+            for path, _, _ in entries:
+                if self.disk_size <= self.max_disk_bytes:
+                    break
+                self._remove_from_disk(path)
+        finally:
+            self._prune_lock.release()
+
+    def _read_from_disk(self, key):
+        if self.directory is None:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as entry_file:
+                metadata = json.loads(entry_file.readline().decode('utf-8'))
+                entry = CacheEntry(entry_file.read(), **metadata)
+        except (IOError, OSError, ValueError):
+            return None
+        if not entry.can_revalidate and not entry.is_fresh:
+            self._remove_from_disk(path)
+            return None
+        try:
+            # the modification time of an entry is the last time it was read, for pruning
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def _write_to_disk(self, key, entry):
+        if self.directory is None:
+            return
+        url_directory = self._url_directory(key[0])
+        path = self._entry_path(key)
+        try:
+            if not os.path.isdir(url_directory):
+                try:
+                    os.makedirs(url_directory)
+                except OSError:
+                    # created in the meantime by another thread
+                    if not os.path.isdir(url_directory):
+                        raise
+                with open(os.path.join(url_directory, self.URL_FILE), 'w') as url_file:
+                    url_file.write(key[0])
+            previous_size = os.path.getsize(path) if os.path.isfile(path) else 0
+            # written to a temporary file first so that readers never see a partial entry
+            descriptor, temporary_path = tempfile.mkstemp(dir=url_directory)
+            with os.fdopen(descriptor, 'wb') as entry_file:
+                entry_file.write(json.dumps(entry.to_metadata()).encode('utf-8') + b'\n')
+                entry_file.write(entry.content)
+                size = entry_file.tell()
+            replace_file(temporary_path, path)
+        except (IOError, OSError) as e:
+            logging.warning("Could not write the response cache to disk: {}".format(e))
+            return
+        with self._lock:
+            self.disk_size += size - previous_size
+            over = self.disk_size > self.max_disk_bytes
+        if over:
+            self._prune_disk()
@@ -0,0 +1,250 @@
+"""
+Recording of the traffic of a client to a cassette file and its replay without network, to profile code using the
+client against realistic CIP-API responses reproducibly. Both are transport adapters of requests, given to
+`RestClient` as `transport`, so everything above the connection pool, from the token renewals to the decoding of
+the responses, runs as it would against the CIP-API.
+
+A cassette is a gzip compressed file of JSON lines, one per request: method, URL with its query parameters, status,
+a few headers, body and the time taken to receive the response. Request bodies are not recorded, neither are
+authorization headers, and the tokens returned by the CIP-API are replaced by a placeholder.
+"""
+import base64
+import collections
+import gzip
+import io
+import json
+import random
+import threading
+import time
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.response import HTTPResponse
+
+try:
+    import urllib.parse as urlparse
+except ImportError:
+    import urlparse
+
+CASSETTE_VERSION = 1
+RECORDED_HEADERS = ('Content-Type', 'Content-Range', 'Content-Disposition', 'Accept-Ranges', 'ETag',
+                    'Last-Modified', 'Retry-After', 'Location')
+AUTH_PATH_SUFFIX = '/get-token/'
+# unsigned JWT with an `exp` claim in 2100, so that the client does not try to renew it while replaying
+PLACEHOLDER_TOKEN = 'eyJhbGciOiJub25lIn0.eyJleHAiOjQxMDI0NDQ4MDB9.'
+
+
+class CassetteMiss(ConnectionError):
+    """
+    Raised on replay for a request the cassette has no response to
+    """
+
+
+def normalised_url(url):
+    """
+    :return: the URL with its query parameters sorted
+    """
+    parts = urlparse.urlsplit(url)
+    query = urlparse.urlencode(sorted(urlparse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urlparse.urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+def interaction_key(method, url):
+    """
+    :return: the method and the path of the URL with its query parameters sorted, requests with the same key are
+    replayed in the order they were recorded, whatever the host they are sent to
+    :rtype: (str, str)
+    """
+    parts = urlparse.urlsplit(normalised_url(url))
+    return method.upper(), urlparse.urlunsplit(('', '', parts.path, parts.query, ''))
+
+
+def read_cassette(path):
+    """
+    :return: the interactions recorded in a cassette file
+    :rtype: list[dict]
+    """
+    interactions = []
+    # read and written in binary mode, gzip has no text mode on Python 2
+    with gzip.open(path, 'rb') as cassette_file:
+        header = json.loads(cassette_file.readline().decode('utf-8'))
+        if header.get('version') != CASSETTE_VERSION:
+            raise ValueError("Unsupported cassette version {}".format(header.get('version')))
+        for line in cassette_file:
+            if line.strip():
+                interactions.append(json.loads(line.decode('utf-8')))
+    return interactions
+
+
+def _json_line(value):
+    return (json.dumps(value, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def build_response(adapter, request, status, headers, body, retries=None):
+    """
+    Builds a requests.Response whose `raw` streams `body`, as responses built by the HTTPAdapter of requests do
+    :type request: requests.PreparedRequest
+    :type body: bytes
+    :param retries: retries made by the connection pool before the response, read by the instrumentation
+    :type retries: urllib3.util.retry.Retry
+    :rtype: requests.Response
+    """
+    headers = CaseInsensitiveDict(headers)
+    headers['Content-Length'] = str(len(body))
+    raw = HTTPResponse(body=io.BytesIO(body), headers=dict(headers), status=status, preload_content=False,
+                       decode_content=False, request_method=request.method, retries=retries)
+    response = Response()
+    response.status_code = status
+    response.headers = headers
+    response.encoding = get_encoding_from_headers(headers)
+    response.raw = raw
+    response.reason = raw.reason
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
+
+
+class CassetteRecorder(BaseAdapter):
+    """
+    Sends the requests through the adapter of the client and appends every response to a cassette. Responses are
+    read whole before being handed to the client, streamed downloads included.
+    """
+
+    def __init__(self, path, adapter=None):
+        """
+        :param path: path of the cassette, overwritten if it exists
+        :param adapter: adapter sending the requests, the one of the session of the client if not provided
+        :type adapter: requests.adapters.BaseAdapter
+        """
+        super(CassetteRecorder, self).__init__()
+        self.path = path
+        self.adapter = adapter
+        self.interactions = 0
+        self._file = gzip.open(path, 'wb')
+        self._file.write(_json_line({'version': CASSETTE_VERSION, 'recorded_at': time.time()}))
+        self._lock = threading.Lock()
+
+    def attach(self, session):
+        """
+        Mounts the recorder on the session, in front of its current adapter
+        :type session: requests.Session
+        """
+        if self.adapter is None:
+            self.adapter = session.get_adapter('https://')
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+    @staticmethod
+    def _recorded_body(request, content):
+        if urlparse.urlsplit(request.url).path.endswith(AUTH_PATH_SUFFIX) and content:
+            return json.dumps({'token': PLACEHOLDER_TOKEN}), None
+        try:
+            return content.decode('utf-8'), None
+        except UnicodeDecodeError:
+            return base64.b64encode(content).decode('ascii'), 'base64'
+
+    def send(self, request, **kwargs):
+        start = time.time()
+        response = self.adapter.send(request, **kwargs)
+        # decoded as the client would, the Content-Encoding is then dropped
+        content = response.content
+        elapsed = time.time() - start
+        body, body_encoding = self._recorded_body(request, content)
+        interaction = {'method': request.method.upper(), 'url': normalised_url(request.url),
+                       'status': response.status_code,
+                       'headers': {name: response.headers[name] for name in RECORDED_HEADERS
+                                   if name in response.headers},
+                       'body': body, 'elapsed': round(elapsed, 6)}
+        if body_encoding is not None:
+            interaction['body_encoding'] = body_encoding
+        with self._lock:
+            self._file.write(_json_line(interaction))
+            self.interactions += 1
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')}
+        retries = getattr(response.raw, 'retries', None)
+        response.close()
+        return build_response(self, request, response.status_code, headers, content, retries=retries)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        if self.adapter is not None:
+            self.adapter.close()
+
+
+class CassetteReplayer(BaseAdapter):
+    """
+    Answers the requests with the responses of a cassette, matched by method, path and query. Requests with the same
+    method and URL get their responses in the order they were recorded, from the first one again once they have all
+    been replayed if `repeat`, so that a recorded run can be replayed in a loop. Responses are returned at once, or
+    after the recorded time multiplied by `time_scale`, plus `latency` and a random jitter.
+    """
+
+    def __init__(self, path, time_scale=0.0, latency=0.0, jitter=0.0, seed=0, repeat=True):
+        """
+        :param path: path of the cassette
+        :param time_scale: factor of the recorded response times, 0 to replay at full speed, 1 to replay in real time
+        :param latency: seconds added to every response
+        :param jitter: maximum of the random seconds added to every response
+        :param seed: seed of the jitter
+        :param repeat: when False a request with no response left raises CassetteMiss
+        """
+        super(CassetteReplayer, self).__init__()
+        self.time_scale = time_scale
+        self.latency = latency
+        self.jitter = jitter
+        self.repeat = repeat
+        self.replayed = 0
+        self._random = random.Random(seed)
+        self._interactions = collections.defaultdict(list)
+        for interaction in read_cassette(path):
+            self._interactions[interaction_key(interaction['method'], interaction['url'])].append(interaction)
+        self._positions = collections.Counter()
+        self._lock = threading.Lock()
+
+    def attach(self, session):
+        """
+        Mounts the replayer on the session in place of its adapter
+        :type session: requests.Session
+        """
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+    def _next_interaction(self, request):
+        key = interaction_key(request.method, request.url)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            position = self._positions[key]
+            if not interactions or (position >= len(interactions) and not self.repeat):
+                raise CassetteMiss("No recorded response to {} {}".format(*key), request=request)
+            self._positions[key] = position + 1
+            self.replayed += 1
+            jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        return interactions[position % len(interactions)], jitter
+
+    def send(self, request, **kwargs):
+        interaction, jitter = self._next_interaction(request)
+        delay = interaction['elapsed'] * self.time_scale + self.latency + jitter
+        if delay > 0:
+            time.sleep(delay)
+        if interaction.get('body_encoding') == 'base64':
+            body = base64.b64decode(interaction['body'])
+        else:
+            body = interaction['body'].encode('utf-8')
+        return build_response(self, request, interaction['status'], interaction['headers'], body)
+
+    def rewind(self):
+        """
+        Replays the responses from the first ones again
+        """
+        with self._lock:
+            self._positions.clear()
+
+    def close(self):
+        pass
@@ -1,3 +1,11 @@
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from pycipapi.bulk import BulkSubmitter
+from pycipapi.compact_models import CompactCipApiOverview, CompactParticipant, CompactReferral
+from pycipapi.concurrency import map_concurrently, merge_concurrently
+from pycipapi.dossiers import DossierLoader
 from pycipapi.models import (
     CipApiOverview,
     CipApiCase,
@@ -12,6 +20,7 @@ from pycipapi.models import (
     ParticipantClinicalReport,
 )
 from pycipapi.rest_client import RestClient, returns_item
+from pycipapi.uploads import MultipartEncoder
 
 
 class CipApiClient(RestClient):
@@ -26,16 +35,42 @@ class CipApiClient(RestClient):
     FILE_ENDPOINT = "{url_base}/file".format(url_base=ENDPOINT_BASE)
     PARTICIPANTS_ENDPOINT = "{url_base}/participants".format(url_base=ENDPOINT_BASE)
     PAGE_SIZE_MAX = 500
+    PAGINATION_MODES = ('serial', 'prefetch', 'parallel', 'stream')
 
-    def __init__(self, url_base, token=None, user=None, password=None, retries=5, fixed_paramters=None):
+    def __init__(self, url_base, token=None, user=None, password=None, retries=5, fixed_paramters=None,
+                 pagination='serial', page_workers=4, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 timeout=None, keep_alive=True, token_refresh_margin=60, cache=None, json_codec=None,
+                 compression=None, throttle=None, listeners=None, transport=None):
         """
         If user and password are not provided there will be no token renewal
         :param url_base:
         :param token:
         :param user:
         :param password:
-        """
-        RestClient.__init__(self, url_base=url_base, retries=retries, fixed_params=fixed_paramters)
+        :param pagination: default pagination mode of the listing methods, see `get_paginated`
+        :param page_workers: default maximum number of pages fetched concurrently in `parallel` pagination mode
+        :param pool_maxsize: maximum number of connections kept open to the CIP-API, see `RestClient`
+        :param timeout: seconds to wait for the CIP-API, either a single value or a (connect, read) tuple
+        :param token_refresh_margin: seconds before the token expires from which it is renewed in the background
+        :param cache: cache of the case details, invalidated by the methods modifying a case
+        :type cache: pycipapi.cache.ResponseCache
+        :param json_codec: codec of the request and response bodies, see `pycipapi.json_codecs.get_json_codec`
+        :param compression: compression of the submitted interpreted genomes, clinical reports, variant
+        interpretation logs and interpretation flags, `gzip`, `zstd` or a RequestCompression, see `RestClient`
+        :param throttle: rate and adaptive concurrency limits of the requests, see `pycipapi.throttling.Throttle`
+        :type throttle: pycipapi.throttling.Throttle
+        :param listeners: listeners of the requests, such as a `pycipapi.instrumentation.MetricsRegistry`
+        :param transport: adapter recording or replaying the requests, see `pycipapi.cassette`
+        """
+        RestClient.__init__(self, url_base=url_base, retries=retries, fixed_params=fixed_paramters,
+                            pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block,
+                            timeout=timeout, keep_alive=keep_alive, token_refresh_margin=token_refresh_margin,
+                            cache=cache, json_codec=json_codec, compression=compression,
+                            throttle=throttle, listeners=listeners, transport=transport)
+        if pagination not in self.PAGINATION_MODES:
+            raise ValueError("Pagination mode must be one of {}".format(", ".join(self.PAGINATION_MODES)))
+        self.pagination = pagination
+        self.page_workers = page_workers
         self.token = "JWT {}".format(token) if token is not None else None
         self.user = user
         self.password = password if password else ""
@@ -51,16 +86,128 @@ class CipApiClient(RestClient):
         }).get('token')
         return "JWT {}".format(token)
 
-    def get_paginated(self, url, **params):
+    def can_renew_token(self):
+        return self.user is not None
+
+    def cache_identity(self):
+        # the token of a user changes with every renewal, the user does not
+        if self.user is not None:
+            return "user:{}".format(self.user)
+        return RestClient.cache_identity(self)
+
+    def get_paginated(self, url, pagination=None, page_workers=None, skip_fields=None, **params):
+        """
+        Iterates over the results of a paginated endpoint, any listing method accepts `pagination`, `page_workers`
+        and `skip_fields` to override the client defaults.
+        :param pagination: `serial` fetches a page only once the previous one has been consumed, `prefetch` fetches
+        the next page in the background while the current one is being consumed and `parallel` uses the `count` of
+        the first page to fetch the remaining pages concurrently (falls back to `prefetch` when the endpoint does
+        not return `count`). `stream` fetches pages like `serial` but decodes them while they are downloaded, only
+        one result is held in memory at a time. Results are yielded in order in every mode, although in `parallel`
+        mode a listing modified while being fetched may skip or repeat items across page boundaries.
+        :type pagination: str
+        :param page_workers: maximum number of pages fetched concurrently in `parallel` mode
+        :type page_workers: int
+        :param skip_fields: in `stream` mode, keys left out of the results without decoding them, such as
+        `interpretation_request_data` or `interpreted_genome_data`
+        :rtype: collections.Iterable[dict]
+        """
+        pagination = pagination if pagination is not None else self.pagination
+        if pagination not in self.PAGINATION_MODES:
+            raise ValueError("Pagination mode must be one of {}".format(", ".join(self.PAGINATION_MODES)))
+        if skip_fields and pagination != 'stream':
+            raise ValueError("Fields can only be skipped in stream pagination mode")
         query_params, url = self._clean_url(params, url)
+        if pagination == 'stream':
+            for r in self._streamed_results(url, query_params, skip_fields):
+                yield r
+            return
+        if pagination == 'parallel':
+            pages = self._parallel_pages(url, query_params, page_workers or self.page_workers)
+        elif pagination == 'prefetch':
+            pages = self._prefetched_pages(url, query_params)
+        else:
+            pages = self._serial_pages(url, query_params)
+        for page in pages:
+            for r in page.get('results', []):
+                yield r
+
+    def _serial_pages(self, url, query_params):
         next = True
         while next is not None:
             results = self.get(url=url, params=query_params)
             next = results.get('next')
             if next is not None:
                 query_params, url = self._clean_url(parameters=query_params, url=next)
-            for r in results.get('results', []):
+            yield results
+
+    def _streamed_results(self, url, query_params, skip_fields):
+        next = True
+        while next is not None:
+            page = {}
+            for r in self.get_streamed(url, params=query_params, items_prefix='results.item',
+                                       skip_fields=skip_fields, top_level=page):
                 yield r
+            next = page.get('next')
+            if next is not None:
+                query_params, url = self._clean_url(parameters=query_params, url=next)
+
+    def _prefetched_pages(self, url, query_params, first_page=None):
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.get, url=url, params=query_params) if first_page is None else None
+        results = first_page
+        try:
+            while True:
+                if future is not None:
+                    results = future.result()
+                future = None
+                next = results.get('next')
+                if next is not None:
+                    # the page being fetched keeps its own copy of the query parameters
+                    query_params, url = self._clean_url(parameters=dict(query_params), url=next)
+                    future = executor.submit(self.get, url=url, params=query_params)
+                yield results
+                if future is None:
+                    break
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _parallel_pages(self, url, query_params, workers):
+        first_page = self.get(url=url, params=query_params)
+        count = first_page.get('count')
+        page_size = len(first_page.get('results', []))
+        if first_page.get('next') is None or count is None or not page_size:
+            for results in self._prefetched_pages(url, query_params, first_page=first_page):
+                yield results
+            return
+        yield first_page
+
+        page = query_params.get('page', 1)
+        page = int(page[0] if isinstance(page, list) else page)
+        last_page = (count + page_size - 1) // page_size
+        remaining_pages = iter(range(page + 1, last_page + 1))
+
+        def fetch_page(page_number):
+            page_params = dict(query_params)
+            page_params['page'] = page_number
+            return self.get(url=url, params=page_params)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        # at most `workers` pages are held in memory ahead of the consumer
+        pending = collections.deque(executor.submit(fetch_page, p) for p in itertools.islice(remaining_pages, workers))
+        try:
+            while pending:
+                results = pending.popleft().result()
+                next_page = next(remaining_pages, None)
+                if next_page is not None:
+                    pending.append(executor.submit(fetch_page, next_page))
+                yield results
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def get_cases_raw(self, **params):
         """
@@ -78,15 +225,150 @@ class CipApiClient(RestClient):
         for r in self.get_paginated(url, **params):
             yield r
 
-    def get_case_raw(self, case_id, case_version, **params):
+    @staticmethod
+    def shard_filters(**values):
+        """
+        Partitions of a listing, one per combination of the values given for each filter:
+        `shard_filters(sample_type=['raredisease', 'cancer'], cip=['omicia', 'exomiser'])` gives four partitions
+        :rtype: list[dict]
+        """
+        names = sorted(values)
+        return [dict(zip(names, combination)) for combination in itertools.product(*[values[n] for n in names])]
+
+    @staticmethod
+    def _listing_key(case):
+        # the listing gives "<id>-<version>" as interpretation_request_id, the case details a separate version
+        case_id = str(case.get('interpretation_request_id'))
+        version = case.get('version')
+        if version is None and '-' in case_id:
+            case_id, version = case_id.rsplit('-', 1)
+        return case_id, str(version)
+
+    def get_cases_sharded_raw(self, shards, workers=4, **params):
+        """
+        Lists the interpretation requests of disjoint partitions of the listing concurrently, each walking its own
+        chain of pages, so that a full scan is not limited to a single chain of `next` links. Cases are yielded as
+        they arrive, in no particular order, and only once per (interpretation_request_id, version) in case
+        partitions overlap or a case moves from one to another during the scan.
+        :param shards: filters of each partition, added to `params`, such as `[{'sample_type': 'raredisease'},
+        {'sample_type': 'cancer'}]`, see `shard_filters`. They must cover the whole listing to scan, cases outside
+        of every partition are not listed.
+        :type shards: list[dict]
+        :param workers: maximum number of partitions listed concurrently, each partition uses up to `page_workers`
+        more connections in `parallel` pagination mode
+        :param params: filters and pagination options shared by every partition, see `get_cases_raw`
+        :rtype: collections.Iterable[dict]
+        """
+        listings = [self.get_cases_raw(**dict(params, **shard)) for shard in shards]
+        seen = set()
+        for case in merge_concurrently(listings, workers=workers):
+            key = self._listing_key(case)
+            if key not in seen:
+                seen.add(key)
+                yield case
+
+    def get_case_raw(self, case_id, case_version, skip_fields=None, **params):
         """
         :type case_id: str
         :type case_version: str
+        :param skip_fields: keys left out of the case without decoding them, such as
+        `interpretation_request_data` or `interpreted_genome_data`, the response is then decoded while it is
+        downloaded and is not cached
         :rtype: dict
         """
 
         url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version) + '/'
-        return self.get(url, params=params)
+        if skip_fields:
+            cases = list(self.get_streamed(url, params=params, skip_fields=skip_fields))
+            return cases[0] if cases else None
+        return self.get(url, params=params, cache=True)
+
+    def invalidate_cached_case(self, case_id=None, case_version=None):
+        """
+        Drops a case from the client's cache, every case if no case is given
+        """
+        if self.cache is None:
+            return
+        if case_id is None or case_version is None:
+            self.cache.invalidate_prefix(self.build_url(self.url_base, self.IR_ENDPOINT))
+        else:
+            self.cache.invalidate(self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version) + '/')
+
+    def _invalidate_cached_report(self, report_id):
+        # reports are identified as {case_id}-{case_version}, any other identifier invalidates every case
+        ids = str(report_id).split('-')
+        if len(ids) == 2:
+            self.invalidate_cached_case(*ids)
+        else:
+            self.invalidate_cached_case()
+
+    @staticmethod
+    def _case_ids(case):
+        if isinstance(case, (tuple, list)):
+            return case[0], case[1]
+        return case.interpretation_request_id, case.version
+
+    def get_many_cases(self, cases, workers=8, ordered=True, **params):
+        """
+        Fetches the full details of many cases concurrently, failures are reported per case instead of aborting
+        the whole batch.
+        :param cases: (case_id, case_version) pairs or objects with `interpretation_request_id` and `version`
+        such as `CipApiOverview`
+        :type cases: collections.Iterable
+        :param workers: maximum number of cases fetched concurrently
+        :param ordered: yields cases in the order they were given when True, as soon as they arrive otherwise
+        :rtype: collections.Iterable[pycipapi.concurrency.ItemResult]
+        each result holds the requested item in `item` and either a CipApiCase in `result` or the exception in
+        `error`
+        """
+        def get_case(case):
+            case_id, case_version = self._case_ids(case)
+            return self.get_case(case_id, case_version, **params)
+        return map_concurrently(get_case, cases, workers=workers, ordered=ordered)
+
+    def resolve_referral_cases(self, referrals, workers=8, memo=None, batch_size=500, **params):
+        """
+        Fetches the cases of the tests of many referrals, such as those of `list_referral`, and attaches each one to
+        its tests as `interpretation_request_case`. Referrals are read `batch_size` at a time, the distinct cases of a
+        batch not fetched yet are fetched concurrently, once each however many tests refer to them. A test whose
+        case could not be fetched gets the exception in `interpretation_request_error` instead. Tests without both an
+        interpretation request id and version have no case and are left as they are.
+        :param params: parameters of `get_case`
+        :type referrals: collections.Iterable[pycipapi.models.Referral]
+        :param workers: maximum number of cases fetched concurrently
+        :param memo: cases already fetched by (interpretation_request_id, interpretation_request_version) as strings,
+        filled with the cases fetched, a new one for every call if not provided. Sharing it between calls keeps every
+        case fetched in memory.
+        :type memo: dict
+        :return: the referrals, once the cases of their tests have been attached
+        :rtype: collections.Iterable[pycipapi.models.Referral]
+        """
+        memo = memo if memo is not None else {}
+        referrals = iter(referrals)
+        while True:
+            batch = list(itertools.islice(referrals, batch_size))
+            if not batch:
+                return
+            tests = [(self._referral_test_key(test), test) for referral in batch for test in referral.referral_test
+                     if test.interpretation_request_id is not None and test.interpretation_request_version is not None]
+            missing = {key for key, _ in tests if key not in memo}
+            # failures are not memoised, a later batch referring to the same case fetches it again
+            errors = {}
+            for item_result in self.get_many_cases(missing, workers=workers, ordered=False, **params):
+                if item_result.ok:
+                    memo[item_result.item] = item_result.result
+                else:
+                    errors[item_result.item] = item_result.error
+            for key, test in tests:
+                test.interpretation_request_case = memo.get(key)
+                test.interpretation_request_error = errors.get(key)
+            for referral in batch:
+                yield referral
+
+    @staticmethod
+    def _referral_test_key(referral_test):
+        # ids come as integers or strings depending on the endpoint
+        return str(referral_test.interpretation_request_id), str(referral_test.interpretation_request_version)
 
     def register_case_raw(self, payload, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT) + '/'
@@ -96,19 +378,113 @@ class CipApiClient(RestClient):
         url = self.build_url(self.url_base, self.REFERRAL_ENDPOINT) + '/'
         return self.post(url, payload=payload, params=params)
 
-    def file_upload_raw(self, file_path, user, partner_id, report_id, file_type, **params):
+    def file_upload_raw(self, file_path, user, partner_id, report_id, file_type, compress=False, progress=None,
+                        **params):
+        """
+        Streams the file to the CIP-API, it is read a chunk at a time and never held in memory as a whole
+        :param compress: gzips the file while it is sent, it is stored with a `.gz` extension
+        :param progress: callable receiving the number of bytes sent so far, the total number of bytes (None when
+        compressing) and the throughput in bytes per second
+        """
         url = self.build_url(self.url_base, self.FILE_ENDPOINT, partner_id, report_id, file_type) + '/'
-        files = {'file': open(file_path, 'rb')}
-        data = {'user': user}
-        return self.post(url, payload=data, files=files, params=params)
+        with MultipartEncoder(fields=[('user', user)], files=[('file', file_path)], compress=compress,
+                              progress=progress) as body:
+            try:
+                return self.post(url, payload=None, data=body, headers={'Content-Type': body.content_type},
+                                 params=params)
+            finally:
+                self._invalidate_cached_report(report_id)
+
+    def file_upload_many(self, uploads, workers=4, ordered=True, compress=False, **params):
+        """
+        Uploads many files concurrently over the pooled connections of the client, failures are reported per file
+        instead of aborting the whole batch. Every file is closed once sent, whatever the outcome.
+        :param uploads: dicts of the arguments of `file_upload_raw`: file_path, user, partner_id, report_id,
+        file_type and optionally compress and progress
+        :type uploads: collections.Iterable[dict]
+        :param workers: maximum number of files uploaded concurrently, it should not exceed the `pool_maxsize` of the
+        client
+        :rtype: collections.Iterable[pycipapi.concurrency.ItemResult]
+        """
+        def file_upload(upload):
+            arguments = dict(params)
+            arguments['compress'] = compress
+            arguments.update(upload)
+            return self.file_upload_raw(**arguments)
+        return map_concurrently(file_upload, uploads, workers=workers, ordered=ordered)
+
+    def file_download(self, path, partner_id, report_id, file_type, file_name=None, resume=True,
+                      checksum_algorithm=None, expected_checksum=None, progress=None, **params):
+        """
+        Streams a file of the file endpoint to `path`, see `RestClient.download`
+        :param file_name: name of the file when there are several of the same type
+        :param resume: resumes an interrupted download of the same path
+        :param checksum_algorithm: algorithm of hashlib computing the checksum while the file is written
+        :param expected_checksum: hexadecimal digest the file must match, `ChecksumMismatch` is raised otherwise
+        :param progress: callable receiving the number of bytes written so far and the total size
+        :rtype: pycipapi.downloads.DownloadedFile
+        """
+        parts = [partner_id, report_id, file_type] + ([file_name] if file_name is not None else [])
+        url = self.build_url(self.url_base, self.FILE_ENDPOINT, *parts) + '/'
+        return self.download(url, path, params=params, resume=resume, checksum_algorithm=checksum_algorithm,
+                             expected_checksum=expected_checksum, progress=progress)
+
+    def file_download_many(self, downloads, workers=4, ordered=True, **params):
+        """
+        Downloads many files concurrently, failures are reported per file instead of aborting the whole batch
+        :param downloads: dicts of the arguments of `file_download`: path, partner_id, report_id, file_type and
+        optionally file_name, resume, checksum_algorithm, expected_checksum and progress
+        :type downloads: collections.Iterable[dict]
+        :param workers: maximum number of files downloaded concurrently, it should not exceed the `pool_maxsize` of
+        the client
+        :rtype: collections.Iterable[pycipapi.concurrency.ItemResult]
+        """
+        def file_download(download):
+            arguments = dict(params)
+            arguments.update(download)
+            return self.file_download(**arguments)
+        return map_concurrently(file_download, downloads, workers=workers, ordered=ordered)
+
+    def submit_many(self, jobs, workers=4, checkpoint=None, retries=3):
+        """
+        Submits interpreted genomes, clinical reports and variant interpretation logs in bulk, see
+        `pycipapi.bulk.BulkSubmitter`
+        :type jobs: collections.Iterable[pycipapi.bulk.SubmissionJob]
+        :param workers: maximum number of jobs submitted concurrently
+        :param checkpoint: path of a file recording the completed jobs, from which an interrupted run resumes
+        :param retries: maximum number of times a job is sent again after a failure safe to retry
+        :rtype: pycipapi.bulk.SubmissionReport
+        """
+        return BulkSubmitter(self, workers=workers, checkpoint=checkpoint, retries=retries).run(jobs)
+
+    def load_participant_dossiers(self, participants, workers=4, fetch_workers=8, ordered=True, **params):
+        """
+        Fetches the consent, interpreted genomes and clinical reports of many participants concurrently, skipping
+        those embedded in the participants given, see `pycipapi.dossiers.DossierLoader`
+        :param participants: participant ids or `Participant` objects, such as those of `list_participants`
+        :type participants: collections.Iterable
+        :param workers: maximum number of participants loaded concurrently
+        :param fetch_workers: maximum number of requests in flight
+        :param ordered: yields the dossiers in the order of the participants when True, as soon as they are loaded
+        otherwise
+        :rtype: collections.Iterable[pycipapi.dossiers.ParticipantDossier]
+        """
+        loader = DossierLoader(self, workers=workers, fetch_workers=fetch_workers, **params)
+        return loader.load(participants, ordered=ordered)
 
     def change_priority_raw(self, case_id, case_version, priority, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT, 'case-priority', case_id, case_version) + '/'
-        return self.patch(url, {"case_priority": priority}, params=params)
+        try:
+            return self.patch(url, {"case_priority": priority}, params=params)
+        finally:
+            self.invalidate_cached_case(case_id, case_version)
 
     def patch_case_raw(self, case_id, case_version, payload, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version) + '/'
-        return self.patch(url, payload=payload, params=params)
+        try:
+            return self.patch(url, payload=payload, params=params)
+        finally:
+            self.invalidate_cached_case(case_id, case_version)
 
     def submit_interpretation_request_raw(self, case_id, case_version, interpretation_request_dict, extra_fields,
                                           **params):
@@ -118,15 +494,24 @@ class CipApiClient(RestClient):
 
     def dispatch_raw(self, case_id, case_version, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT, 'dispatch', case_id, case_version) + '/'
-        return self.put(url, payload=None, params=params)
+        try:
+            return self.put(url, payload=None, params=params)
+        finally:
+            self.invalidate_cached_case(case_id, case_version)
 
     def submit_interpreted_genome_raw(self, payload, partner_id, analysis_type, report_id, **params):
         url = self.build_url(self.url_base, self.IG_ENDPOINT, partner_id, analysis_type, report_id) + '/'
-        return self.post(url, payload=payload, params=params)
+        try:
+            return self.post(url, payload=payload, params=params, compress=True)
+        finally:
+            self._invalidate_cached_report(report_id)
 
     def submit_clinical_report_raw(self, payload, partner_id, analysis_type, report_id, **params):
         url = self.build_url(self.url_base, self.CR_ENDPOINT, partner_id, analysis_type, report_id) + '/'
-        return self.post(url, payload, params=params)
+        try:
+            return self.post(url, payload, params=params, compress=True)
+        finally:
+            self._invalidate_cached_report(report_id)
 
     def submit_variant_interpretation_logs_raw(self, payload, case_id, case_version, **params):
         case_id_version = "{ir_id}-{ir_version}".format(
@@ -134,15 +519,21 @@ class CipApiClient(RestClient):
             ir_version=case_version
         )
         url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id_version, 'variant-interpretation-log') + '/'
-        return self.post(url, payload, params=params)
+        try:
+            return self.post(url, payload, params=params, compress=True)
+        finally:
+            self.invalidate_cached_case(case_id, case_version)
 
     def submit_interpretation_flags_raw(self, payload, case_id, case_version, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version, 'interpretation-flags') + '/'
-        return self.post(url, payload, params=params)
+        try:
+            return self.post(url, payload, params=params, compress=True)
+        finally:
+            self.invalidate_cached_case(case_id, case_version)
 
     def get_interpretation_flags_raw(self, case_id, case_version, **params):
         url = self.build_url(self.url_base, self.IR_ENDPOINT, case_id, case_version, 'interpretation-flags') + '/'
-        for r in self.get_paginated(url, params=params):
+        for r in self.get_paginated(url, **params):
             yield r
 
     def list_clinical_reports_raw(self, **params):
@@ -151,7 +542,7 @@ class CipApiClient(RestClient):
         :rtype: collections.Iterable[dict]
         """
         url = self.build_url(self.url_base, self.CR_ENDPOINT)
-        for r in self.get_paginated(url, params=params):
+        for r in self.get_paginated(url, **params):
             yield r
 
     def list_referral_raw(self, **params):
@@ -160,7 +551,7 @@ class CipApiClient(RestClient):
         :rtype: collections.Iterable[dict]
         """
         url = self.build_url(self.url_base, self.REFERRAL_ENDPOINT)
-        for r in self.get_paginated(url, params=params):
+        for r in self.get_paginated(url, **params):
             yield r
 
     def submit_interpretation_flags(self, payload, case_id, case_version, **params):
@@ -211,12 +602,12 @@ class CipApiClient(RestClient):
 
     def list_participant_interpreted_genomes_raw(self, participant_id, **params):
         url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'interpreted-genome') + '/'
-        for r in self.get_paginated(url, params=params):
+        for r in self.get_paginated(url, **params):
             yield r
 
     def list_participant_clinical_reports_raw(self, participant_id, **params):
         url = self.build_url(self.url_base, self.PARTICIPANTS_ENDPOINT, participant_id, 'summary-of-findings') + '/'
-        for r in self.get_paginated(url, params=params):
+        for r in self.get_paginated(url, **params):
             yield r
 
     @returns_item(ParticipantConsent)
@@ -315,6 +706,24 @@ class CipApiClient(RestClient):
         """
         return self.get_cases_raw(**params)
 
+    @returns_item(CipApiOverview, multi=True)
+    def list_cases_sharded(self, shards, workers=4, **params):
+        """
+        Same as `list_cases` listing partitions concurrently, see `get_cases_sharded_raw`
+
+        :rtype: collections.Iterable[CipApiOverview]
+        """
+        return self.get_cases_sharded_raw(shards, workers=workers, **params)
+
+    @returns_item(CompactCipApiOverview, multi=True)
+    def list_cases_compact(self, **params):
+        """
+        Same as `list_cases` with memory compact objects, see `pycipapi.compact_models`
+
+        :rtype: collections.Iterable[CompactCipApiOverview]
+        """
+        return self.get_cases_raw(**params)
+
     @returns_item(CipApiCase, multi=False)
     def get_case(self, case_id, case_version, **params):
         """
@@ -363,6 +772,15 @@ class CipApiClient(RestClient):
         """
         return self.list_participants_raw(**params)
 
+    @returns_item(CompactParticipant, multi=True)
+    def list_participants_compact(self, **params):
+        """
+        Same as `list_participants` with memory compact objects, see `pycipapi.compact_models`
+
+        :rtype: collections.Iterable[CompactParticipant]
+        """
+        return self.list_participants_raw(**params)
+
     @returns_item(ClinicalReport, multi=True)
     def list_clinical_reports(self, **params):
         """
@@ -398,6 +816,15 @@ class CipApiClient(RestClient):
         """
         return self.list_referral_raw(**params)
 
+    @returns_item(CompactReferral, multi=True)
+    def list_referral_compact(self, **params):
+        """
+        Same as `list_referral` with memory compact objects, see `pycipapi.compact_models`
+
+        :rtype: collections.Iterable[CompactReferral]
+        """
+        return self.list_referral_raw(**params)
+
     @returns_item(Referral, multi=False)
     def create_referral(self, payload, **params):
         """
@@ -0,0 +1,247 @@
+"""
+Builds tables of cases column by column straight from the raw pages of the interpretation request list, without
+creating a model object per case. NumPy is required for `to_numpy` and pyarrow for the Arrow, Parquet and Feather
+outputs.
+"""
+import collections
+import datetime
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+def _case_id(row):
+    return int(row['interpretation_request_id'].split('-')[0])
+
+
+def _case_version(row):
+    return int(row['interpretation_request_id'].split('-')[1])
+
+
+def _field(name):
+    return lambda row: row.get(name)
+
+
+# name: (type, extractor), types are int64, string (few distinct values), text and timestamp
+COLUMNS = collections.OrderedDict([
+    ('interpretation_request_id', ('int64', _case_id)),
+    ('version', ('int64', _case_version)),
+    ('cip', ('string', _field('cip'))),
+    ('sample_type', ('string', _field('sample_type'))),
+    ('last_status', ('string', _field('last_status'))),
+    ('case_priority', ('int64', _field('case_priority'))),
+    ('assembly', ('string', _field('assembly'))),
+    ('last_modified', ('timestamp', _field('last_modified'))),
+    ('number_of_samples', ('int64', _field('number_of_samples'))),
+    ('family_id', ('text', _field('family_id'))),
+    ('proband', ('text', _field('proband'))),
+    ('cohort_id', ('text', _field('cohort_id'))),
+    ('case_id', ('text', _field('case_id'))),
+    ('workflow_status', ('string', _field('workflow_status'))),
+])
+DEFAULT_FIELDS = ('interpretation_request_id', 'version', 'cip', 'sample_type', 'last_status', 'case_priority',
+                  'assembly', 'last_modified', 'number_of_samples')
+
+
+class CaseTableBuilder(object):
+    """
+    Accumulates rows of the interpretation request list into one list of values per column. Columns of type `string`
+    are stored as indices into a dictionary of their distinct values that is kept, and only grows, across `clear` so
+    that consecutive batches can be written to the same Arrow file.
+    """
+
+    def __init__(self, fields=None):
+        """
+        :param fields: columns of the table, any of `COLUMNS`, `DEFAULT_FIELDS` if not provided
+        """
+        self.fields = tuple(fields) if fields is not None else DEFAULT_FIELDS
+        unknown = [field for field in self.fields if field not in COLUMNS]
+        if unknown:
+            raise ValueError("Unknown columns: {}".format(", ".join(unknown)))
+        self._extractors = [COLUMNS[field][1] for field in self.fields]
+        self._dictionaries = [{} if COLUMNS[field][0] == 'string' else None for field in self.fields]
+        self.columns = None
+        self.clear()
+
+    def clear(self):
+        self.columns = [[] for _ in self.fields]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def append(self, row):
+        for column, extractor, dictionary in zip(self.columns, self._extractors, self._dictionaries):
+            value = extractor(row)
+            if dictionary is not None and value is not None:
+                value = dictionary.setdefault(value, len(dictionary))
+            column.append(value)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def to_numpy(self):
+        """
+        Integer columns with missing values are masked arrays, timestamps are datetime64[us] in UTC
+        :raises ValueError: if a timestamp is not in ISO 8601 format
+        :rtype: collections.OrderedDict
+        """
+        if numpy is None:
+            raise ImportError("numpy is required to build NumPy arrays, install it with `pip install numpy`")
+        arrays = collections.OrderedDict()
+        for field, values, dictionary in zip(self.fields, self.columns, self._dictionaries):
+            column_type = COLUMNS[field][0]
+            if column_type == 'string':
+                distinct_values = self._distinct_values(dictionary)
+                values = [None if index is None else distinct_values[index] for index in values]
+            if column_type == 'int64':
+                mask = [value is None for value in values]
+                array = numpy.array([0 if value is None else value for value in values], dtype=numpy.int64)
+                arrays[field] = numpy.ma.masked_array(array, mask=mask) if any(mask) else array
+            elif column_type == 'timestamp':
+                arrays[field] = numpy.array([_naive_utc(value) for value in values], dtype='datetime64[us]')
+            else:
+                arrays[field] = numpy.array(values, dtype=object)
+        return arrays
+
+    def to_arrow(self):
+        """
+        Columns with few distinct values are dictionary encoded, timestamps are in UTC
+        :rtype: pyarrow.RecordBatch
+        :raises ValueError: if a timestamp is not in ISO 8601 format
+        """
+        if pyarrow is None:
+            raise ImportError("pyarrow is required to build Arrow record batches, "
+                              "install it with `pip install pyarrow`")
+        arrays = []
+        for field, values, dictionary in zip(self.fields, self.columns, self._dictionaries):
+            column_type = COLUMNS[field][0]
+            if column_type == 'int64':
+                arrays.append(pyarrow.array(values, type=pyarrow.int64()))
+            elif column_type == 'timestamp':
+                timestamps = pyarrow.array([_naive_utc(value) for value in values], type=pyarrow.string())
+                arrays.append(timestamps.cast(pyarrow.timestamp('us')).cast(pyarrow.timestamp('us', tz='UTC')))
+            elif column_type == 'string':
+                arrays.append(pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(values, type=pyarrow.int32()),
+                    pyarrow.array(self._distinct_values(dictionary), type=pyarrow.string())))
+            else:
+                arrays.append(pyarrow.array(values, type=pyarrow.string()))
+        return pyarrow.RecordBatch.from_arrays(arrays, names=list(self.fields))
+
+    @staticmethod
+    def _distinct_values(dictionary):
+        distinct_values = [None] * len(dictionary)
+        for value, index in dictionary.items():
+            distinct_values[index] = value
+        return distinct_values
+
+
+# date, time, fraction of a second and UTC offset of an ISO 8601 timestamp
+TIMESTAMP = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}:\d{2}(?::\d{2})?)(\.\d+)?(Z|[+-]\d{2}:?\d{2})?)?$')
+
+
+def _naive_utc(value):
+    """
+    numpy and pyarrow only parse timestamps without time zone into naive timestamps, timestamps with an offset are
+    converted to UTC and those without one are taken as UTC
+    :raises ValueError: if the value is not an ISO 8601 timestamp
+    """
+    if value is None:
+        return None
+    match = TIMESTAMP.match(value)
+    if match is None:
+        raise ValueError("Not an ISO 8601 timestamp: {!r}".format(value))
+    date, time_of_day, fraction, offset = match.groups()
+    if time_of_day is None:
+        return date
+    if len(time_of_day) == 5:
+        time_of_day += ':00'
+    offset_minutes = 0
+    if offset is not None and offset != 'Z':
+        offset_minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+        if offset[0] == '-':
+            offset_minutes = -offset_minutes
+    if offset_minutes:
+        timestamp = datetime.datetime.strptime(date + 'T' + time_of_day, '%Y-%m-%dT%H:%M:%S')
+        timestamp -= datetime.timedelta(minutes=offset_minutes)
+        date, time_of_day = timestamp.strftime('%Y-%m-%d'), timestamp.strftime('%H:%M:%S')
+    return '{}T{}{}'.format(date, time_of_day, fraction or '')
+
+
+def iter_case_batches(cip_api_client, fields=None, batch_size=50000, **params):
+    """
+    Streams the interpretation request list into Arrow record batches of up to `batch_size` rows
+    :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+    :param params: filters and pagination options of `CipApiClient.get_cases_raw`
+    :rtype: collections.Iterable[pyarrow.RecordBatch]
+    """
+    builder = CaseTableBuilder(fields)
+    batches = 0
+    for row in cip_api_client.get_cases_raw(**params):
+        builder.append(row)
+        if len(builder) >= batch_size:
+            yield builder.to_arrow()
+            batches += 1
+            builder.clear()
+    # an empty listing still gives a batch with the schema of the table
+    if len(builder) or not batches:
+        yield builder.to_arrow()
+
+
+def build_case_table(cip_api_client, fields=None, output='numpy', **params):
+    """
+    :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+    :param output: `numpy` for a dictionary of NumPy arrays, `arrow` for a pyarrow.Table
+    :param params: filters and pagination options of `CipApiClient.get_cases_raw`
+    """
+    if output == 'arrow':
+        batches = list(iter_case_batches(cip_api_client, fields=fields, **params))
+        return pyarrow.Table.from_batches(batches)
+    if output != 'numpy':
+        raise ValueError("Output must be numpy or arrow")
+    builder = CaseTableBuilder(fields)
+    builder.extend(cip_api_client.get_cases_raw(**params))
+    return builder.to_numpy()
+
+
+def write_case_table(cip_api_client, path, file_format='parquet', fields=None, batch_size=50000, **params):
+    """
+    Writes the interpretation request list to a Parquet or Feather file one batch at a time
+    :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+    :param file_format: `parquet` or `feather`
+    :param params: filters and pagination options of `CipApiClient.get_cases_raw`
+    :return: number of rows written
+    """
+    if file_format not in ('parquet', 'feather'):
+        raise ValueError("File format must be parquet or feather")
+    writer = None
+    rows = 0
+    try:
+        for batch in iter_case_batches(cip_api_client, fields=fields, batch_size=batch_size, **params):
+            if writer is None:
+                if file_format == 'parquet':
+                    writer = pyarrow.parquet.ParquetWriter(path, batch.schema)
+                else:
+                    # Feather version 2 is the Arrow IPC file format, which only accepts dictionaries that grow
+                    options = pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                    writer = pyarrow.ipc.new_file(path, batch.schema, options=options)
+            if file_format == 'parquet':
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,195 @@
+"""
+Memory compact versions of the models returned by the listing endpoints, for loading hundreds of thousands of them
+at once. They have the same attributes and methods as their counterparts in `pycipapi.models` but store them in
+`__slots__` instead of a per-instance `__dict__`, and share a single copy of the strings repeated across rows such
+as `cip`, `sample_type`, `last_status` or `assembly`. Unlike the regular models, they cannot be given new
+attributes.
+"""
+import sys
+
+from pycipapi.models import (
+    CipApiOverview,
+    ParticipantConsent,
+    ParticipantInterpretedGenome,
+    Referral,
+    ReferralTest,
+    RequestStatus,
+)
+
+try:
+    _intern_string = sys.intern
+except AttributeError:
+    _intern_string = intern
+
+
+def _borrowed(klass, name):
+    """
+    :return: the method, property or static method `name` as defined by `klass`, to be shared by a compact model.
+    It is read from the class dictionary since on Python 2 reading it from the class gives an unbound method, which
+    only accepts instances of `klass`.
+    """
+    return klass.__dict__[name]
+
+
+def intern(value):
+    """
+    :return: the shared copy of a string, any other value unchanged
+    """
+    return _intern_string(value) if type(value) is str else value
+
+
+class CompactRequestStatus(object):
+    __slots__ = ('created_at', 'user', 'status')
+
+    def __init__(self, **kwargs):
+        self.created_at = kwargs.get('created_at')
+        self.user = intern(kwargs.get('user'))
+        self.status = intern(kwargs.get('status'))
+
+    is_blocked = _borrowed(RequestStatus, 'is_blocked')
+
+
+class CompactReferralTest(object):
+    __slots__ = ('referral_test_id', 'clinical_indication_test_type_id', 'clinical_indication_test_code',
+                 'clinical_indication_test_name', 'test_technology_id', 'testTechnologyDescription', 'ordering_date',
+                 'interpretation_request', 'create_at', 'last_modified', 'interpreter_organisation_id',
+                 'interpreter_organisation_code', 'interpreter_organisation_name',
+                 'interpreter_organisation_national_grouping_id', 'interpreter_organisation_national_grouping_name',
+                 'interpretation_request_id', 'interpretation_request_version', 'interpretation_request_case',
+                 'interpretation_request_error')
+
+    def __init__(self, **kwargs):
+        self.referral_test_id = kwargs.get("referral_test_id")
+        self.clinical_indication_test_type_id = kwargs.get("clinical_indication_test_type_id")
+        self.clinical_indication_test_code = intern(kwargs.get("clinical_indication_test_code"))
+        self.clinical_indication_test_name = intern(kwargs.get("clinical_indication_test_name"))
+        self.test_technology_id = kwargs.get("test_technology_id")
+        self.testTechnologyDescription = intern(kwargs.get("testTechnologyDescription"))
+        self.ordering_date = kwargs.get("ordering_date")
+        self.interpretation_request = kwargs.get("interpretation_request")
+        self.create_at = kwargs.get("create_at")
+        self.last_modified = kwargs.get("last_modified")
+        self.interpreter_organisation_id = kwargs.get("interpreter_organisation_id")
+        self.interpreter_organisation_code = intern(kwargs.get("interpreter_organisation_code"))
+        self.interpreter_organisation_name = intern(kwargs.get("interpreter_organisation_name"))
+        self.interpreter_organisation_national_grouping_id = kwargs.get(
+            "interpreter_organisation_national_grouping_id")
+        self.interpreter_organisation_national_grouping_name = intern(kwargs.get(
+            "interpreter_organisation_national_grouping_name"))
+        self.interpretation_request_id = kwargs.get("interpretation_request_id")
+        self.interpretation_request_version = kwargs.get("interpretation_request_version")
+        self.interpretation_request_case = None
+        self.interpretation_request_error = None
+
+    get_interpretation_request_ids = _borrowed(ReferralTest, 'get_interpretation_request_ids')
+    get_interpretation_request = _borrowed(ReferralTest, 'get_interpretation_request')
+
+
+class CompactReferral(object):
+    __slots__ = ('referral_id', 'referral_uid', 'ordering_date', 'analysis_scope', '_referral_payload_json',
+                 'last_modified', 'create_at', 'requester_organisation_id', 'requester_organisation_code',
+                 'requester_organisation_name', 'requester_organisation_national_grouping_id',
+                 'requester_organisation_national_grouping_name', 'referral_test', '_parsed')
+
+    def __init__(self, **kwargs):
+        self.referral_id = kwargs.get("referral_id")
+        self.referral_uid = kwargs.get("referral_uid")
+        self.ordering_date = kwargs.get("ordering_date")
+        self.analysis_scope = intern(kwargs.get("analysis_scope"))
+        self._referral_payload_json = kwargs.get("referral_data")
+        self.last_modified = kwargs.get("last_modified")
+        self.create_at = kwargs.get("create_at")
+        self.requester_organisation_id = kwargs.get("requester_organisation_id")
+        self.requester_organisation_code = intern(kwargs.get("requester_organisation_code"))
+        self.requester_organisation_name = intern(kwargs.get("requester_organisation_name"))
+        self.requester_organisation_national_grouping_id = kwargs.get("requester_organisation_national_grouping_id")
+        self.requester_organisation_national_grouping_name = intern(kwargs.get(
+            "requester_organisation_national_grouping_name"))
+        self.referral_test = [rt for rt in self.process_referral_tests(kwargs.get('referral_test'))]
+        self._parsed = None
+
+    referral_data = _borrowed(Referral, 'referral_data')
+    _parse_referral_data = _borrowed(Referral, '_parse_referral_data')
+    get_interpretation_requests_ids = _borrowed(Referral, 'get_interpretation_requests_ids')
+    get_interpretation_requests = _borrowed(Referral, 'get_interpretation_requests')
+
+    def process_referral_tests(self, referral_test_data):
+        for referral_test in referral_test_data:
+            yield CompactReferralTest(**referral_test)
+
+
+class CompactParticipant(object):
+    __slots__ = ('participant_id', 'participant_uid', 'family_id', 'sample_ids', 'interpretation_request',
+                 'category', 'participant_interpreted_genome', 'participant_clinical_report',
+                 'primary_findings_analysis', 'additional_findings_analysis', 'year_of_birth', 'assembly', 'sex',
+                 'clinical_indication', 'created_at', 'updated_at', 'participant_consent', 'sites', 'sample_type',
+                 'additional_findings_status')
+
+    def __init__(self, **kwargs):
+        self.participant_id = kwargs.get('participant_id')
+        self.participant_uid = kwargs.get('participant_uid')
+        self.family_id = kwargs.get('family_id')
+        self.sample_ids = kwargs.get('sample_ids')
+        self.interpretation_request = kwargs.get('interpretation_request')
+        self.category = intern(kwargs.get('category'))
+        self.participant_interpreted_genome = [ParticipantInterpretedGenome(**ig) for ig in
+                                               kwargs.get('participant_interpreted_genome', [])]
+        self.participant_clinical_report = kwargs.get("participant_clinical_report")
+        self.primary_findings_analysis = intern(kwargs.get("primary_findings_analysis"))
+        self.additional_findings_analysis = intern(kwargs.get("additional_findings_analysis"))
+        self.year_of_birth = kwargs.get("year_of_birth")
+        self.assembly = intern(kwargs.get("assembly"))
+        self.sex = intern(kwargs.get("sex"))
+        self.clinical_indication = intern(kwargs.get("clinical_indication"))
+        self.created_at = kwargs.get("created_at")
+        self.updated_at = kwargs.get("updated_at")
+        self.participant_consent = ParticipantConsent(**kwargs.get("participant_consent")) if \
+            kwargs.get("participant_consent") else None
+        self.sites = kwargs.get("sites")
+        self.sample_type = intern(kwargs.get("sample_type"))
+        self.additional_findings_status = intern(kwargs.get("additional_findings_status"))
+
+
+class CompactCipApiOverview(object):
+    __slots__ = ('interpretation_request_id', 'version', 'cip', 'cohort_id', 'sample_type', 'last_status',
+                 'family_id', 'cancer_participant_id', 'proband', 'number_of_samples', 'last_update', 'sites',
+                 'case_priority', 'tags', 'assembly', 'last_modified', 'clinical_reports', 'interpreted_genomes',
+                 'files', 'workflow_status', 'cva_variants_status', 'cva_variants_transaction_id', 'case_id',
+                 'status', 'referral', 'interpretation_flags')
+
+    def __init__(self, **kwargs):
+        self._load_data(**kwargs)
+
+    def _load_data(self, **kwargs):
+        case_id, case_version = kwargs.get('interpretation_request_id', '.-.').split('-')
+        self.interpretation_request_id = int(case_id)
+        self.version = intern(case_version)
+        self.cip = intern(kwargs.get('cip'))
+        self.cohort_id = kwargs.get('cohort_id')
+        self.sample_type = intern(kwargs.get('sample_type'))
+        self.last_status = intern(kwargs.get('last_status'))
+        self.family_id = kwargs.get('family_id')
+        self.cancer_participant_id = kwargs.get('cancer_participant')
+        self.proband = kwargs.get('proband')
+        self.number_of_samples = kwargs.get('number_of_samples')
+        self.last_update = kwargs.get('last_update')
+        self.sites = kwargs.get('sites')
+        self.case_priority = kwargs.get('case_priority')
+        self.tags = kwargs.get('tags')
+        self.assembly = intern(kwargs.get('assembly'))
+        self.last_modified = kwargs.get('last_modified')
+        self.clinical_reports = kwargs.get('clinical_reports')
+        self.interpreted_genomes = kwargs.get('interpreted_genomes')
+        self.files = kwargs.get('files')
+        self.workflow_status = intern(kwargs.get('workflow_status'))
+        self.cva_variants_status = intern(kwargs.get('cva_variants_status'))
+        self.cva_variants_transaction_id = kwargs.get('cva_variants_transaction_id')
+        self.case_id = kwargs.get('case_id')
+        self.status = [CompactRequestStatus(**s) for s in kwargs.get('status', [])]
+        self.referral = CompactReferral(**kwargs.get('referral')) if kwargs.get('referral') else None
+        self.interpretation_flags = kwargs.get('interpretation_flags')
+
+    get_case = _borrowed(CipApiOverview, 'get_case')
+    __lt__ = _borrowed(CipApiOverview, '__lt__')
+    __eq__ = _borrowed(CipApiOverview, '__eq__')
+    __hash__ = None
@@ -0,0 +1,115 @@
+"""
+Compression of the request bodies sent by the clients, opt-in as the server must accept the `Content-Encoding` used.
+"""
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CompressionStats(object):
+    """
+    Totals over the bodies seen by a `RequestCompression`, shared by the threads of a client
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.compressed_requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, bytes_in, bytes_out, seconds, compressed):
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+            if compressed:
+                self.compressed_requests += 1
+
+    @property
+    def ratio(self):
+        """
+        :return: size of the bodies sent over their uncompressed size, 1 if nothing was sent
+        """
+        return self.bytes_out / float(self.bytes_in) if self.bytes_in else 1.0
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_in - self.bytes_out
+
+    def time_saved(self, bandwidth):
+        """
+        :param bandwidth: upload bandwidth in bytes per second
+        :return: estimated seconds of upload saved, minus the time spent compressing
+        """
+        return self.bytes_saved / float(bandwidth) - self.seconds
+
+    def to_dict(self):
+        return {'requests': self.requests, 'compressed_requests': self.compressed_requests,
+                'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out, 'ratio': self.ratio,
+                'compression_seconds': self.seconds}
+
+    def __repr__(self):
+        return "{}(requests={}, ratio={:.3f})".format(type(self).__name__, self.requests, self.ratio)
+
+
+class RequestCompression(object):
+    ALGORITHMS = ('gzip', 'zstd')
+
+    def __init__(self, algorithm='gzip', threshold=16 * 1024, level=None):
+        """
+        :param algorithm: `gzip`, or `zstd` which requires zstandard
+        :param threshold: bodies smaller than this number of bytes are sent uncompressed
+        :param level: compression level, 6 for gzip and 3 for zstd if not provided
+        """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError("Compression algorithm must be one of {}".format(", ".join(self.ALGORITHMS)))
+        if algorithm == 'zstd' and zstandard is None:
+            raise ImportError("zstandard is required for zstd compression, install it with `pip install zstandard`")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level
+        self.stats = CompressionStats()
+
+    def _compress(self, body):
+        if self.algorithm == 'zstd':
+            level = self.level if self.level is not None else 3
+            return zstandard.ZstdCompressor(level=level).compress(body)
+        level = self.level if self.level is not None else 6
+        # wbits 31 writes the gzip format rather than a raw zlib stream
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def compress(self, body):
+        """
+        :type body: bytes
+        :return: the body to send and the value of its Content-Encoding header, None if it was not compressed
+        :rtype: (bytes, str)
+        """
+        if len(body) < self.threshold:
+            self.stats.record(len(body), len(body), 0.0, False)
+            return body, None
+        start = time.time()
+        compressed = self._compress(body)
+        if len(compressed) >= len(body):
+            self.stats.record(len(body), len(body), time.time() - start, False)
+            return body, None
+        self.stats.record(len(body), len(compressed), time.time() - start, True)
+        return compressed, self.algorithm
+
+
+def get_request_compression(compression=None):
+    """
+    :param compression: a RequestCompression, the name of an algorithm or None for no compression
+    :rtype: RequestCompression
+    """
+    if compression is None or isinstance(compression, RequestCompression):
+        return compression
+    return RequestCompression(algorithm=compression)
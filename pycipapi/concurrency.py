@@ -0,0 +1,121 @@
+import collections
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class ItemResult(object):
+    """
+    Outcome of applying a function to one item of a bulk operation, a failure is reported in `error` rather than
+    aborting the whole batch
+    """
+    def __init__(self, item, result=None, error=None):
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """
+        :return: the result, raises the error if the item failed
+        """
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def __repr__(self):
+        return "{}(item={!r}, ok={})".format(type(self).__name__, self.item, self.ok)
+
+
+def _apply(func, item):
+    try:
+        return ItemResult(item, result=func(item))
+    except Exception as e:
+        return ItemResult(item, error=e)
+
+
+def map_concurrently(func, items, workers=8, ordered=True):
+    """
+    Applies `func` to every item on a pool of `workers` threads. Items are consumed lazily, no more than `workers`
+    of them are in flight at any time.
+    :type items: collections.Iterable
+    :param ordered: yields results in the order of `items` when True, as soon as they complete otherwise
+    :rtype: collections.Iterable[ItemResult]
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = collections.deque(executor.submit(_apply, func, item) for item in itertools.islice(items, workers))
+    try:
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for item in itertools.islice(items, len(done)):
+                pending.append(executor.submit(_apply, func, item))
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def merge_concurrently(iterables, workers=8, buffer_size=1000):
+    """
+    Consumes every iterable on its own thread, at most `workers` of them at a time, and yields their items as they
+    arrive. No more than `buffer_size` items wait to be consumed, the threads block until the consumer catches up.
+    An error raised by an iterable is raised by the merged one.
+    :type iterables: collections.Iterable[collections.Iterable]
+    :rtype: collections.Iterable
+    """
+    iterables = list(iterables)
+    results = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                results.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def consume(iterable):
+        try:
+            for item in iterable:
+                if not put((False, item)):
+                    return
+        except Exception as e:
+            put((True, e))
+        finally:
+            put((True, None))
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(consume, iterable) for iterable in iterables]
+    try:
+        remaining = len(iterables)
+        while remaining:
+            done, value = results.get()
+            if not done:
+                yield value
+            elif value is not None:
+                raise value
+            else:
+                remaining -= 1
+    finally:
+        stopped.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,121 @@
+"""
+Full view of many participants: consent, interpreted genomes and clinical reports, fetched concurrently.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from pycipapi.concurrency import map_concurrently
+from pycipapi.models import ParticipantClinicalReport
+
+
+class ParticipantDossier(object):
+    """
+    Sub-resources of a participant as models, whether they were fetched or embedded in the participant:
+    `consent` is a ParticipantConsent, None if the participant has none, `interpreted_genomes` a list of
+    ParticipantInterpretedGenome and `clinical_reports` a list of ParticipantClinicalReport.
+    """
+
+    def __init__(self, participant_id, participant=None):
+        """
+        :param participant: the participant as listed by the CIP-API, None when the dossier was requested by id
+        :type participant: pycipapi.models.Participant | pycipapi.compact_models.CompactParticipant
+        """
+        self.participant_id = participant_id
+        self.participant = participant
+        self.consent = None
+        self.interpreted_genomes = []
+        self.clinical_reports = []
+        # resources that could not be fetched and their exception, the others are still filled
+        self.errors = {}
+        # resources taken from the participant instead of being fetched
+        self.embedded = set()
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __repr__(self):
+        return "{}(participant_id={!r}, ok={})".format(type(self).__name__, self.participant_id, self.ok)
+
+
+def _embedded_clinical_reports(data):
+    if isinstance(data, dict):
+        data = [data]
+    return [ParticipantClinicalReport(**report) for report in data]
+
+
+class DossierLoader(object):
+    """
+    Loads the dossiers of a stream of participants, `workers` participants at a time and no more than
+    `fetch_workers` requests in flight overall, the sub-resources of a participant being fetched concurrently.
+
+    Sub-resources embedded in the `Participant` given, `participant_consent`, `participant_interpreted_genome` and
+    `participant_clinical_report`, are used as they are instead of being fetched. An empty list of interpreted
+    genomes or clinical reports cannot be told apart from a payload without them, so they are fetched.
+    """
+
+    def __init__(self, cip_api_client, workers=4, fetch_workers=8, **params):
+        """
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :param workers: maximum number of participants loaded concurrently
+        :param fetch_workers: maximum number of requests in flight, it should not exceed the `pool_maxsize` of the
+        client
+        :param params: parameters of every request
+        """
+        self.cip_api_client = cip_api_client
+        self.workers = workers
+        self.fetch_workers = fetch_workers
+        self.params = params
+
+    def _fetchers(self, dossier):
+        participant = dossier.participant
+        participant_id = dossier.participant_id
+        client = self.cip_api_client
+        fetchers = {}
+        if participant is not None and participant.participant_consent is not None:
+            dossier.consent = participant.participant_consent
+            dossier.embedded.add('consent')
+        else:
+            fetchers['consent'] = lambda: client.get_participant_consent(participant_id, **self.params)
+        if participant is not None and participant.participant_interpreted_genome:
+            dossier.interpreted_genomes = participant.participant_interpreted_genome
+            dossier.embedded.add('interpreted_genomes')
+        else:
+            fetchers['interpreted_genomes'] = lambda: list(
+                client.list_participant_interpreted_genomes(participant_id, **self.params))
+        if participant is not None and participant.participant_clinical_report:
+            dossier.clinical_reports = _embedded_clinical_reports(participant.participant_clinical_report)
+            dossier.embedded.add('clinical_reports')
+        else:
+            fetchers['clinical_reports'] = lambda: list(
+                client.list_participant_clinical_reports(participant_id, **self.params))
+        return fetchers
+
+    def _load(self, executor, participant):
+        if hasattr(participant, 'participant_id'):
+            dossier = ParticipantDossier(participant.participant_id, participant)
+        else:
+            dossier = ParticipantDossier(participant)
+        futures = {resource: executor.submit(fetch) for resource, fetch in self._fetchers(dossier).items()}
+        for resource, future in futures.items():
+            try:
+                setattr(dossier, resource, future.result())
+            except Exception as e:
+                dossier.errors[resource] = e
+        return dossier
+
+    def load(self, participants, ordered=True):
+        """
+        :param participants: participant ids or `Participant` objects, compact or not, such as those of
+        `list_participants`
+        :type participants: collections.Iterable
+        :param ordered: yields the dossiers in the order of the participants when True, as soon as they are
+        loaded otherwise
+        :rtype: collections.Iterable[ParticipantDossier]
+        """
+        executor = ThreadPoolExecutor(max_workers=self.fetch_workers)
+        try:
+            for item_result in map_concurrently(lambda participant: self._load(executor, participant), participants,
+                                                workers=self.workers, ordered=ordered):
+                yield item_result.get()
+        finally:
+            executor.shutdown(wait=False)
@@ -0,0 +1,69 @@
+"""
+Helpers of `RestClient.download`, which streams responses to disk.
+"""
+import hashlib
+import os
+
+try:
+    from os import replace as replace_file
+except ImportError:
+    # Python 2, os.rename replaces an existing file on POSIX
+    from os import rename as replace_file
+
+CHUNK_SIZE = 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+
+
+class ChecksumMismatch(ValueError):
+
+    def __init__(self, path, algorithm, expected, actual):
+        super(ChecksumMismatch, self).__init__("{} checksum of {} is {}, expected {}".format(
+            algorithm, path, actual, expected))
+        self.path = path
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+
+
+class DownloadedFile(object):
+    def __init__(self, path, size, checksum=None, resumed_from=0):
+        """
+        :param path: path of the downloaded file
+        :param size: size of the file in bytes
+        :param checksum: hexadecimal digest of the file, if an algorithm was given
+        :param resumed_from: number of bytes of a previous partial download that were kept
+        """
+        self.path = path
+        self.size = size
+        self.checksum = checksum
+        self.resumed_from = resumed_from
+
+    def __repr__(self):
+        return "{}(path={!r}, size={})".format(type(self).__name__, self.path, self.size)
+
+
+def new_hash(algorithm):
+    """
+    :param algorithm: any algorithm of hashlib, such as md5 or sha256, None for no checksum
+    """
+    return hashlib.new(algorithm) if algorithm else None
+
+
+def update_hash_from_file(file_hash, path, chunk_size=CHUNK_SIZE):
+    """
+    Feeds the content of a partial download into the checksum before the download is resumed
+    """
+    with open(path, 'rb') as partial_file:
+        while True:
+            chunk = partial_file.read(chunk_size)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+
+
+def partial_size(path):
+    """
+    :return: size of the partial download of `path`, 0 if there is none
+    """
+    partial_path = path + PARTIAL_SUFFIX
+    return os.path.getsize(partial_path) if os.path.isfile(partial_path) else 0
@@ -0,0 +1,378 @@
+"""
+Instrumentation of the requests made by `RestClient`. Listeners given to a client are notified of every request,
+retry, error, token renewal and response decoding; `MetricsRegistry` is a listener aggregating them per endpoint,
+exported as a dictionary or in the Prometheus text format.
+"""
+import bisect
+import collections
+import logging
+import re
+import threading
+import time
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    from urllib.parse import urlparse
+
+_ID_SEGMENT = re.compile(r'\d')
+
+
+def endpoint_template(url):
+    """
+    Path of a url with its identifiers replaced by `{id}`, such as `/api/2/interpretation-request/{id}/{id}/` so
+    that the metrics of all the cases are grouped together. A segment is an identifier when it contains a digit,
+    except for the version of the API following `api`.
+    """
+    segments = urlparse(url).path.split('/')
+    template = []
+    for i, segment in enumerate(segments):
+        if _ID_SEGMENT.search(segment) and not (i > 0 and segments[i - 1] == 'api'):
+            template.append('{id}')
+        else:
+            template.append(segment)
+    return '/'.join(template)
+
+
+class RequestEvent(object):
+    def __init__(self, method, url, bytes_out=None, attempt=1):
+        """
+        :param bytes_out: size of the request body, None if unknown such as for multipart bodies
+        :param attempt: 1 for the first time a request is sent, incremented by every retry of the client
+        """
+        self.method = method.upper()
+        self.url = url
+        self.endpoint = endpoint_template(url)
+        self.bytes_out = bytes_out
+        self.attempt = attempt
+        self.started_at = time.time()
+        self.elapsed = None
+        self.status_code = None
+        self.bytes_in = None
+        self.pool_retries = 0
+
+    def finish(self, response):
+        """
+        :type response: requests.Response
+        """
+        self.elapsed = time.time() - self.started_at
+        self.status_code = response.status_code
+        if not getattr(response, '_content_consumed', True):
+            # a streamed body has not been read yet, its announced size is used instead
+            length = response.headers.get('Content-Length')
+            self.bytes_in = int(length) if length is not None and length.isdigit() else None
+        else:
+            self.bytes_in = len(response.content or b'')
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        # retries made by the connection pool, after connection errors or error statuses, before the response
+        self.pool_retries = len(getattr(retries, 'history', None) or ())
+
+    def __repr__(self):
+        return "{}({} {}, status={})".format(type(self).__name__, self.method, self.endpoint, self.status_code)
+
+
+class RequestListener(object):
+    """
+    Base class of the listeners of a client, every method does nothing unless overridden. Listeners are called from
+    the threads making the requests and must be thread safe, their exceptions are logged and ignored.
+    """
+
+    def on_request_start(self, event):
+        """
+        :type event: RequestEvent
+        """
+
+    def on_request_end(self, event):
+        """
+        :param event: the event with the status code, elapsed time and size of the response
+        :type event: RequestEvent
+        """
+
+    def on_retry(self, event, reason):
+        """
+        :param event: the attempt being retried
+        :param reason: `throttled` for a 429 or 503, `token` for a 401 or 403 after which the token was renewed, or
+        `pool` for the retries made by the connection pool
+        """
+
+    def on_error(self, event, error):
+        """
+        :param error: the exception raised for the request, an HTTPError for error responses
+        """
+
+    def on_token_renewal(self, seconds, error=None):
+        """
+        :param seconds: time spent fetching the new token
+        :param error: the exception raised if the renewal failed
+        """
+
+    def on_decode(self, method, url, seconds, size):
+        """
+        :param seconds: time spent decoding the JSON body of a response
+        :param size: size of the body in bytes
+        """
+
+
+class Listeners(object):
+    """
+    The listeners of a client, notifying each of them in turn
+    """
+
+    def __init__(self, listeners=None):
+        self.listeners = list(listeners or [])
+
+    def add(self, listener):
+        self.listeners.append(listener)
+
+    def remove(self, listener):
+        self.listeners.remove(listener)
+
+    def __bool__(self):
+        return bool(self.listeners)
+
+    __nonzero__ = __bool__
+
+    def notify(self, name, *args):
+        for listener in self.listeners:
+            try:
+                getattr(listener, name)(*args)
+            except Exception as e:
+                logging.warning("Request listener {!r} failed in {}: {}".format(listener, name, e))
+
+    @staticmethod
+    def new_event(method, url, **kwargs):
+        """
+        :param kwargs: arguments of `RequestEvent`
+        :return: the event of a request, None if it could not be built, which is logged and ignored like the
+        failures of the listeners
+        :rtype: RequestEvent
+        """
+        try:
+            return RequestEvent(method, url, **kwargs)
+        except Exception as e:
+            logging.warning("Request event of {} {} could not be built: {}".format(method, url, e))
+            return None
+
+    def notify_request(self, name, method, url, *args):
+        """
+        Notifies the listeners of a new event of the request
+        """
+        event = self.new_event(method, url)
+        if event is not None:
+            self.notify(name, event, *args)
+
+    def notify_end(self, event, response):
+        """
+        Completes the event with the response and notifies the listeners of the end of the request
+        :type event: RequestEvent
+        :type response: requests.Response
+        """
+        try:
+            event.finish(response)
+        except Exception as e:
+            logging.warning("Request event {!r} could not be completed: {}".format(event, e))
+            return
+        self.notify('on_request_end', event)
+
+
+class Histogram(object):
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        """
+        :return: (upper bound, number of observations less than or equal to it) pairs, the last bound is infinite
+        """
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def quantile(self, q):
+        """
+        :return: upper bound of the bucket holding the `q` quantile, an estimate from the buckets
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative_counts():
+            if total >= rank:
+                return bound
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum,
+                'buckets': [(bound, total) for bound, total in self.cumulative_counts()]}
+
+
+class EndpointMetrics(object):
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.decode = Histogram(buckets)
+        self.statuses = collections.Counter()
+        self.retries = collections.Counter()
+        self.errors = collections.Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def to_dict(self):
+        return {'latency': self.latency.to_dict(), 'decode': self.decode.to_dict(),
+                'statuses': dict(self.statuses), 'retries': dict(self.retries), 'errors': dict(self.errors),
+                'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                'latency_p50': self.latency.quantile(0.5), 'latency_p99': self.latency.quantile(0.99)}
+
+
+class MetricsRegistry(RequestListener):
+    """
+    Aggregates the requests of the clients it listens to by method and endpoint template: latency histograms,
+    status codes, retries, errors, bytes sent and received and JSON decoding time, plus the token renewals.
+    """
+
+    def __init__(self, buckets=Histogram.DEFAULT_BUCKETS, prefix='pycipapi'):
+        """
+        :param buckets: upper bounds in seconds of the histogram buckets
+        :param prefix: prefix of the names of the Prometheus metrics
+        """
+        self.buckets = buckets
+        self.prefix = prefix
+        self._endpoints = {}
+        self._token_renewals = Histogram(buckets)
+        self._token_renewal_errors = 0
+        self._lock = threading.Lock()
+
+    def _metrics(self, method, endpoint):
+        key = (method, endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics(self.buckets)
+        return metrics
+
+    def on_request_end(self, event):
+        with self._lock:
+            metrics = self._metrics(event.method, event.endpoint)
+            metrics.latency.observe(event.elapsed)
+            metrics.statuses[event.status_code] += 1
+            metrics.bytes_in += event.bytes_in or 0
+            metrics.bytes_out += event.bytes_out or 0
+            if event.pool_retries:
+                metrics.retries['pool'] += event.pool_retries
+
+    def on_retry(self, event, reason):
+        with self._lock:
+            self._metrics(event.method, event.endpoint).retries[reason] += 1
+
+    def on_error(self, event, error):
+        with self._lock:
+            metrics = self._metrics(event.method, event.endpoint)
+            metrics.errors[type(error).__name__] += 1
+            if event.elapsed is None:
+                # no response was received, the request is not counted by on_request_end
+                metrics.bytes_out += event.bytes_out or 0
+
+    def on_token_renewal(self, seconds, error=None):
+        with self._lock:
+            self._token_renewals.observe(seconds)
+            if error is not None:
+                self._token_renewal_errors += 1
+
+    def on_decode(self, method, url, seconds, size):
+        with self._lock:
+            self._metrics(method.upper(), endpoint_template(url)).decode.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self._token_renewals = Histogram(self.buckets)
+            self._token_renewal_errors = 0
+
+    def snapshot(self):
+        """
+        :return: the metrics of every endpoint under `endpoints`, keyed by "METHOD endpoint", and of the token
+        renewals under `token_renewals`
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'endpoints': {"{} {}".format(method, endpoint): metrics.to_dict()
+                              for (method, endpoint), metrics in sorted(self._endpoints.items())},
+                'token_renewals': dict(self._token_renewals.to_dict(), errors=self._token_renewal_errors),
+            }
+
+    @staticmethod
+    def _labels(**labels):
+        if not labels:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                              for key, value in sorted(labels.items())) + '}'
+
+    def _histogram_lines(self, name, histogram, **labels):
+        lines = []
+        for bound, total in histogram.cumulative_counts():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append('{}_bucket{} {}'.format(name, self._labels(le=le, **labels), total))
+        lines.append('{}_sum{} {}'.format(name, self._labels(**labels), repr(histogram.sum)))
+        lines.append('{}_count{} {}'.format(name, self._labels(**labels), histogram.count))
+        return lines
+
+    def to_prometheus(self):
+        """
+        :return: the metrics in the Prometheus text exposition format
+        :rtype: str
+        """
+        p = self.prefix
+        sections = collections.OrderedDict([
+            ('{}_request_duration_seconds'.format(p), ('histogram', 'Duration of the requests')),
+            ('{}_decode_duration_seconds'.format(p), ('histogram', 'Duration of the decoding of JSON responses')),
+            ('{}_responses_total'.format(p), ('counter', 'Responses by status code')),
+            ('{}_retries_total'.format(p), ('counter', 'Retries by reason')),
+            ('{}_errors_total'.format(p), ('counter', 'Failed requests by exception')),
+            ('{}_sent_bytes_total'.format(p), ('counter', 'Bytes of the request bodies')),
+            ('{}_received_bytes_total'.format(p), ('counter', 'Bytes of the response bodies')),
+            ('{}_token_renewal_duration_seconds'.format(p), ('histogram', 'Duration of the token renewals')),
+            ('{}_token_renewal_errors_total'.format(p), ('counter', 'Failed token renewals')),
+        ])
+        samples = collections.defaultdict(list)
+        with self._lock:
+            for (method, endpoint), metrics in sorted(self._endpoints.items()):
+                labels = {'method': method, 'endpoint': endpoint}
+                samples['{}_request_duration_seconds'.format(p)].extend(
+                    self._histogram_lines('{}_request_duration_seconds'.format(p), metrics.latency, **labels))
+                if metrics.decode.count:
+                    samples['{}_decode_duration_seconds'.format(p)].extend(
+                        self._histogram_lines('{}_decode_duration_seconds'.format(p), metrics.decode, **labels))
+                for status, count in sorted(metrics.statuses.items()):
+                    samples['{}_responses_total'.format(p)].append('{}_responses_total{} {}'.format(
+                        p, self._labels(status=status, **labels), count))
+                for reason, count in sorted(metrics.retries.items()):
+                    samples['{}_retries_total'.format(p)].append('{}_retries_total{} {}'.format(
+                        p, self._labels(reason=reason, **labels), count))
+                for error, count in sorted(metrics.errors.items()):
+                    samples['{}_errors_total'.format(p)].append('{}_errors_total{} {}'.format(
+                        p, self._labels(error=error, **labels), count))
+                samples['{}_sent_bytes_total'.format(p)].append('{}_sent_bytes_total{} {}'.format(
+                    p, self._labels(**labels), metrics.bytes_out))
+                samples['{}_received_bytes_total'.format(p)].append('{}_received_bytes_total{} {}'.format(
+                    p, self._labels(**labels), metrics.bytes_in))
+            samples['{}_token_renewal_duration_seconds'.format(p)].extend(
+                self._histogram_lines('{}_token_renewal_duration_seconds'.format(p), self._token_renewals))
+            samples['{}_token_renewal_errors_total'.format(p)].append('{}_token_renewal_errors_total {}'.format(
+                p, self._token_renewal_errors))
+        lines = []
+        for name, (metric_type, description) in sections.items():
+            if not samples[name]:
+                continue
+            lines.append('# HELP {} {}'.format(name, description))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            lines.extend(samples[name])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,103 @@
+"""
+JSON codecs used by the clients to encode request bodies and decode responses. `orjson` and `ujson` are several
+times faster than the standard library on large documents such as interpreted genomes or clinical reports, they
+are used when installed and selected with the `json_codec` parameter of the clients.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec(object):
+    """
+    Encodes to and decodes from UTF-8 bytes
+    """
+    name = None
+
+    def dumps(self, obj):
+        """
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+    def loads(self, content):
+        """
+        :type content: bytes
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "{}()".format(type(self).__name__)
+
+
+class StdlibJsonCodec(JsonCodec):
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, content):
+        return json.loads(content.decode('utf-8') if isinstance(content, bytes) else content)
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed, install it with `pip install orjson`")
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("ujson is not installed, install it with `pip install ujson`")
+
+    def dumps(self, obj):
+        encoded = ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        # already UTF-8 bytes on Python 2
+        return encoded if isinstance(encoded, bytes) else encoded.encode('utf-8')
+
+    def loads(self, content):
+        return ujson.loads(content)
+
+
+CODECS = {codec.name: codec for codec in (StdlibJsonCodec, OrjsonCodec, UjsonCodec)}
+FASTEST_FIRST = ('orjson', 'ujson', 'json')
+
+
+def get_json_codec(codec=None):
+    """
+    :param codec: a JsonCodec, the name of one of `CODECS`, `auto` for the fastest one installed or None for the
+    standard library
+    :rtype: JsonCodec
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is None:
+        return StdlibJsonCodec()
+    if codec == 'auto':
+        for name in FASTEST_FIRST:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+    if codec not in CODECS:
+        raise ValueError("JSON codec must be one of {}, auto or a JsonCodec".format(", ".join(sorted(CODECS))))
+    return CODECS[codec]()
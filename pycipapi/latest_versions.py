@@ -0,0 +1,149 @@
+import logging
+import threading
+
+from pycipapi.concurrency import map_concurrently
+from pycipapi.models import CipApiOverview
+
+
+def case_version_key(overview):
+    """
+    :param overview: a case of the interpretation request list, whose `interpretation_request_id` is
+    "<id>-<version>"
+    :return: the id and the version of the case as integers, so that version 10 comes after version 9
+    :rtype: (int, int)
+    """
+    case_id, case_version = overview['interpretation_request_id'].split('-')
+    return int(case_id), int(case_version)
+
+
+class LatestVersionIndex(object):
+    """
+    Latest case of every group, the one with the highest interpretation request id and version, for many groups at
+    once. It is built either by a single scan of the interpretation request list, or by concurrent lookups of the
+    groups needed when they are few compared to the whole list. Only the latest case of each group is kept, every
+    case seen is compared with it.
+
+    Like `pycipapi.mirror.CaseMirror`, the scans after the first one only pull the cases modified since the latest
+    `last_modified` seen, the watermark. Cases deleted from the CIP-API are not removed from the index.
+    """
+
+    def __init__(self, group_ids=None, since_param='last_modified__gte'):
+        """
+        :param group_ids: groups to index, every group found if not provided
+        :param since_param: filter of the interpretation request list selecting cases modified from a given time
+        """
+        self.group_ids = set(group_ids) if group_ids is not None else None
+        self.since_param = since_param
+        self.watermark = None
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def add(self, overview, group_id=None):
+        """
+        Indexes a case of the interpretation request list
+        :type overview: dict
+        :param group_id: group of the case, its `group_id` if not provided
+        :return: True if it is the latest case of its group
+        """
+        if group_id is None:
+            group_id = overview.get('group_id')
+        if group_id is None or (self.group_ids is not None and group_id not in self.group_ids):
+            return False
+        key = case_version_key(overview)
+        with self._lock:
+            latest = self._latest.get(group_id)
+            if latest is not None and latest[0] > key:
+                return False
+            self._latest[group_id] = (key, overview)
+            return True
+
+    def refresh(self, cip_api_client, shards=None, workers=4, **params):
+        """
+        Scans the interpretation request list, only the cases modified since the previous scan after the first one.
+        The group of each case is read from its `group_id`, which the listing must include: the cases without one are
+        not indexed and a warning gives their number, `refresh_groups` does not need it.
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :param shards: partitions of the list scanned concurrently, see `CipApiClient.get_cases_sharded_raw`
+        :param workers: maximum number of partitions scanned concurrently
+        :param params: filters of the interpretation request list, an index should always be refreshed with the same
+        :return: number of cases indexed, those scanned with a `group_id`
+        :rtype: int
+        :raises ValueError: if cases were scanned and none of them has a `group_id`, the watermark is then left as
+        it was
+        """
+        watermark = self.watermark
+        if watermark is not None and self.since_param:
+            params[self.since_param] = watermark
+        if shards is not None:
+            overviews = cip_api_client.get_cases_sharded_raw(shards, workers=workers, **params)
+        else:
+            overviews = cip_api_client.get_cases_raw(**params)
+        new_watermark = watermark
+        seen = 0
+        indexed = 0
+        for overview in overviews:
+            last_modified = overview.get('last_modified')
+            if last_modified is not None and (new_watermark is None or last_modified > new_watermark):
+                new_watermark = last_modified
+            if overview.get('group_id') is not None:
+                self.add(overview)
+                indexed += 1
+            seen += 1
+        if seen and not indexed:
+            raise ValueError("None of the {} cases scanned has a group_id, index the groups with refresh_groups "
+                             "instead".format(seen))
+        if indexed < seen:
+            logging.warning("{} of {} cases scanned have no group_id and were not indexed".format(
+                seen - indexed, seen))
+        # only moved forward once the whole scan succeeded, an interrupted one is picked up by the next
+        self.watermark = new_watermark
+        logging.info("{} cases indexed, latest version of {} groups".format(indexed, len(self._latest)))
+        return indexed
+
+    def refresh_groups(self, cip_api_client, group_ids, workers=8, **params):
+        """
+        Lists the cases of each group concurrently, one listing per group
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :type group_ids: collections.Iterable[str]
+        :param workers: maximum number of groups listed concurrently
+        :return: the groups that could not be listed and their error
+        :rtype: dict
+        """
+        def index_group(group_id):
+            for overview in cip_api_client.get_cases_raw(group_id=group_id, **params):
+                self.add(overview, group_id=group_id)
+
+        failed = {}
+        for item_result in map_concurrently(index_group, group_ids, workers=workers, ordered=False):
+            if not item_result.ok:
+                failed[item_result.item] = item_result.error
+        return failed
+
+    def latest_raw(self, group_id):
+        """
+        :return: the latest case of the group as returned by the interpretation request list, None if the group has
+        no case
+        :rtype: dict
+        """
+        with self._lock:
+            latest = self._latest.get(group_id)
+        return latest[1] if latest is not None else None
+
+    def last_version(self, group_id):
+        """
+        Same as `CasesByGroup.last_version` without listing the cases of the group
+        :rtype: CipApiOverview
+        """
+        overview = self.latest_raw(group_id)
+        return CipApiOverview(**overview) if overview is not None else None
+
+    def is_group_registered(self, group_id):
+        return group_id in self
+
+    def __contains__(self, group_id):
+        with self._lock:
+            return group_id in self._latest
+
+    def __len__(self):
+        with self._lock:
+            return len(self._latest)
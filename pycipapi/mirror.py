@@ -0,0 +1,220 @@
+import json
+import logging
+import sqlite3
+import threading
+
+from pycipapi.concurrency import map_concurrently
+from pycipapi.models import CipApiOverview, CipApiCase
+
+
+class CaseMirror(object):
+    """
+    Local SQLite copy of the interpretation request list and, optionally, of the case details. Every sync only pulls
+    the cases modified since the latest `last_modified` seen by the previous sync, the watermark, so that most reads
+    can be served locally.
+
+    `last_modified` values are compared as strings, which orders correctly the ISO 8601 timestamps returned by the
+    CIP-API.
+    """
+    INDEXED_FIELDS = ('last_status', 'cip', 'sample_type', 'group_id', 'family_id')
+    BATCH_SIZE = 500
+
+    def __init__(self, path, since_param='last_modified__gte'):
+        """
+        :param path: path to the SQLite database, created if it does not exist
+        :param since_param: filter of the interpretation request list selecting cases modified from a given time
+        """
+        self.path = path
+        self.since_param = since_param
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # cases whose details could not be fetched by the last sync and their error
+        self.failed_details = {}
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _create_tables(self):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cases ("
+                "interpretation_request_id INTEGER NOT NULL, "
+                "version INTEGER NOT NULL, "
+                "last_status TEXT, cip TEXT, sample_type TEXT, group_id TEXT, family_id TEXT, last_modified TEXT, "
+                "overview TEXT NOT NULL, details TEXT, "
+                "PRIMARY KEY (interpretation_request_id, version))"
+            )
+            for field in self.INDEXED_FIELDS + ('last_modified',):
+                self.connection.execute("CREATE INDEX IF NOT EXISTS cases_{field} ON cases ({field})".format(
+                    field=field))
+            self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+
+    @property
+    def watermark(self):
+        """
+        :return: the latest `last_modified` of the cases in the mirror
+        :rtype: str
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM metadata WHERE key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, watermark):
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES ('watermark', ?)",
+                                    (watermark,))
+
+    @staticmethod
+    def _ids(overview):
+        case_id, case_version = overview['interpretation_request_id'].split('-')
+        return int(case_id), int(case_version)
+
+    def _upsert_overviews(self, overviews):
+        rows = []
+        for overview in overviews:
+            case_id, case_version = self._ids(overview)
+            rows.append((case_id, case_version, overview.get('last_status'), overview.get('cip'),
+                         overview.get('sample_type'), overview.get('group_id'), overview.get('family_id'),
+                         overview.get('last_modified'), json.dumps(overview)))
+        with self._lock, self.connection:
+            # the details of a case modified since they were fetched are dropped until they are fetched again
+            self.connection.executemany(
+                "INSERT INTO cases (interpretation_request_id, version, last_status, cip, sample_type, group_id, "
+                "family_id, last_modified, overview) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (interpretation_request_id, version) DO UPDATE SET "
+                "last_status = excluded.last_status, cip = excluded.cip, sample_type = excluded.sample_type, "
+                "group_id = COALESCE(excluded.group_id, group_id), "
+                "family_id = COALESCE(excluded.family_id, family_id), "
+                "details = CASE WHEN excluded.last_modified IS last_modified THEN details END, "
+                "last_modified = excluded.last_modified, overview = excluded.overview", rows
+            )
+
+    def _upsert_details(self, cases):
+        rows = [(json.dumps(case), case.get('group_id'), case.get('family_id'), case_id, case_version)
+                for (case_id, case_version), case in cases]
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "UPDATE cases SET details = ?, group_id = COALESCE(?, group_id), family_id = COALESCE(?, family_id) "
+                "WHERE interpretation_request_id = ? AND version = ?", rows
+            )
+
+    def sync(self, cip_api_client, details=False, workers=8, **params):
+        """
+        Pulls the cases modified since the last sync into the mirror, the watermark is only moved forward once every
+        case has been stored so an interrupted sync is picked up by the next one
+        :type cip_api_client: pycipapi.cipapi_client.CipApiClient
+        :param details: also stores the details of the modified cases. A case whose details cannot be fetched is
+        logged and left without details, the sync goes on and the cases are in `failed_details`
+        :param workers: maximum number of case details fetched concurrently
+        :param params: filters of the interpretation request list, a mirror should always be synced with the same
+        :return: number of cases added or updated
+        :rtype: int
+        """
+        watermark = self.watermark
+        if watermark is not None and self.since_param:
+            params[self.since_param] = watermark
+        new_watermark = watermark
+        batch = []
+        synced = []
+        for overview in cip_api_client.get_cases_raw(**params):
+            last_modified = overview.get('last_modified')
+            # cases modified at the watermark itself are pulled again, the upsert makes it harmless
+            if watermark is not None and last_modified is not None and last_modified < watermark:
+                continue
+            if last_modified is not None and (new_watermark is None or last_modified > new_watermark):
+                new_watermark = last_modified
+            batch.append(overview)
+            synced.append(self._ids(overview))
+            if len(batch) >= self.BATCH_SIZE:
+                self._upsert_overviews(batch)
+                batch = []
+        self._upsert_overviews(batch)
+
+        self.failed_details = self._sync_details(cip_api_client, synced, workers) if details else {}
+        if new_watermark is not None:
+            self._set_watermark(new_watermark)
+        logging.info("{} cases synced into {}".format(len(synced), self.path))
+        return len(synced)
+
+    def _sync_details(self, cip_api_client, case_ids, workers):
+        """
+        :return: the (id, version) of the cases whose details could not be fetched and their error
+        :rtype: dict
+        """
+        batch = []
+        failed = {}
+        results = map_concurrently(lambda ids: cip_api_client.get_case_raw(*ids), case_ids, workers=workers)
+        for result in results:
+            if not result.ok:
+                logging.warning("Details of case {}-{} not mirrored: {}".format(result.item[0], result.item[1],
+                                                                                result.error))
+                failed[result.item] = result.error
+                continue
+            batch.append((result.item, result.result))
+            if len(batch) >= self.BATCH_SIZE:
+                self._upsert_details(batch)
+                batch = []
+        self._upsert_details(batch)
+        return failed
+
+    def _select(self, column, filters, extra_condition=None):
+        unknown = set(filters) - set(self.INDEXED_FIELDS)
+        if unknown:
+            raise ValueError("Cases can only be filtered by {}".format(", ".join(self.INDEXED_FIELDS)))
+        conditions = ["{} = ?".format(field) for field in sorted(filters)]
+        if extra_condition:
+            conditions.append(extra_condition)
+        query = "SELECT {} FROM cases".format(column)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY interpretation_request_id, version"
+        with self._lock:
+            rows = self.connection.execute(query, [filters[field] for field in sorted(filters)]).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def list_cases_raw(self, **filters):
+        """
+        :param filters: values of any of `INDEXED_FIELDS`
+        :rtype: collections.Iterable[dict]
+        """
+        return self._select('overview', filters)
+
+    def list_cases(self, **filters):
+        """
+        :param filters: values of any of `INDEXED_FIELDS`
+        :rtype: collections.Iterable[CipApiOverview]
+        """
+        for overview in self.list_cases_raw(**filters):
+            yield CipApiOverview(**overview)
+
+    def list_case_details(self, **filters):
+        """
+        Cases whose details are in the mirror
+        :param filters: values of any of `INDEXED_FIELDS`
+        :rtype: collections.Iterable[CipApiCase]
+        """
+        for case in self._select('details', filters, extra_condition='details IS NOT NULL'):
+            yield CipApiCase(**case)
+
+    def get_case(self, case_id, case_version):
+        """
+        :return: the case if its details are in the mirror and the case was not modified since they were fetched,
+        None otherwise
+        :rtype: CipApiCase
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT details FROM cases WHERE interpretation_request_id = ? AND version = ?",
+                (int(case_id), int(case_version))
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return CipApiCase(**json.loads(row[0]))
@@ -9,6 +9,58 @@ class PreviousData(Exception):
     pass
 
 
+class LazyField(object):
+    """
+    Attribute built from the raw data of its object, `_raw_data`, the first time it is read. It can be assigned and
+    modified like any other attribute, `clear_lazy_fields` drops the built value so that it is built again.
+    """
+    def __init__(self, builder):
+        self.builder = builder
+        self.name = builder.__name__
+        self.__doc__ = builder.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            value = instance.__dict__[self.name] = self.builder(instance, instance._raw_data)
+            return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+def memoised_parse(instance, name, source, parse):
+    """
+    Parses `source` once per object, the parsed value is reused for as long as the object holds the same source
+    :param name: identifies the parsed value within the object
+    """
+    cache = getattr(instance, '_parsed', None)
+    if cache is None:
+        cache = instance._parsed = {}
+    cached = cache.get(name)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+    value = parse(source)
+    cache[name] = (source, value)
+    return value
+
+
+_lazy_fields_by_class = {}
+
+
+def clear_lazy_fields(instance):
+    klass = type(instance)
+    names = _lazy_fields_by_class.get(klass)
+    if names is None:
+        names = _lazy_fields_by_class[klass] = [name for name in dir(klass)
+                                                if isinstance(getattr(klass, name, None), LazyField)]
+    for name in names:
+        instance.__dict__.pop(name, None)
+
+
 class WorkspacePermissions(object):
     def __init__(self, **kwargs):
         self.short_name = kwargs.get('short_name')
@@ -42,7 +94,8 @@ class InterpretedGenome(object):
     @property
     def interpretation_request_payload(self):
         if self.interpreted_genome_data:
-            return InterpretedGenomeGelModel.fromJsonDict(self.interpreted_genome_data)
+            return memoised_parse(self, 'interpreted_genome', self.interpreted_genome_data,
+                                  InterpretedGenomeGelModel.fromJsonDict)
 
 
 class ReferralTest(object):
@@ -64,6 +117,9 @@ class ReferralTest(object):
         self.interpreter_organisation_national_grouping_name = kwargs.get("interpreter_organisation_national_grouping_name")
         self.interpretation_request_id = kwargs.get("interpretation_request_id")
         self.interpretation_request_version = kwargs.get("interpretation_request_version")
+        # set by `CipApiClient.resolve_referral_cases`
+        self.interpretation_request_case = None
+        self.interpretation_request_error = None
 
     def get_interpretation_request_ids(self):
         return self.interpretation_request_id, self.interpretation_request_version
@@ -99,12 +155,14 @@ class Referral(object):
 
         :rtype: ReferralGelModel
         """
-        if not ReferralGelModel.validate(self._referral_payload_json):
+        return memoised_parse(self, 'referral', self._referral_payload_json, self._parse_referral_data)
+
+    @staticmethod
+    def _parse_referral_data(referral_payload_json):
+        if not ReferralGelModel.validate(referral_payload_json):
             logging.warning('The referral payload is not valid according to the version of GelModels you are using, '
                             'it may raise errors during the serialisation')
-        referral_payload = ReferralGelModel.fromJsonDict(self._referral_payload_json)
-
-        return referral_payload
+        return ReferralGelModel.fromJsonDict(referral_payload_json)
 
     def process_referral_tests(self, referral_test_data):
         for referral_test in referral_test_data:
@@ -266,22 +324,48 @@ class CipApiCase(object):
         self.case_id = kwargs.get('case_id')
         self.number_of_samples = kwargs.get('number_of_samples')
         self.proband = kwargs.get('proband')
-        self.referral = Referral(**kwargs.get('referral')) if kwargs.get('referral') else None
-        self.interpretation_flags = [InterpretationFlag(**flag) for flag in kwargs.get(
-            'interpretation_flag')] if kwargs.get('interpretation_flag') else []
-        self.status = [RequestStatus(**s) for s in kwargs.get('status', [])]
         self.files = kwargs.get('files')
         self.interpretation_request_data = kwargs.get('interpretation_request_data')
-        self.interpreted_genome = [InterpretedGenome(**ig) for ig in kwargs.get('interpreted_genome', [])]
-        self.clinical_report = [ClinicalReport(**cr) for cr in kwargs.get('clinical_report', [])]
         self.workspaces = kwargs.get('workspaces')
+        # the sub-objects are only built when they are read
+        self._raw_data = kwargs
+        self._parsed = {}
+        clear_lazy_fields(self)
+
+    @LazyField
+    def referral(self, data):
+        return Referral(**data.get('referral')) if data.get('referral') else None
+
+    @LazyField
+    def interpretation_flags(self, data):
+        return [InterpretationFlag(**flag) for flag in data.get(
+            'interpretation_flag')] if data.get('interpretation_flag') else []
+
+    @LazyField
+    def status(self, data):
+        return [RequestStatus(**s) for s in data.get('status', [])]
+
+    @LazyField
+    def interpreted_genome(self, data):
+        return [InterpretedGenome(**ig) for ig in data.get('interpreted_genome', [])]
+
+    @LazyField
+    def clinical_report(self, data):
+        return [ClinicalReport(**cr) for cr in data.get('clinical_report', [])]
 
     @property
     def interpretation_request_payload(self):
+        """
+        Parsed once and reused until `interpretation_request_data` or `sample_type` change
+
+        :rtype: InterpretationRequestRD | CancerInterpretationRequest
+        """
         if self.interpretation_request_data and self.sample_type == 'raredisease':
-            return InterpretationRequestRD.fromJsonDict(self.interpretation_request_data['json_request'])
+            return memoised_parse(self, 'interpretation_request_rd', self.interpretation_request_data,
+                                  lambda data: InterpretationRequestRD.fromJsonDict(data['json_request']))
         if self.interpretation_request_data and self.sample_type == 'cancer':
-            return CancerInterpretationRequest.fromJsonDict(self.interpretation_request_data['json_request'])
+            return memoised_parse(self, 'interpretation_request_cancer', self.interpretation_request_data,
+                                  lambda data: CancerInterpretationRequest.fromJsonDict(data['json_request']))
 
     @property
     def pedigree(self):
@@ -294,32 +378,65 @@ class CipApiCase(object):
         if self.interpretation_request_data and self.sample_type == 'cancer':
             return self.interpretation_request_payload.cancerParticipant
 
+    @property
+    def _member_index(self):
+        if self.sample_type == 'raredisease':
+            return memoised_parse(self, 'member_index_rd', self.interpretation_request_payload,
+                                  self._index_pedigree)
+        return memoised_parse(self, 'member_index_cancer', self.interpretation_request_payload,
+                              self._index_cancer_participant)
+
+    @staticmethod
+    def _index_pedigree(interpretation_request):
+        members = interpretation_request.pedigree.members
+        samples = [sample.sampleId for member in members for sample in member.samples if member.samples]
+        return {
+            'members': [participant.participantId for participant in members
+                        if participant.samples and participant.participantId],
+            'all_members': [participant.participantId for participant in members if participant.participantId],
+            'samples': samples,
+            'sample_set': frozenset(samples),
+        }
+
+    @staticmethod
+    def _index_cancer_participant(interpretation_request):
+        samples = []
+        for m in interpretation_request.cancerParticipant.matchedSamples:
+            samples.append(m.germlineSampleId)
+            samples.append(m.tumourSampleId)
+        return {
+            'samples': samples,
+            'sample_set': frozenset(samples),
+        }
+
     @property
     def members(self):
         if self.interpretation_request_data and self.sample_type == 'raredisease':
-            return [participant.participantId for participant in self.pedigree.members if participant.samples and participant.participantId]
+            return list(self._member_index['members'])
         elif self.interpretation_request_data and self.sample_type == 'cancer':
             return self.proband
 
     @property
     def all_members(self):
         if self.interpretation_request_data and self.sample_type == 'raredisease':
-            return [participant.participantId for participant in self.pedigree.members if participant.participantId]
+            return list(self._member_index['all_members'])
         elif self.interpretation_request_data and self.sample_type == 'cancer':
             return self.proband
 
     @property
     def samples(self):
-        if self.interpretation_request_data and self.sample_type == 'raredisease':
-            return [sample.sampleId for member in self.pedigree.members for sample in member.samples if member.samples]
-        elif self.interpretation_request_data and self.sample_type == 'cancer':
-            samples = []
-            for m in self.interpretation_request_data.cancerParticipant.matchedSamples:
-                samples.append(m.germlineSampleId)
-                samples.append(m.tumourSampleId)
-            return samples
+        if self.interpretation_request_data and self.sample_type in ('raredisease', 'cancer'):
+            return list(self._member_index['samples'])
         return None
 
+    def has_sample(self, sample_id):
+        """
+        :rtype: bool
+        """
+        if self.interpretation_request_data and self.sample_type in ('raredisease', 'cancer'):
+            return sample_id in self._member_index['sample_set']
+        return False
+
     @property
     def is_blocked(self):
         """
@@ -536,9 +653,18 @@ class CipApiOverview(object):
         self.cva_variants_status = kwargs.get('cva_variants_status')
         self.cva_variants_transaction_id = kwargs.get('cva_variants_transaction_id')
         self.case_id = kwargs.get('case_id')
-        self.status = [RequestStatus(**s) for s in kwargs.get('status', [])]
-        self.referral = Referral(**kwargs.get('referral')) if kwargs.get('referral') else None
         self.interpretation_flags = kwargs.get('interpretation_flags')
+        # the sub-objects are only built when they are read
+        self._raw_data = kwargs
+        clear_lazy_fields(self)
+
+    @LazyField
+    def status(self, data):
+        return [RequestStatus(**s) for s in data.get('status', [])]
+
+    @LazyField
+    def referral(self, data):
+        return Referral(**data.get('referral')) if data.get('referral') else None
 
     def get_case(self, cip_api_client, **params):
         """
@@ -571,6 +697,9 @@ class CipApiOverview(object):
 
 
 class CasesByGroup(object):
+    """
+    Lists the cases of a single group, see `pycipapi.latest_versions.LatestVersionIndex` for many groups
+    """
     def __init__(self, cip_api_client, group_id, **params):
         """
 
@@ -591,4 +720,4 @@ class CasesByGroup(object):
         if not self.is_group_registered:
             return None
         else:
-            return sorted(self.cases)[-1]
+            return max(self.cases, key=lambda case: (case.interpretation_request_id, int(case.version)))
@@ -1,6 +1,13 @@
 import abc
+import base64
 import datetime
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
+
 import requests
 
 try:
@@ -13,7 +20,23 @@ except:
     from urllib3.util.retry import Retry
 
 from requests.compat import urljoin
-from requests.exceptions import HTTPError
+from requests.exceptions import ConnectionError, HTTPError
+
+from pycipapi.cache import CacheEntry
+from pycipapi.compression import get_request_compression
+from pycipapi.downloads import (
+    CHUNK_SIZE,
+    PARTIAL_SUFFIX,
+    ChecksumMismatch,
+    DownloadedFile,
+    new_hash,
+    partial_size,
+    replace_file,
+    update_hash_from_file,
+)
+from pycipapi.instrumentation import Listeners
+from pycipapi.json_codecs import get_json_codec
+from pycipapi.streaming import iter_items
 
 
 class NotFound(HTTPError):
@@ -26,7 +49,16 @@ class BlockedCase(HTTPError):
     pass
 
 
-def requests_retry_session(retries=5, backoff_factor=0.8, status_forcelist=(500, 502, 504, 503), session=None):
+def requests_retry_session(retries=5, backoff_factor=0.8, status_forcelist=(500, 502, 504, 503), session=None,
+                           pool_connections=10, pool_maxsize=10, pool_block=False, respect_retry_after_header=True):
+    """
+    :param pool_connections: number of hosts for which a connection pool is kept
+    :param pool_maxsize: maximum number of connections kept open per host, it should be at least the number of
+    threads sharing the session or requests will open and discard extra connections
+    :param pool_block: when True requests wait for a free connection instead of opening one beyond `pool_maxsize`
+    :param respect_retry_after_header: also retries the 413, 429 and 503 responses with a Retry-After header, after
+    waiting for it
+    """
     session = session or requests.Session()
     retry = Retry(
         total=retries,
@@ -34,20 +66,38 @@ def requests_retry_session(retries=5, backoff_factor=0.8, status_forcelist=(500,
         connect=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
+        respect_retry_after_header=respect_retry_after_header,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
 
+def token_expiry(token):
+    """
+    Reads the expiry time of a JWT from its `exp` claim, the signature is not verified
+    :param token: the token, optionally prefixed by its scheme as in "JWT <token>"
+    :return: the expiry as seconds since the epoch, None if it cannot be read
+    """
+    try:
+        payload = token.split()[-1].split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload.encode('ascii')).decode('utf-8'))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 def func_wrapper_multi(func, klass, *args, **kwargs):
     for item in func(*args, **kwargs):
         yield klass(**item)
 
 
 def func_wrapper_single(func, klass, *args, **kwargs):
-    return klass(**func(*args, **kwargs))
+    item = func(*args, **kwargs)
+    # an empty response body is decoded as None
+    return klass(**item) if item is not None else None
 
 
 def returns_item(klass, multi=False):
@@ -62,31 +112,89 @@ def returns_item(klass, multi=False):
 
 
 class RestClient(object):
-    session = requests.Session()
-    _request_methods = {
-        'post': requests_retry_session(session=session).post,
-        'get': requests_retry_session(session=session).get,
-        'delete': requests_retry_session(session=session).delete,
-        'put': requests_retry_session(session=session).put,
-        'patch': requests_retry_session(session=session).patch,
-    }
-
-    def __init__(self, url_base, retries=None, fixed_params=None):
+    """
+    Every client owns its `requests.Session` and connection pool, clients for different hosts or with different
+    settings do not interfere with each other.
+
+    A single client can be shared across threads: connections are taken from the thread-safe urllib3 pool, every
+    request works on its own copy of the parameters and headers and the token is renewed under a lock. Size
+    `pool_maxsize` to the number of threads sharing the client.
+
+    The token is renewed in the background `token_refresh_margin` seconds before the expiry in its `exp` claim,
+    requests only wait for a renewal once the token has actually expired. Threads needing a renewal at the same
+    time, either because the token expired or because the CIP-API answered 401/403, share a single `get_token`
+    call.
+    """
+    REQUEST_METHODS = ('post', 'get', 'delete', 'put', 'patch')
+
+    def __init__(self, url_base, retries=None, fixed_params=None, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, timeout=None, keep_alive=True, token_refresh_margin=60, cache=None,
+                 json_codec=None, compression=None, throttle=None, listeners=None, transport=None):
+        """
+        :param retries: number of retries of failed requests, 5 if not provided
+        :param pool_connections: number of hosts for which a connection pool is kept
+        :param pool_maxsize: maximum number of connections kept open per host
+        :param pool_block: when True requests wait for a free connection instead of opening one beyond the pool size
+        :param timeout: seconds to wait for the server, either a single value or a (connect, read) tuple
+        :param keep_alive: when False connections are closed after every request
+        :param token_refresh_margin: seconds before the token expiry from which it is renewed in the background
+        :param cache: cache of the GET responses requested with `cache=True`
+        :type cache: pycipapi.cache.ResponseCache
+        :param json_codec: codec of the request and response bodies, a name of `pycipapi.json_codecs.CODECS`, `auto`
+        for the fastest installed or a JsonCodec, the standard library if not provided
+        :param compression: compression of the JSON bodies posted with `compress=True`, `gzip`, `zstd` or a
+        RequestCompression with a size threshold, the statistics are in `compression.stats`
+        :type compression: pycipapi.compression.RequestCompression
+        :param throttle: rate and concurrency limits of the requests, possibly shared with other clients, responses
+        429 and 503 are then retried by the throttle instead of the connection pool
+        :type throttle: pycipapi.throttling.Throttle
+        :param listeners: objects notified of the requests, retries, errors, token renewals and decoding of responses,
+        such as a `pycipapi.instrumentation.MetricsRegistry`
+        :type listeners: list[pycipapi.instrumentation.RequestListener]
+        :param transport: adapter the requests are sent through, such as a `pycipapi.cassette.CassetteRecorder`
+        recording them or a `pycipapi.cassette.CassetteReplayer` answering them from a recording
+        """
         self.fixed_params = fixed_params if fixed_params is not None else {}
         self.url_base = url_base
         self.headers = {
             'Accept': 'application/json'
         }
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
         self.token = None
-        self.renewed_token = False
-        if retries is not None:
-            self._request_methods = {
-                'post': requests_retry_session(session=self.session, retries=retries).post,
-                'get': requests_retry_session(session=self.session, retries=retries).get,
-                'delete': requests_retry_session(session=self.session, retries=retries).delete,
-                'put': requests_retry_session(session=self.session, retries=retries).put,
-                'patch': requests_retry_session(session=self.session, retries=retries).patch,
-            }
+        self.token_expires_at = None
+        self.token_refresh_margin = token_refresh_margin
+        self.timeout = timeout
+        self.cache = cache
+        self.json_codec = get_json_codec(json_codec)
+        self.compression = get_request_compression(compression)
+        self.throttle = throttle
+        self.listeners = Listeners(listeners)
+        self._token_lock = threading.Lock()
+        self._background_renewal_lock = threading.Lock()
+        self._local = threading.local()
+        # with a throttle, the responses telling the client to slow down are left to it
+        status_forcelist = (500, 502, 504, 503) if throttle is None else (500, 502, 504)
+        self.session = requests_retry_session(retries=retries if retries is not None else 5,
+                                              status_forcelist=status_forcelist, session=requests.Session(),
+                                              pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                              pool_block=pool_block, respect_retry_after_header=throttle is None)
+        self.transport = transport
+        if transport is not None:
+            transport.attach(self.session)
+        self._request_methods = {method: getattr(self.session, method) for method in self.REQUEST_METHODS}
+
+    def close(self):
+        """
+        Closes the connections of the client
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     @staticmethod
     def build_url(baseurl, path, *args):
@@ -100,8 +208,65 @@ class RestClient(object):
     def set_authenticated_header(self, renew_token=False):
         if not self.token or renew_token:
             self.token = self.get_token()
+        self.token_expires_at = token_expiry(self.token)
         self.headers["Authorization"] = "{token}".format(token=self.token)
 
+    def can_renew_token(self):
+        return True
+
+    def cache_identity(self):
+        """
+        :return: identifies the credentials the requests are sent with, cached responses are only served to
+        requests sent with the same, a hash of the token by default
+        """
+        if not self.token:
+            return None
+        return hashlib.sha1(self.token.encode('utf-8')).hexdigest()
+
+    @property
+    def _renewing_token(self):
+        # True in the thread fetching a new token, its own requests must not try to renew it again
+        return getattr(self._local, 'renewing_token', False)
+
+    def renew_token(self, stale_token=None):
+        """
+        Fetches a new token, concurrent callers wait for a single call to `get_token`
+        :param stale_token: the token found to be invalid, nothing is done if it has already been replaced
+        """
+        with self._token_lock:
+            if stale_token is not None and stale_token != self.token:
+                return
+            self._local.renewing_token = True
+            started_at = time.time()
+            try:
+                self.set_authenticated_header(renew_token=True)
+            except Exception as e:
+                self.listeners.notify('on_token_renewal', time.time() - started_at, e)
+                raise
+            finally:
+                self._local.renewing_token = False
+            self.listeners.notify('on_token_renewal', time.time() - started_at, None)
+
+    def _background_renew_token(self, stale_token):
+        try:
+            self.renew_token(stale_token=stale_token)
+        except Exception as e:
+            # the token is still valid, the renewal will be attempted again by the next request
+            logging.warning("Background token renewal failed: {}".format(e))
+        finally:
+            self._background_renewal_lock.release()
+
+    def _refresh_token_if_expiring(self):
+        if self.token_expires_at is None or self._renewing_token or not self.can_renew_token():
+            return
+        remaining = self.token_expires_at - time.time()
+        if remaining <= 0:
+            self.renew_token(stale_token=self.token)
+        elif remaining <= self.token_refresh_margin and self._background_renewal_lock.acquire(False):
+            renewal = threading.Thread(target=self._background_renew_token, args=(self.token,))
+            renewal.daemon = True
+            renewal.start()
+
     @abc.abstractmethod
     def get_token(self):
         raise ValueError("Not implemented")
@@ -120,13 +285,16 @@ class RestClient(object):
         parameters.update(query_params)
         return parameters, url
 
-    def _request_call(self, method, url, params, payload=None, files=None):
-        parameters = self.fixed_params if self.fixed_params is not None else {}
+    def _request_call(self, method, url, params, payload=None, files=None, headers=None, stream=False, data=None,
+                      compress=False):
+        # copied so that concurrent requests do not leak their parameters into each other
+        parameters = dict(self.fixed_params) if self.fixed_params is not None else {}
         if params is not None:
             parameters.update(params)
 
         if url is None:
             raise ValueError("Must define endpoint before {method}".format(method=method))
+        self._refresh_token_if_expiring()
         logging.debug("{date} {method} {url}".format(
             date=datetime.datetime.now(),
             method=method.upper(),
@@ -135,54 +303,244 @@ class RestClient(object):
         request_method = self._request_methods.get(method)
         if request_method is None:
             raise NotImplementedError
-        if payload and files:
-            return request_method(url, json=payload, files=files, params=parameters, headers=self.headers)
+        # the headers are copied as a token renewal in another thread may be updating them
+        request_headers = dict(self.headers)
+        if headers is not None:
+            request_headers.update(headers)
+        kwargs = {'params': parameters, 'headers': request_headers, 'timeout': self.timeout, 'stream': stream}
+        if data is not None:
+            kwargs['data'] = data
         elif files:
-            return request_method(url, json=payload, params=parameters, headers=self.headers)
+            # multipart bodies carry the payload as form fields
+            kwargs['data'] = payload
+            kwargs['files'] = files
         elif payload:
-            return request_method(url, json=payload, params=parameters, headers=self.headers)
-        return request_method(url, params=parameters, headers=self.headers)
-
-    def post(self, url, payload, files=None, params=None):
-        response = self._request_call('post', url, params=params, files=files, payload=payload)
-        response = self._verify_response(response, 'post', url=url, params=params, files=files, payload=payload)
-        return response.json() if response.content else None
+            # encoded here rather than by requests so that the codec of the client is used
+            request_headers.setdefault('Content-Type', 'application/json')
+            body = self.json_codec.dumps(payload)
+            if compress and self.compression is not None:
+                body, encoding = self.compression.compress(body)
+                if encoding is not None:
+                    request_headers['Content-Encoding'] = encoding
+            kwargs['data'] = body
+        if self.throttle is None:
+            return self._send(request_method, method, url, kwargs)[0]
+        attempt = 1
+        while True:
+            with self.throttle.slot() as epoch:
+                response, event = self._send(request_method, method, url, kwargs, attempt)
+            if not self.throttle.record(response, epoch) or attempt > self.throttle.max_retries:
+                return response
+            attempt += 1
+            logging.warning("{} {} answered {}, sending it again".format(method.upper(), url, response.status_code))
+            if event is not None:
+                self.listeners.notify('on_retry', event, 'throttled')
+            response.close()
+
+    def _send(self, request_method, method, url, kwargs, attempt=1):
+        """
+        :return: the response and the event given to the listeners, None if there are no listeners
+        """
+        data = kwargs.get('data')
+        # a streamed body is sent again from its start when the request is retried
+        if hasattr(data, 'seek'):
+            data.seek(0)
+        if not self.listeners:
+            return request_method(url, **kwargs), None
+        if isinstance(data, bytes):
+            bytes_out = len(data)
+        else:
+            bytes_out = getattr(data, 'len', None)
+        event = self.listeners.new_event(method, url, bytes_out=bytes_out, attempt=attempt)
+        if event is None:
+            return request_method(url, **kwargs), None
+        self.listeners.notify('on_request_start', event)
+        try:
+            response = request_method(url, **kwargs)
+        except Exception as e:
+            self.listeners.notify('on_error', event, e)
+            raise
+        self.listeners.notify_end(event, response)
+        return response, event
+
+    def _decode(self, response):
+        if not response.content:
+            return None
+        if not self.listeners:
+            return self.json_codec.loads(response.content)
+        started_at = time.time()
+        decoded = self.json_codec.loads(response.content)
+        self.listeners.notify('on_decode', getattr(response.request, 'method', None), response.url,
+                              time.time() - started_at, len(response.content))
+        return decoded
+
+    def post(self, url, payload, files=None, params=None, data=None, headers=None, compress=False):
+        """
+        :param data: raw body sent instead of the payload, such as a file-like object streamed to the server
+        :param headers: headers of this request only
+        :param compress: compresses the JSON payload with the compression of the client, if any
+        """
+        response = self._request_call('post', url, params=params, files=files, payload=payload, data=data,
+                                      headers=headers, compress=compress)
+        response = self._verify_response(response, 'post', url=url, params=params, files=files, payload=payload,
+                                         data=data, headers=headers, compress=compress)
+        return self._decode(response)
 
     def put(self, url, payload, params=None):
         response = self._request_call('put', url, params=params, payload=payload)
         response = self._verify_response(response, 'put', url=url, params=params, payload=payload)
-        return response.json() if response.content else None
+        return self._decode(response)
 
     def patch(self, url, payload, params=None):
         response = self._request_call('patch', url, params=params, payload=payload)
         response = self._verify_response(response, 'patch', url=url, params=params, payload=payload)
-        return response.json() if response.content else None
-
-    def get(self, url, params=None):
+        return self._decode(response)
+
+    def get(self, url, params=None, cache=False):
+        """
+        :param cache: serves the response from the client's cache, if any, revalidating it with the server when
+        possible
+        """
+        if cache and self.cache is not None:
+            return self._cached_get(url, params)
         response = self._request_call('get', url, params=params)
         response = self._verify_response(response, 'get', url=url, params=params)
-        return response.json() if response.content else None
+        return self._decode(response)
+
+    def get_streamed(self, url, params=None, items_prefix='', skip_fields=(), top_level=None):
+        """
+        Decodes the response while it is being downloaded instead of loading it whole, see
+        `pycipapi.streaming.iter_items`
+        :param items_prefix: ijson prefix of the values to yield, `results.item` for the items of a page, empty for
+        the whole response
+        :param skip_fields: keys left out of the response without decoding them
+        :param top_level: if given, it is filled with the scalar fields of the root object
+        :rtype: collections.Iterable
+        """
+        response = self._request_call('get', url, params=params, stream=True)
+        response = self._verify_response(response, 'get', url=url, params=params, stream=True)
+        try:
+            # decompresses gzip responses as requests would do
+            response.raw.decode_content = True
+            for item in iter_items(response.raw, items_prefix=items_prefix, skip_fields=skip_fields,
+                                   top_level=top_level):
+                yield item
+        finally:
+            response.close()
+
+    def download(self, url, path, params=None, resume=True, checksum_algorithm=None, expected_checksum=None,
+                 chunk_size=CHUNK_SIZE, progress=None):
+        """
+        Streams a response to disk `chunk_size` bytes at a time. It is written to `<path>.part` and moved to `path`
+        once complete, so an interrupted download leaves a partial file from which the next one resumes with a Range
+        request, or starts again if the server does not support ranges.
+        :param resume: resumes from a partial file if there is one, starts again otherwise
+        :param checksum_algorithm: algorithm of hashlib, such as md5 or sha256, of the checksum computed while the file
+        is written
+        :param expected_checksum: hexadecimal digest the file must match, the partial file is deleted if it does not,
+        requires `checksum_algorithm`
+        :param progress: callable receiving the number of bytes written so far and the total size, None if unknown
+        :rtype: pycipapi.downloads.DownloadedFile
+        """
+        if expected_checksum is not None and checksum_algorithm is None:
+            raise ValueError("An expected checksum requires a checksum algorithm")
+        partial_path = path + PARTIAL_SUFFIX
+        offset = partial_size(path) if resume else 0
+        # asks for the file uncompressed so that ranges are offsets in the file on disk
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            headers['Range'] = 'bytes={}-'.format(offset)
+        response = self._request_call('get', url, params=params, headers=headers, stream=True)
+        if offset and response.status_code == 416:
+            # the partial file is already complete or is not part of the current file anymore
+            response.close()
+            return self.download(url, path, params=params, resume=False, checksum_algorithm=checksum_algorithm,
+                                 expected_checksum=expected_checksum, chunk_size=chunk_size, progress=progress)
+        response = self._verify_response(response, 'get', url=url, params=params, headers=headers, stream=True)
+
+        total = response.headers.get('Content-Length')
+        total = int(total) if total is not None else None
+        if response.status_code == 206:
+            content_range = response.headers.get('Content-Range', '')
+            if not content_range.startswith('bytes {}-'.format(offset)):
+                response.close()
+                return self.download(url, path, params=params, resume=False, checksum_algorithm=checksum_algorithm,
+                                     expected_checksum=expected_checksum, chunk_size=chunk_size, progress=progress)
+            size = content_range.rsplit('/', 1)[-1]
+            total = int(size) if size.isdigit() else None
+        else:
+            # the server sent the whole file
+            offset = 0
+
+        file_hash = new_hash(checksum_algorithm)
+        if offset and file_hash is not None:
+            update_hash_from_file(file_hash, partial_path, chunk_size)
+        written = offset
+        try:
+            with open(partial_path, 'ab' if offset else 'wb') as partial_file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    partial_file.write(chunk)
+                    if file_hash is not None:
+                        file_hash.update(chunk)
+                    written += len(chunk)
+                    if progress is not None:
+                        progress(written, total)
+        finally:
+            response.close()
+        if total is not None and written < total:
+            # the partial file is kept for the next attempt to resume from
+            raise ConnectionError("Download of {} interrupted after {} of {} bytes".format(url, written, total))
+
+        checksum = file_hash.hexdigest() if file_hash is not None else None
+        if expected_checksum is not None and checksum != expected_checksum.lower():
+            os.remove(partial_path)
+            raise ChecksumMismatch(path, checksum_algorithm, expected_checksum, checksum)
+        replace_file(partial_path, path)
+        return DownloadedFile(path, written, checksum=checksum, resumed_from=offset)
+
+    def _cached_get(self, url, params):
+        key = self.cache.key(url, dict(self.fixed_params, **(params or {})), identity=self.cache_identity())
+        entry = self.cache.get(key)
+        if entry is not None and not entry.can_revalidate and entry.is_fresh:
+            return self.json_codec.loads(entry.content) if entry.content else None
+        headers = entry.conditional_headers() if entry is not None else None
+        response = self._request_call('get', url, params=params, headers=headers)
+        response = self._verify_response(response, 'get', url=url, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            entry.expires_at = time.time() + self.cache.ttl
+        else:
+            entry = CacheEntry.from_response(response, self.cache.ttl)
+        self.cache.set(key, entry)
+        return self.json_codec.loads(entry.content) if entry.content else None
 
     def delete(self, url, params=None):
         response = self._request_call('delete', url, params=params)
         response = self._verify_response(response, 'delete', url=url, params=params)
-        return response.json() if response.content else None
+        return self._decode(response)
 
-    def _verify_response(self, response, method=None, **kwargs):
+    def _verify_response(self, response, method=None, renew_token=True, **kwargs):
         logging.debug("{date} response status code {status}".format(
             date=datetime.datetime.now(),
             status=response.status_code)
         )
-        if response.status_code not in (200, 203, 206, 201):
+        # 304 is only ever returned to the conditional requests of the cache
+        if response.status_code not in (200, 203, 206, 201, 304):
             logging.error(response.content)
-            # first 401/403 renews the token, second 401/403 in a row fails
-            if response.status_code in (401, 403) and not self.renewed_token:
-                # renews the token if unauthorised
-                self.set_authenticated_header(renew_token=True)
-                self.renewed_token = True
-                return self._request_call(method, **kwargs)
-            raise HTTPError("{}:{}".format(response.status_code, response.text), response=response)
+            # a 401/403 renews the token and retries the request, a second 401/403 in a row fails
+            if response.status_code in (401, 403) and renew_token and not self._renewing_token \
+                    and self.can_renew_token():
+                sent_token = response.request.headers.get('Authorization') if response.request is not None \
+                    else self.token
+                self.renew_token(stale_token=sent_token)
+                if self.listeners:
+                    self.listeners.notify_request('on_retry', method or getattr(response.request, 'method', None),
+                                                  response.url, 'token')
+                response = self._request_call(method, **kwargs)
+                return self._verify_response(response, method, renew_token=False, **kwargs)
+            error = HTTPError("{}:{}".format(response.status_code, response.text), response=response)
+            if self.listeners:
+                self.listeners.notify_request('on_error', method or getattr(response.request, 'method', None),
+                                              response.url, error)
+            raise error
         else:
-            # once a 20X response token is not anymore just renewed, it can be renewed again if a 403 arrives
-            self.renewed_token = False
             return response
@@ -0,0 +1,62 @@
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_SCALAR_EVENTS = ('null', 'boolean', 'integer', 'double', 'number', 'string')
+_START_EVENTS = ('start_map', 'start_array')
+_END_EVENTS = ('end_map', 'end_array')
+
+
+def iter_items(stream, items_prefix='', skip_fields=(), top_level=None):
+    """
+    Decodes a JSON document incrementally and yields the values found at `items_prefix` one at a time, so that only
+    one of them is held in memory at once. Requires ijson.
+    :param stream: file-like object with the JSON document
+    :param items_prefix: ijson prefix of the values, `results.item` for the items of a page, empty for the document
+    :param skip_fields: keys left out of the values without decoding them, at any depth
+    :param top_level: if given, it is filled with the scalar fields of the root object, such as `next` or `count`
+    :type top_level: dict
+    :rtype: collections.Iterable
+    """
+    if ijson is None:
+        raise ImportError("ijson is required to stream responses, install it with `pip install ijson`")
+    skip_fields = frozenset(skip_fields or ())
+    builder = None
+    depth = 0
+    skipping = False
+    skip_depth = 0
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is None:
+            if prefix == items_prefix:
+                if event in _START_EVENTS:
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    depth = 1
+                elif event in _SCALAR_EVENTS:
+                    yield value
+            elif top_level is not None and event in _SCALAR_EVENTS and prefix and '.' not in prefix:
+                top_level[prefix] = value
+            continue
+
+        if skipping:
+            if event in _START_EVENTS:
+                skip_depth += 1
+            elif event in _END_EVENTS:
+                skip_depth -= 1
+            skipping = skip_depth > 0
+            continue
+
+        if event == 'map_key' and value in skip_fields:
+            # the key is left out and the events of its value are dropped until it ends
+            skipping = True
+            skip_depth = 0
+            continue
+        builder.event(event, value)
+        if event in _START_EVENTS:
+            depth += 1
+        elif event in _END_EVENTS:
+            depth -= 1
+            if depth == 0:
+                yield builder.value
+                builder = None
@@ -0,0 +1,212 @@
+"""
+Client-side rate limiting for `RestClient`. A `Throttle` can be shared by several clients and threads to keep their
+combined load under what the CIP-API sustains.
+"""
+import contextlib
+import email.utils
+import logging
+import threading
+import time
+
+from requests.exceptions import ConnectionError, Timeout
+
+
+def retry_after_seconds(value, now=None):
+    """
+    :param value: value of a Retry-After header, either a number of seconds or an HTTP date
+    :return: seconds to wait, None if the value cannot be parsed
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - (now if now is not None else time.time()))
+
+
+class TokenBucket(object):
+    """
+    Allows `rate` requests per second on average with bursts of up to `burst` requests
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def pause(self, seconds):
+        """
+        No token is handed out for `seconds`, and the tokens accumulated so far are dropped
+        """
+        with self._lock:
+            now = time.time()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self._updated_at = max(self._updated_at, self.paused_until)
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                if now >= self.paused_until:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency(object):
+    """
+    Limit of the requests in flight adjusted with additive increase and multiplicative decrease (AIMD): the limit
+    grows by one after a full limit's worth of successful requests, and is multiplied by `decrease` when the server
+    says it is overloaded. Only requests started after the last decrease can lower the limit again, so that the
+    rejections of a burst of requests count once.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self.epoch = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        :return: the epoch of the request, to be given back to `on_overload`
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            if self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._condition.notify()
+
+    def on_overload(self, epoch):
+        with self._condition:
+            if epoch != self.epoch:
+                return
+            self.epoch += 1
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            logging.info("Server overloaded, concurrency limit lowered to {}".format(int(self.limit)))
+
+
+class Throttle(object):
+    """
+    Token bucket capping the request rate combined with an adaptive limit of the requests in flight. Responses 429
+    and 503 lower the limit, pause every request sharing the throttle for as long as their Retry-After header says,
+    and are sent again by `RestClient` up to `max_retries` times. The server does not process requests it answers
+    with 429 or 503, so retrying them is safe for any method.
+
+    Connection errors and timeouts also lower the limit, without pausing nor retrying. Only the other responses
+    below 500 raise it, the other server errors and exceptions leave it as it is.
+    """
+    OVERLOAD_STATUSES = (429, 503)
+
+    def __init__(self, rate=None, burst=None, concurrency=4, min_concurrency=1, max_concurrency=64,
+                 max_retries=5, default_retry_after=1.0):
+        """
+        :param rate: maximum number of requests per second, unlimited if not provided
+        :param burst: number of requests that can be sent at once after an idle period, `rate` if not provided
+        :param concurrency: initial limit of the requests in flight, kept between `min_concurrency` and
+        `max_concurrency`
+        :param max_retries: maximum number of times a request answered with 429 or 503 is sent again
+        :param default_retry_after: seconds paused after a 429 or 503 without a Retry-After header
+        """
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.concurrency = AdaptiveConcurrency(initial=concurrency, minimum=min_concurrency,
+                                               maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.default_retry_after = default_retry_after
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_pause(self):
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.time()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    @contextlib.contextmanager
+    def slot(self):
+        """
+        Waits for the pauses, a token of the bucket and a free slot of the concurrency limit
+        :return: the epoch of the request, to be given to `record`
+        """
+        self._wait_pause()
+        if self.bucket is not None:
+            self.bucket.acquire()
+        epoch = self.concurrency.acquire()
+        try:
+            yield epoch
+        except Exception as e:
+            self.record_error(e, epoch)
+            raise
+        finally:
+            self.concurrency.release()
+
+    def record(self, response, epoch):
+        """
+        :type response: requests.Response
+        :param epoch: the epoch given by `slot` when the request was sent
+        :return: True if the server was overloaded and the request can be sent again
+        """
+        if response.status_code not in self.OVERLOAD_STATUSES:
+            if response.status_code < 500:
+                self.concurrency.on_success()
+            return False
+        self.concurrency.on_overload(epoch)
+        wait = retry_after_seconds(response.headers.get('Retry-After'))
+        self.pause(wait if wait is not None else self.default_retry_after)
+        return True
+
+    def record_error(self, error, epoch):
+        """
+        Called by `slot` for a request that raised instead of getting a response
+        :param epoch: the epoch given by `slot` when the request was sent
+        """
+        if isinstance(error, (ConnectionError, Timeout)):
+            self.concurrency.on_overload(epoch)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+        if self.bucket is not None:
+            self.bucket.pause(seconds)
+
+    @property
+    def limit(self):
+        """
+        :return: current limit of the requests in flight
+        """
+        return int(self.concurrency.limit)
@@ -0,0 +1,160 @@
+"""
+Streaming multipart/form-data bodies for uploading large files without holding them in memory.
+"""
+import mimetypes
+import os
+import time
+import uuid
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartEncoder(object):
+    """
+    File-like multipart/form-data body which reads the files it uploads `chunk_size` bytes at a time, so that
+    `requests` streams it instead of building it in memory. Files are only opened while they are being read and are
+    closed once they have been sent or when the encoder is closed.
+
+    Its length is known in advance, and sent as Content-Length, unless files are compressed, in which case the body is
+    sent with chunked transfer encoding. The CIP-API cannot resume an interrupted upload, the encoder can be rewound
+    with `seek(0)` to send it again from the start.
+    """
+
+    def __init__(self, fields=None, files=None, compress=False, chunk_size=CHUNK_SIZE, progress=None):
+        """
+        :param fields: text fields of the form, (name, value) pairs or a dict
+        :param files: files of the form, (name, path) pairs or a dict
+        :param compress: gzips the files while they are sent, they are received with a `.gz` extension
+        :param chunk_size: number of bytes of a file read at once
+        :param progress: callable receiving the number of bytes sent so far, the total number of bytes (None if
+        unknown) and the throughput in bytes per second after every chunk
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(self.boundary)
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.progress = progress
+        fields = fields.items() if isinstance(fields, dict) else (fields or [])
+        files = files.items() if isinstance(files, dict) else (files or [])
+        self._parts = [self._field_header(name, value) + self._encode(value) + b'\r\n' for name, value in fields]
+        self._files = [(self._file_header(name, path), path) for name, path in files]
+        self._closing = '--{}--\r\n'.format(self.boundary).encode('utf-8')
+        self.len = None if compress else (sum(len(part) for part in self._parts) + len(self._closing) + sum(
+            len(header) + os.path.getsize(path) + 2 for header, path in self._files))
+        self._file = None
+        self._buffer = b''
+        self._segments = None
+        self._sent = 0
+        self._started_at = None
+        self.seek(0)
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, bytes) else u'{}'.format(value).encode('utf-8')
+
+    def _field_header(self, name, value):
+        return '--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n'.format(self.boundary, name).encode('utf-8')
+
+    def _file_header(self, name, path):
+        file_name = os.path.basename(path)
+        if self.compress:
+            file_name += '.gz'
+            content_type = 'application/gzip'
+        else:
+            content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        return '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\nContent-Type: {}\r\n\r\n'.format(
+            self.boundary, name, file_name, content_type).encode('utf-8')
+
+    def _iter_segments(self):
+        for part in self._parts:
+            yield part
+        for header, path in self._files:
+            yield header
+            for chunk in self._iter_file(path):
+                yield chunk
+            yield b'\r\n'
+        yield self._closing
+
+    def _iter_file(self, path):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31) if self.compress else None
+        self._file = open(path, 'rb')
+        try:
+            while True:
+                chunk = self._file.read(self.chunk_size)
+                if not chunk:
+                    break
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+            if compressor is not None:
+                yield compressor.flush()
+        finally:
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """
+        Only rewinding to the start of the body is supported
+        """
+        if offset != 0 or whence != os.SEEK_SET:
+            raise ValueError("A multipart body can only be rewound to its start")
+        self.close()
+        self._segments = self._iter_segments()
+        self._buffer = b''
+        self._sent = 0
+        self._started_at = None
+
+    def read(self, size=-1):
+        """
+        :type size: int
+        :rtype: bytes
+        """
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size is None or size < 0 or length < size:
+            segment = next(self._segments, None)
+            if segment is None:
+                break
+            chunks.append(segment)
+            length += len(segment)
+        data = b''.join(chunks)
+        if size is not None and size >= 0:
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = b''
+        self._report(len(data))
+        return data
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def _report(self, length):
+        if self._started_at is None:
+            self._started_at = time.time()
+        self._sent += length
+        if self.progress is not None and length:
+            elapsed = time.time() - self._started_at
+            self.progress(self._sent, self.len, self._sent / elapsed if elapsed > 0 else None)
+
+    def close(self):
+        if self._segments is not None:
+            # closing the generator runs its finally blocks, which close the file being read
+            self._segments.close()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
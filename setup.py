@@ -12,6 +12,14 @@ setup(
     description='',
     install_requires=[
         'requests==2.22',
-        'GelReportModels==7.7.1'
-    ]
+        'GelReportModels==7.7.1',
+        'futures; python_version < "3.0"',
+    ],
+    extras_require={
+        'async': ['aiohttp>=3.6'],
+        'streaming': ['ijson>=3.1'],
+        'columnar': ['numpy', 'pyarrow'],
+        'fastjson': ['orjson'],
+        'zstd': ['zstandard'],
+    }
 )
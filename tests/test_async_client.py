@@ -0,0 +1,90 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from requests.exceptions import HTTPError
+
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    aiohttp = None
+
+from pycipapi.async_cipapi_client import AsyncCipApiClient
+from tests.transport import TOKEN
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncCipApiClient(unittest.TestCase):
+    """
+    Runs the client against an aiohttp server answering each request with the next of `responses`
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.responses = []
+        self.received = []
+        self.directory = tempfile.mkdtemp()
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        self.client = AsyncCipApiClient('http://127.0.0.1:{}'.format(port), token=TOKEN, retries=3)
+        self.client.backoff_factor = 10
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    async def handle(self, request):
+        self.received.append((request.method, request.path, request.headers.copy(), await request.read()))
+        status, headers = self.responses.pop(0) if self.responses else (200, {})
+        return web.json_response({}, status=status, headers=headers)
+
+    def run_client(self, coroutine):
+        started_at = time.time()
+        result = self.loop.run_until_complete(coroutine)
+        return result, time.time() - started_at
+
+    def test_retry_waits_as_long_as_retry_after_says(self):
+        self.responses = [(503, {'Retry-After': '0'}), (429, {'Retry-After': '0'})]
+        _, elapsed = self.run_client(self.client.get_case_raw(1, 1))
+        self.assertEqual(len(self.received), 3)
+        # the back off of the client would have waited 10 seconds
+        self.assertLess(elapsed, 5)
+
+    def test_response_with_retry_after_not_in_the_status_forcelist_is_retried(self):
+        self.client.status_forcelist = ()
+        self.responses = [(503, {'Retry-After': '0'}), (503, {})]
+        with self.assertRaises(HTTPError):
+            self.run_client(self.client.get_case_raw(1, 1))
+        self.assertEqual(len(self.received), 2)
+
+    def test_file_upload_is_streamed(self):
+        path = os.path.join(self.directory, 'report.pdf')
+        with open(path, 'wb') as report:
+            report.write(os.urandom(200 * 1024))
+        self.run_client(self.client.file_upload_raw(path, 'user', 'partner', '1-1', 'report'))
+        method, path_url, headers, body = self.received[0]
+        self.assertEqual((method, path_url), ('POST', '/api/2/file/partner/1-1/report/'))
+        self.assertTrue(headers['Content-Type'].startswith('multipart/form-data'))
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        with open(path, 'rb') as report:
+            self.assertIn(report.read(), body)
+
+    def test_file_upload_is_sent_whole_again_when_retried(self):
+        path = os.path.join(self.directory, 'report.pdf')
+        with open(path, 'wb') as report:
+            report.write(b'report')
+        self.responses = [(503, {'Retry-After': '0'})]
+        self.run_client(self.client.file_upload_raw(path, 'user', 'partner', '1-1', 'report'))
+        self.assertEqual(len(self.received), 2)
+        self.assertEqual(self.received[0][3], self.received[1][3])
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from requests import Response
+from requests.exceptions import HTTPError
+
+from pycipapi.bulk import BulkSubmitter, SubmissionJob, SubmissionResult
+from pycipapi.rest_client import BlockedCase
+
+
+def error_response(status, **headers):
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+class FakeCase(object):
+
+    def __init__(self, is_blocked):
+        self.is_blocked = is_blocked
+
+
+class FakeClient(object):
+    """
+    Fails the submissions of a report with the given statuses, one per attempt, before accepting it
+    """
+
+    def __init__(self, failures=None, blocked_cases=()):
+        self.failures = failures or {}
+        self.blocked_cases = set(blocked_cases)
+        self.submitted = []
+
+    def submit_interpreted_genome_raw(self, payload, partner_id, analysis_type, report_id):
+        self.submitted.append(report_id)
+        statuses = self.failures.get(report_id)
+        if statuses:
+            status = statuses.pop(0)
+            raise HTTPError("{}:Failed".format(status), response=error_response(status, **{'Retry-After': '0'}))
+        return {'report_id': report_id}
+
+    def get_case(self, case_id, case_version):
+        return FakeCase((case_id, case_version) in self.blocked_cases)
+
+
+def job(report_id):
+    return SubmissionJob('interpreted_genome', {'report': report_id}, partner_id='partner',
+                         analysis_type='rare_disease', report_id=report_id)
+
+
+class TestBulkSubmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_retries_a_submission_refused_with_503(self):
+        client = FakeClient(failures={'1-1': [503, 503]})
+        result = BulkSubmitter(client, backoff_factor=0).run([job('1-1')]).results[0]
+        self.assertEqual(result.status, SubmissionResult.OK)
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(client.submitted, ['1-1'] * 3)
+
+    def test_gives_up_after_the_maximum_number_of_retries(self):
+        client = FakeClient(failures={'1-1': [429, 429, 429]})
+        result = BulkSubmitter(client, retries=2, backoff_factor=0).run([job('1-1')]).results[0]
+        self.assertEqual(result.status, SubmissionResult.HTTP_ERROR)
+        self.assertEqual(result.attempts, 3)
+
+    def test_does_not_retry_a_submission_the_cip_api_may_have_processed(self):
+        client = FakeClient(failures={'1-1': [500]})
+        result = BulkSubmitter(client, backoff_factor=0).run([job('1-1')]).results[0]
+        self.assertEqual(result.status, SubmissionResult.HTTP_ERROR)
+        self.assertEqual(client.submitted, ['1-1'])
+
+    def test_refusal_is_blocked_only_if_the_case_is_blocked(self):
+        client = FakeClient(failures={'1-1': [409], '2-1': [409]}, blocked_cases=[('1', '1')])
+        results = {r.job.job_id: r for r in BulkSubmitter(client).run([job('1-1'), job('2-1')]).results}
+        blocked = results[job('1-1').job_id]
+        self.assertEqual(blocked.status, SubmissionResult.BLOCKED)
+        self.assertIsInstance(blocked.error, BlockedCase)
+        self.assertEqual(results[job('2-1').job_id].status, SubmissionResult.HTTP_ERROR)
+
+    def test_resumed_run_skips_the_jobs_completed_by_the_previous_one(self):
+        client = FakeClient(failures={'2-1': [500]})
+        report = BulkSubmitter(client, checkpoint=self.checkpoint).run([job('1-1'), job('2-1'), job('3-1')])
+        self.assertEqual(report.counts[SubmissionResult.OK], 2)
+        self.assertEqual(len(report.failed), 1)
+
+        client.submitted = []
+        report = BulkSubmitter(client, checkpoint=self.checkpoint).run([job('1-1'), job('2-1'), job('3-1')])
+        self.assertEqual(client.submitted, ['2-1'])
+        self.assertEqual(report.counts[SubmissionResult.SKIPPED], 2)
+        self.assertEqual(report.counts[SubmissionResult.OK], 1)
+
+    def test_checkpoint_ignores_a_truncated_last_line(self):
+        BulkSubmitter(FakeClient(), checkpoint=self.checkpoint).run([job('1-1')])
+        with open(self.checkpoint, 'a') as checkpoint_file:
+            checkpoint_file.write(json.dumps({'job_id': job('2-1').job_id, 'status': 'ok'})[:10])
+        self.assertEqual(BulkSubmitter(FakeClient(), checkpoint=self.checkpoint).completed_jobs(),
+                         {job('1-1').job_id})
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pycipapi.cache import CacheEntry, ResponseCache
+from pycipapi.cipapi_client import CipApiClient
+from tests.transport import FakeTransport
+
+CASE_PATH = '/interpretation-request/1/1/'
+
+
+class VersionedCase(object):
+    """
+    Serves a case with an ETag changing with its version, answering 304 to the requests carrying the current one
+    """
+
+    def __init__(self, etag=True):
+        self.version = 1
+        self.etag = etag
+
+    def __call__(self, request):
+        if request.method != 'GET':
+            return 200, {}, {}
+        current = '"{}"'.format(self.version)
+        if self.etag and request.headers.get('If-None-Match') == current:
+            return 304, {'ETag': current}, b''
+        headers = {'ETag': current} if self.etag else {}
+        return 200, headers, {'interpretation_request_id': 1, 'version': self.version}
+
+
+class TestCachedCases(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.case = VersionedCase()
+        self.transport = FakeTransport(self.case)
+        self.cache = ResponseCache(directory=self.directory)
+        self.client = self.new_client('user')
+
+    def tearDown(self):
+        self.client.close()
+        shutil.rmtree(self.directory)
+
+    def new_client(self, user, cache=None):
+        return CipApiClient('https://cipapi.fake', user=user, password='password', transport=self.transport,
+                            cache=cache or self.cache)
+
+    def test_cached_case_is_revalidated(self):
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 1)
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 1)
+        requests = self.transport.sent(CASE_PATH)
+        self.assertEqual(len(requests), 2)
+        self.assertNotIn('If-None-Match', requests[0].headers)
+        self.assertEqual(requests[1].headers['If-None-Match'], '"1"')
+
+    def test_changed_case_is_downloaded_again(self):
+        self.client.get_case_raw(1, 1)
+        self.case.version = 2
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 2)
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 2)
+
+    def test_case_without_validators_is_served_for_the_ttl(self):
+        self.case.etag = False
+        self.client.get_case_raw(1, 1)
+        self.case.version = 2
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 1)
+        self.assertEqual(len(self.transport.sent(CASE_PATH)), 1)
+
+    def test_modifying_a_case_invalidates_it(self):
+        self.case.etag = False
+        self.client.get_case_raw(1, 1)
+        self.case.version = 2
+        self.client.patch_case_raw(1, 1, {'status': 'blocked'})
+        self.assertEqual(self.client.get_case_raw(1, 1)['version'], 2)
+
+    def test_cached_case_survives_the_client_on_disk(self):
+        self.client.get_case_raw(1, 1)
+        with self.new_client('user', cache=ResponseCache(directory=self.directory)) as client:
+            client.get_case_raw(1, 1)
+        self.assertEqual(self.transport.sent(CASE_PATH)[-1].headers['If-None-Match'], '"1"')
+
+    def test_cached_case_is_not_served_to_another_user(self):
+        self.case.etag = False
+        self.client.get_case_raw(1, 1)
+        with self.new_client('other user', cache=ResponseCache(directory=self.directory)) as client:
+            client.get_case_raw(1, 1)
+        self.assertEqual(len(self.transport.sent(CASE_PATH)), 2)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_memory_tier_evicts_the_least_recently_used(self):
+        cache = ResponseCache(max_bytes=20)
+        cache.set(cache.key('a'), CacheEntry(b'0123456789', etag='a'))
+        cache.set(cache.key('b'), CacheEntry(b'0123456789', etag='b'))
+        cache.get(cache.key('a'))
+        cache.set(cache.key('c'), CacheEntry(b'0123456789', etag='c'))
+        self.assertIsNotNone(cache.get(cache.key('a')))
+        self.assertIsNone(cache.get(cache.key('b')))
+        self.assertEqual(cache.size, 20)
+
+    def test_disk_tier_is_bounded(self):
+        cache = ResponseCache(max_bytes=0, directory=self.directory, max_disk_bytes=1000)
+        for url in ('a', 'b', 'c', 'd'):
+            cache.set(cache.key(url), CacheEntry(b'0' * 300, etag=url))
+            # modification times must differ to tell the least recently read entry
+            time.sleep(0.01)
+        self.assertLessEqual(cache.disk_size, 1000)
+        self.assertIsNone(cache.get(cache.key('a')))
+        self.assertIsNotNone(cache.get(cache.key('d')))
+
+    def test_expired_entry_without_validators_is_deleted_from_disk(self):
+        cache = ResponseCache(max_bytes=0, directory=self.directory)
+        cache.set(cache.key('a'), CacheEntry(b'content', expires_at=time.time() - 1))
+        self.assertIsNone(cache.get(cache.key('a')))
+        self.assertEqual(cache.disk_size, 0)
+        self.assertFalse(os.path.exists(cache._entry_path(cache.key('a'))))
+
+    def test_keys_of_different_identities_differ(self):
+        self.assertNotEqual(ResponseCache.key('a', {'page': 1}, identity='user:a'),
+                            ResponseCache.key('a', {'page': 1}, identity='user:b'))
+        self.assertEqual(ResponseCache.key('a', identity='user:a')[0], 'a')
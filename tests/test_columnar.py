@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from pycipapi.columnar import CaseTableBuilder, build_case_table, write_case_table
+
+
+def overview(case_id, version, cip, last_modified, case_priority=1):
+    return {'interpretation_request_id': '{}-{}'.format(case_id, version), 'cip': cip, 'sample_type': 'raredisease',
+            'last_status': 'sent_to_gmcs', 'case_priority': case_priority, 'assembly': 'GRCh38',
+            'last_modified': last_modified, 'number_of_samples': 3}
+
+
+ROWS = [overview(1, 1, 'omicia', '2020-01-01T10:00:00Z'),
+        overview(2, 3, 'congenica', '2020-01-01T10:00:00.250000+01:00', case_priority=None),
+        overview(3, 1, 'omicia', '2020-01-01T22:30:00-0230'),
+        overview(4, 2, 'exomiser', None)]
+
+
+class FakeClient(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_cases_raw(self, **params):
+        return iter(self.rows)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestNumpyTable(unittest.TestCase):
+
+    def test_columns(self):
+        arrays = build_case_table(FakeClient(ROWS))
+        self.assertEqual(arrays['interpretation_request_id'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(arrays['version'].tolist(), [1, 3, 1, 2])
+        self.assertEqual(arrays['cip'].tolist(), ['omicia', 'congenica', 'omicia', 'exomiser'])
+        self.assertEqual(arrays['case_priority'].mask.tolist(), [False, True, False, False])
+
+    def test_timestamps_are_converted_to_utc(self):
+        timestamps = build_case_table(FakeClient(ROWS))['last_modified']
+        self.assertEqual(timestamps.dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual([str(timestamp) for timestamp in timestamps],
+                         ['2020-01-01T10:00:00.000000', '2020-01-01T09:00:00.250000', '2020-01-02T01:00:00.000000',
+                          'NaT'])
+
+    def test_timestamp_which_is_not_iso_8601_is_rejected(self):
+        builder = CaseTableBuilder()
+        builder.append(overview(1, 1, 'omicia', '01/01/2020 10:00'))
+        with self.assertRaises(ValueError):
+            builder.to_numpy()
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestArrowTable(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record_batch(self):
+        builder = CaseTableBuilder()
+        builder.extend(ROWS)
+        batch = builder.to_arrow()
+        self.assertEqual(batch.schema.field('last_modified').type, pyarrow.timestamp('us', tz='UTC'))
+        self.assertTrue(pyarrow.types.is_dictionary(batch.schema.field('cip').type))
+        columns = batch.to_pydict()
+        self.assertEqual(columns['cip'], ['omicia', 'congenica', 'omicia', 'exomiser'])
+        self.assertEqual(columns['case_priority'], [1, None, 1, 1])
+        self.assertEqual([t.isoformat() if t is not None else None for t in columns['last_modified']],
+                         ['2020-01-01T10:00:00+00:00', '2020-01-01T09:00:00.250000+00:00',
+                          '2020-01-02T01:00:00+00:00', None])
+
+    def test_write_parquet_in_batches(self):
+        path = os.path.join(self.directory, 'cases.parquet')
+        self.assertEqual(write_case_table(FakeClient(ROWS), path, batch_size=3), 4)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column('interpretation_request_id').to_pylist(), [1, 2, 3, 4])
+        self.assertEqual(table.column('cip').to_pylist(), ['omicia', 'congenica', 'omicia', 'exomiser'])
+
+    def test_write_feather_in_batches(self):
+        path = os.path.join(self.directory, 'cases.feather')
+        # the second batch adds a value to the dictionary of `cip`
+        self.assertEqual(write_case_table(FakeClient(ROWS), path, file_format='feather', batch_size=3), 4)
+        with pyarrow.ipc.open_file(path) as reader:
+            table = reader.read_all()
+        self.assertEqual(table.column('cip').to_pylist(), ['omicia', 'congenica', 'omicia', 'exomiser'])
+
+    def test_empty_listing_writes_the_schema(self):
+        path = os.path.join(self.directory, 'cases.parquet')
+        self.assertEqual(write_case_table(FakeClient([]), path), 0)
+        self.assertEqual(pyarrow.parquet.read_table(path).column_names[0], 'interpretation_request_id')
@@ -0,0 +1,33 @@
+import gzip
+import io
+import json
+import unittest
+
+from pycipapi.cipapi_client import CipApiClient
+from pycipapi.compression import RequestCompression
+from tests.transport import FakeTransport
+
+
+class TestRequestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeTransport(lambda request: (200, {}, {}))
+        self.client = CipApiClient('https://cipapi.fake', user='user', password='password',
+                                   compression=RequestCompression('gzip', threshold=0), transport=self.transport)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_submissions_are_compressed(self):
+        payload = {'interpretedGenome': ['variant'] * 100}
+        self.client.submit_interpreted_genome_raw(payload, 'partner', 'raredisease', '1-1')
+        request = self.transport.sent('/interpreted-genome/partner/raredisease/1-1/')[0]
+        self.assertEqual(request.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.GzipFile(fileobj=io.BytesIO(request.body)).read()), payload)
+
+    def test_other_requests_are_not_compressed(self):
+        self.client.patch_case_raw(1, 1, {'status': 'blocked'})
+        self.client.dispatch_raw(1, 1)
+        for request in self.transport.requests:
+            self.assertNotIn('Content-Encoding', request.headers)
+        self.assertEqual(self.client.compression.stats.requests, 0)
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from requests.exceptions import ConnectionError
+
+from pycipapi.cipapi_client import CipApiClient
+from pycipapi.downloads import PARTIAL_SUFFIX, ChecksumMismatch
+from tests.transport import TOKEN, FakeTransport
+
+CONTENT = bytes(bytearray(range(256))) * 40
+URL = 'https://cipapi.fake/api/2/file/report.pdf'
+
+
+class FileServer(object):
+    """
+    Serves `CONTENT`, honouring Range requests unless `ranges` is False. With `cut_at`, the next response stops
+    after that many bytes of the file while announcing all of them.
+    """
+
+    def __init__(self, ranges=True):
+        self.ranges = ranges
+        self.cut_at = None
+
+    def __call__(self, request):
+        match = re.match(r'bytes=(\d+)-$', request.headers.get('Range', ''))
+        if match is None or not self.ranges:
+            start = 0
+        else:
+            start = int(match.group(1))
+            if start >= len(CONTENT):
+                return 416, {}, b''
+        end = len(CONTENT)
+        if self.cut_at is not None:
+            end, self.cut_at = self.cut_at, None
+        if start == 0 and end == len(CONTENT):
+            return 200, {}, CONTENT
+        content_range = 'bytes {}-{}/{}'.format(start, len(CONTENT) - 1, len(CONTENT))
+        return 206, {'Content-Range': content_range}, CONTENT[start:end]
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'report.pdf')
+        self.server = FileServer()
+        self.transport = FakeTransport(self.server)
+        self.client = CipApiClient('https://cipapi.fake', token=TOKEN, transport=self.transport)
+
+    def tearDown(self):
+        self.client.close()
+        shutil.rmtree(self.directory)
+
+    def write_partial(self, content):
+        with open(self.path + PARTIAL_SUFFIX, 'wb') as partial_file:
+            partial_file.write(content)
+
+    def assertDownloaded(self):
+        with open(self.path, 'rb') as downloaded:
+            self.assertEqual(downloaded.read(), CONTENT)
+        self.assertFalse(os.path.exists(self.path + PARTIAL_SUFFIX))
+
+    def test_download_with_checksum(self):
+        downloaded = self.client.download(URL, self.path, checksum_algorithm='md5',
+                                          expected_checksum=hashlib.md5(CONTENT).hexdigest().upper())
+        self.assertEqual(downloaded.size, len(CONTENT))
+        self.assertEqual(downloaded.resumed_from, 0)
+        self.assertDownloaded()
+
+    def test_download_resumes_from_the_partial_file(self):
+        self.write_partial(CONTENT[:1000])
+        downloaded = self.client.download(URL, self.path, checksum_algorithm='sha256')
+        self.assertEqual(self.transport.requests[-1].headers['Range'], 'bytes=1000-')
+        self.assertEqual(downloaded.resumed_from, 1000)
+        self.assertEqual(downloaded.checksum, hashlib.sha256(CONTENT).hexdigest())
+        self.assertDownloaded()
+
+    def test_interrupted_download_is_resumed_by_the_next(self):
+        self.server.cut_at = 3000
+        with self.assertRaises(ConnectionError):
+            self.client.download(URL, self.path)
+        self.assertEqual(os.path.getsize(self.path + PARTIAL_SUFFIX), 3000)
+        self.assertEqual(self.client.download(URL, self.path).resumed_from, 3000)
+        self.assertDownloaded()
+
+    def test_download_starts_again_when_the_range_is_not_satisfiable(self):
+        self.write_partial(CONTENT + b'stale')
+        downloaded = self.client.download(URL, self.path)
+        first, second = self.transport.requests
+        self.assertEqual(first.headers['Range'], 'bytes={}-'.format(len(CONTENT) + 5))
+        self.assertNotIn('Range', second.headers)
+        self.assertEqual(downloaded.resumed_from, 0)
+        self.assertDownloaded()
+
+    def test_download_starts_again_when_the_server_ignores_ranges(self):
+        self.server.ranges = False
+        self.write_partial(b'x' * 1000)
+        downloaded = self.client.download(URL, self.path, checksum_algorithm='md5')
+        self.assertEqual(downloaded.resumed_from, 0)
+        self.assertEqual(downloaded.checksum, hashlib.md5(CONTENT).hexdigest())
+        self.assertDownloaded()
+
+    def test_checksum_mismatch_deletes_the_partial_file(self):
+        with self.assertRaises(ChecksumMismatch):
+            self.client.download(URL, self.path, checksum_algorithm='md5', expected_checksum='0' * 32)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + PARTIAL_SUFFIX))
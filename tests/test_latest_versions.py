@@ -0,0 +1,51 @@
+import unittest
+
+from pycipapi.latest_versions import LatestVersionIndex
+
+
+def overview(case_id, version, last_modified, group_id=None):
+    overview = {'interpretation_request_id': '{}-{}'.format(case_id, version), 'last_modified': last_modified}
+    if group_id is not None:
+        overview['group_id'] = group_id
+    return overview
+
+
+class FakeClient(object):
+
+    def __init__(self, overviews):
+        self.overviews = overviews
+
+    def get_cases_raw(self, group_id=None, **params):
+        since = params.get('last_modified__gte')
+        return [o for o in self.overviews if (since is None or o['last_modified'] >= since) and
+                (group_id is None or o.get('group_id', group_id) == group_id)]
+
+
+class TestLatestVersionIndex(unittest.TestCase):
+
+    def test_refresh_keeps_the_highest_version_of_each_group(self):
+        client = FakeClient([overview(1, 9, '2020-01-01', 'a'), overview(1, 10, '2020-01-02', 'a'),
+                             overview(2, 1, '2020-01-03', 'b')])
+        index = LatestVersionIndex()
+        self.assertEqual(index.refresh(client), 3)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.latest_raw('a')['interpretation_request_id'], '1-10')
+        self.assertEqual(index.watermark, '2020-01-03')
+
+    def test_refresh_returns_the_number_of_cases_indexed(self):
+        client = FakeClient([overview(1, 1, '2020-01-01', 'a'), overview(2, 1, '2020-01-02')])
+        self.assertEqual(LatestVersionIndex().refresh(client), 1)
+
+    def test_refresh_fails_when_the_listing_has_no_group_id(self):
+        client = FakeClient([overview(1, 1, '2020-01-01'), overview(2, 1, '2020-01-02')])
+        index = LatestVersionIndex()
+        with self.assertRaises(ValueError):
+            index.refresh(client)
+        self.assertIsNone(index.watermark)
+        self.assertEqual(len(index), 0)
+
+    def test_refresh_groups_does_not_need_group_id(self):
+        client = FakeClient([overview(1, 1, '2020-01-01'), overview(1, 2, '2020-01-02')])
+        index = LatestVersionIndex()
+        self.assertEqual(index.refresh_groups(client, ['a']), {})
+        self.assertEqual(index.latest_raw('a')['interpretation_request_id'], '1-2')
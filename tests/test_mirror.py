@@ -0,0 +1,88 @@
+import unittest
+
+from requests.exceptions import HTTPError
+
+from pycipapi.mirror import CaseMirror
+
+
+def overview(case_id, last_modified, version=1, **fields):
+    overview = {'interpretation_request_id': '{}-{}'.format(case_id, version), 'last_modified': last_modified,
+                'last_status': 'sent_to_gmcs', 'cip': 'omicia', 'sample_type': 'raredisease'}
+    overview.update(fields)
+    return overview
+
+
+class FakeClient(object):
+    """
+    Serves a fixed interpretation request list, filtered on `last_modified__gte` like the CIP-API
+    """
+
+    def __init__(self, overviews, failing=()):
+        self.overviews = overviews
+        self.failing = set(failing)
+        self.listings = []
+        self.fetched = []
+
+    def get_cases_raw(self, **params):
+        self.listings.append(params)
+        since = params.get('last_modified__gte')
+        return [o for o in self.overviews if since is None or o['last_modified'] >= since]
+
+    def get_case_raw(self, case_id, case_version):
+        self.fetched.append((case_id, case_version))
+        if case_id in self.failing:
+            raise HTTPError("404:Not found.")
+        return {'interpretation_request_id': case_id, 'version': case_version, 'sample_type': 'raredisease'}
+
+
+class TestCaseMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.mirror = CaseMirror(':memory:')
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def test_watermark_moves_to_the_latest_last_modified(self):
+        client = FakeClient([overview(1, '2020-01-02'), overview(2, '2020-01-03'), overview(3, '2020-01-01')])
+        self.assertEqual(self.mirror.sync(client), 3)
+        self.assertEqual(self.mirror.watermark, '2020-01-03')
+        self.assertEqual(len(list(self.mirror.list_cases_raw())), 3)
+
+    def test_next_sync_only_pulls_cases_modified_since_the_watermark(self):
+        client = FakeClient([overview(1, '2020-01-02'), overview(2, '2020-01-03')])
+        self.mirror.sync(client)
+        client.overviews.append(overview(3, '2020-01-04'))
+        # the case at the watermark itself is pulled again
+        self.assertEqual(self.mirror.sync(client), 2)
+        self.assertEqual(client.listings[-1], {'last_modified__gte': '2020-01-03'})
+        self.assertEqual(self.mirror.watermark, '2020-01-04')
+
+    def test_interrupted_sync_keeps_the_watermark(self):
+        class InterruptedClient(FakeClient):
+            def get_cases_raw(self, **params):
+                yield overview(1, '2020-01-02')
+                raise HTTPError("500:Server error")
+
+        with self.assertRaises(HTTPError):
+            self.mirror.sync(InterruptedClient([]))
+        self.assertIsNone(self.mirror.watermark)
+
+    def test_failed_details_do_not_stop_the_sync(self):
+        client = FakeClient([overview(i, '2020-01-{:02d}'.format(i)) for i in range(1, 31)], failing=[7])
+        self.assertEqual(self.mirror.sync(client, details=True, workers=4), 30)
+        self.assertEqual(self.mirror.watermark, '2020-01-30')
+        self.assertEqual(list(self.mirror.failed_details), [(7, 1)])
+        self.assertIsNone(self.mirror.get_case(7, 1))
+        self.assertIsNotNone(self.mirror.get_case(8, 1))
+        self.assertEqual(len(list(self.mirror.list_case_details())), 29)
+
+    def test_details_of_a_modified_case_are_dropped(self):
+        client = FakeClient([overview(1, '2020-01-02')])
+        self.mirror.sync(client, details=True)
+        self.assertIsNotNone(self.mirror.get_case(1, 1))
+        client.overviews = [overview(1, '2020-01-05')]
+        self.mirror.sync(client)
+        self.assertIsNone(self.mirror.get_case(1, 1))
+        self.mirror.sync(client, details=True)
+        self.assertIsNotNone(self.mirror.get_case(1, 1))
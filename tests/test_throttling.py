@@ -0,0 +1,113 @@
+import time
+import unittest
+
+from requests import Response
+from requests.exceptions import ConnectionError, HTTPError
+
+from pycipapi.cipapi_client import CipApiClient
+from pycipapi.throttling import AdaptiveConcurrency, Throttle, retry_after_seconds
+from tests.transport import TOKEN, FakeTransport
+
+
+def response(status, **headers):
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+class Overloaded(object):
+    """
+    Answers the first `rejections` requests with 429
+    """
+
+    def __init__(self, rejections, retry_after='0'):
+        self.rejections = rejections
+        self.retry_after = retry_after
+
+    def __call__(self, request):
+        if self.rejections:
+            self.rejections -= 1
+            return 429, {'Retry-After': self.retry_after}, {'detail': 'Request was throttled.'}
+        return 200, {}, {'interpretation_request_id': 1}
+
+
+class TestThrottledClient(unittest.TestCase):
+
+    def new_client(self, handler, **throttle_arguments):
+        self.transport = FakeTransport(handler)
+        return CipApiClient('https://cipapi.fake', token=TOKEN, transport=self.transport,
+                            throttle=Throttle(**throttle_arguments))
+
+    def test_throttled_request_is_sent_again(self):
+        with self.new_client(Overloaded(2), concurrency=8) as client:
+            self.assertEqual(client.get_case_raw(1, 1), {'interpretation_request_id': 1})
+            self.assertEqual(len(self.transport.requests), 3)
+            self.assertLess(client.throttle.limit, 8)
+
+    def test_throttled_request_fails_after_the_maximum_number_of_retries(self):
+        with self.new_client(Overloaded(10), max_retries=2) as client:
+            with self.assertRaises(HTTPError) as raised:
+                client.get_case_raw(1, 1)
+            self.assertEqual(raised.exception.response.status_code, 429)
+            self.assertEqual(len(self.transport.requests), 3)
+
+    def test_retry_after_pauses_the_next_requests(self):
+        with self.new_client(Overloaded(1, retry_after='1')) as client:
+            started_at = time.time()
+            client.get_case_raw(1, 1)
+            self.assertGreaterEqual(time.time() - started_at, 0.9)
+
+
+class TestThrottle(unittest.TestCase):
+
+    def test_overload_pauses_for_the_retry_after(self):
+        throttle = Throttle(rate=10)
+        self.assertTrue(throttle.record(response(503, **{'Retry-After': '30'}), throttle.concurrency.epoch))
+        self.assertAlmostEqual(throttle._paused_until, time.time() + 30, delta=1)
+        self.assertAlmostEqual(throttle.bucket.paused_until, time.time() + 30, delta=1)
+
+    def test_overload_without_retry_after_pauses_for_the_default(self):
+        throttle = Throttle(default_retry_after=5)
+        throttle.record(response(429), throttle.concurrency.epoch)
+        self.assertAlmostEqual(throttle._paused_until, time.time() + 5, delta=1)
+
+    def test_other_responses_are_not_retried(self):
+        throttle = Throttle()
+        self.assertFalse(throttle.record(response(200), 0))
+        self.assertFalse(throttle.record(response(500), 0))
+
+    def test_connection_error_lowers_the_limit(self):
+        throttle = Throttle(concurrency=8)
+        throttle.record_error(ConnectionError(), throttle.concurrency.epoch)
+        self.assertEqual(throttle.limit, 4)
+
+    def test_retry_after_as_http_date(self):
+        self.assertEqual(retry_after_seconds('Wed, 21 Oct 2015 07:28:30 GMT', now=1445412480), 30)
+        self.assertEqual(retry_after_seconds('120'), 120)
+        self.assertIsNone(retry_after_seconds('soon'))
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+
+    def test_rejections_of_a_burst_lower_the_limit_once(self):
+        concurrency = AdaptiveConcurrency(initial=8)
+        epochs = [concurrency.acquire() for _ in range(4)]
+        for epoch in epochs:
+            concurrency.on_overload(epoch)
+        self.assertEqual(concurrency.limit, 4)
+
+    def test_limit_grows_by_one_after_a_limit_of_successes(self):
+        concurrency = AdaptiveConcurrency(initial=4)
+        for _ in range(4):
+            concurrency.on_success()
+        self.assertAlmostEqual(concurrency.limit, 5, delta=0.2)
+
+    def test_limit_stays_within_its_bounds(self):
+        concurrency = AdaptiveConcurrency(initial=2, minimum=1, maximum=3)
+        for _ in range(5):
+            concurrency.on_overload(concurrency.epoch)
+        self.assertEqual(concurrency.limit, 1)
+        for _ in range(20):
+            concurrency.on_success()
+        self.assertEqual(concurrency.limit, 3)
@@ -0,0 +1,106 @@
+import base64
+import json
+import threading
+import time
+import unittest
+
+from requests.exceptions import HTTPError
+
+from pycipapi.cipapi_client import CipApiClient
+from pycipapi.concurrency import map_concurrently
+from tests.transport import FakeTransport
+
+
+def make_token(serial, expires_in):
+    claims = json.dumps({'serial': serial, 'exp': int(time.time() + expires_in)}).encode('utf-8')
+    return 'eyJhbGciOiJub25lIn0.{}.'.format(base64.urlsafe_b64encode(claims).decode('ascii').rstrip('='))
+
+
+class TokenServer(FakeTransport):
+    """
+    Hands out a new token for every token request, taking `delay` seconds, and only accepts the latest one unless
+    `reject_all` is set
+    """
+
+    def __init__(self, expires_in=3600, delay=0.0):
+        super(TokenServer, self).__init__(self.answer)
+        self.expires_in = expires_in
+        self.delay = delay
+        self.reject_all = False
+        self.issued = []
+
+    def new_token(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.issued.append(make_token(len(self.issued) + 1, self.expires_in))
+            return self.issued[-1]
+
+    def answer(self, request):
+        if self.reject_all or request.headers.get('Authorization') != 'JWT {}'.format(self.issued[-1]):
+            return 401, {}, {'detail': 'Signature has expired.'}
+        return 200, {}, {'interpretation_request_id': 1}
+
+    def revoke(self):
+        """
+        Issues a new token without handing it out, every token handed out so far is rejected
+        """
+        with self._lock:
+            self.issued.append(make_token(len(self.issued) + 1, self.expires_in))
+
+
+class TestTokenRenewal(unittest.TestCase):
+
+    def new_client(self, server, **kwargs):
+        return CipApiClient('https://cipapi.fake', user='user', password='password', transport=server,
+                            pool_maxsize=16, **kwargs)
+
+    def test_concurrent_rejections_renew_the_token_once(self):
+        server = TokenServer(delay=0.2)
+        with self.new_client(server) as client:
+            server.revoke()
+            results = list(map_concurrently(lambda _: client.get_case_raw(1, 1), range(16), workers=16))
+            self.assertTrue(all(result.ok for result in results))
+            # the token of the constructor, the revoked one and a single renewal
+            self.assertEqual(len(server.issued), 3)
+            self.assertEqual(len(server.sent('/get-token/')), 2)
+
+    def test_token_about_to_expire_is_renewed_in_the_background(self):
+        server = TokenServer(expires_in=30)
+        with self.new_client(server, token_refresh_margin=60) as client:
+            first_token = client.token
+            client.get_case_raw(1, 1)
+            deadline = time.time() + 5
+            while client.token == first_token and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertNotEqual(client.token, first_token)
+            self.assertEqual(len(server.sent('/get-token/')), 2)
+
+    def test_expired_token_is_renewed_before_the_request(self):
+        server = TokenServer(expires_in=-1)
+        with self.new_client(server) as client:
+            client.get_case_raw(1, 1)
+            case_request = server.sent('/interpretation-request/1/1/')[0]
+            self.assertEqual(case_request.headers['Authorization'], 'JWT {}'.format(server.issued[-1]))
+            self.assertEqual(len(server.sent('/get-token/')), 2)
+
+    def test_second_rejection_in_a_row_fails(self):
+        server = TokenServer()
+        with self.new_client(server) as client:
+            server.reject_all = True
+            with self.assertRaises(HTTPError):
+                client.get_case_raw(1, 1)
+            self.assertEqual(len(server.sent('/interpretation-request/1/1/')), 2)
+            self.assertEqual(len(server.sent('/get-token/')), 2)
+
+    def test_renewal_by_another_thread_is_not_repeated(self):
+        server = TokenServer()
+        with self.new_client(server) as client:
+            stale_token = client.token
+            client.renew_token(stale_token=stale_token)
+            renewals = [threading.Thread(target=client.renew_token, kwargs={'stale_token': stale_token})
+                        for _ in range(4)]
+            for renewal in renewals:
+                renewal.start()
+            for renewal in renewals:
+                renewal.join()
+            self.assertEqual(len(server.sent('/get-token/')), 2)
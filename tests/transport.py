@@ -0,0 +1,52 @@
+import json
+import threading
+
+from requests.adapters import BaseAdapter
+
+from pycipapi.cassette import build_response
+
+# unsigned JWT with an `exp` claim in 2100
+TOKEN = 'eyJhbGciOiJub25lIn0.eyJleHAiOjQxMDI0NDQ4MDB9.'
+
+
+class FakeTransport(BaseAdapter):
+    """
+    Answers the requests of a client with a handler instead of the network, keeping the requests it was sent. The
+    handler is called with the prepared request and returns the status, the headers and the body of the response,
+    the body being JSON encoded unless it is bytes. Tokens are handed out by `new_token` without calling the
+    handler.
+    """
+
+    def __init__(self, handler=None):
+        super(FakeTransport, self).__init__()
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def attach(self, session):
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append(request)
+        if request.path_url.endswith('/get-token/'):
+            status, headers, body = 200, {}, {'token': self.new_token()}
+        else:
+            status, headers, body = self.handler(request)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        return build_response(self, request, status, headers, body)
+
+    def new_token(self):
+        return TOKEN
+
+    def sent(self, path_suffix):
+        """
+        :return: the requests sent to a path ending with the given suffix
+        """
+        return [request for request in self.requests if request.path_url.split('?')[0].endswith(path_suffix)]
+
+    def close(self):
+        pass